@@ -155,30 +155,67 @@
 #         use_reloader=False  # critical on Windows
 #     )
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 import os
-import json
-
-app = Flask(__name__)
+import sys
+from functools import lru_cache
 
 # -----------------------
 # PATH CONFIG
 # -----------------------
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+PIPELINE_DIR = os.path.join(BASE_DIR, "start_pipeline")
+
+# Pipeline modules import each other by bare name; import them only that
+# way, or a module is loaded a second time as start_pipeline.<name>
+sys.path.insert(0, PIPELINE_DIR)
+from pipeline_utils import parse_time
+from storage import get_storage
+from article_store import read_recent, retention_start
+from embedding_store import story_embeddings
+from LCR_classified import NewsBiasClassifier
+from response_cache import ResponseCache, read_json
+from story_index import StoryIndex, SqliteStoryIndex, story_card, decode_cursor, DEFAULT_PAGE_SIZE
+from search_index import SearchIndex
+from embedding_index import EmbeddingIndex
+
+app = Flask(__name__)
+
+# JSON files or SQLite, as chosen by HERMES_STORAGE
+storage = get_storage()
+
+# Parsed, serialized and gzipped once per version of each data file
+documents = ResponseCache(DATA_DIR)
 
 
 # -----------------------
 # HELPER
 # -----------------------
-def load_json(filename):
-    path = os.path.join(DATA_DIR, filename)
+def send_cached(doc):
+    # Client already has this version
+    if request.if_none_match.contains(doc.etag):
+        response = Response(status=304)
+    elif request.accept_encodings["gzip"]:
+        response = Response(doc.gzipped, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(doc.body, mimetype="application/json")
+
+    response.set_etag(doc.etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
 
-    if not os.path.exists(path):
-        return {"error": f"{filename} not found"}
+def send_document(key, *sources):
+    return send_cached(documents.get(key, sources))
 
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+
+def send_stored(key, filename, build):
+    # SQLite backend: ``build()`` reads the document from the database; it
+    # is cached until the tables behind ``filename`` change
+    return send_cached(documents.compute(key, storage.fingerprint(filename), build))
 
 
 # -----------------------
@@ -191,22 +228,232 @@ def home():
 
 @app.route("/results/raw_news")
 def get_raw_news():
-    return jsonify(load_json("raw_news_indian.json"))
+    # Every article inside the retention period (archived days are not
+    # served), reloaded when the store's state.json (or the articles
+    # table) changes
+    if storage.name == "sqlite":
+        return send_stored("raw_news", "raw_news/state.json", storage.raw_document)
+
+    return send_document(
+        "raw_news",
+        ("raw_news/state.json", lambda _: read_recent(since_ts=retention_start())),
+        ("raw_news_indian.json", read_json)
+    )
 
 
 @app.route("/results/similar_links")
 def get_similar_links():
-    return jsonify(load_json("Similar_Links_Output.json"))
+    if storage.name == "sqlite":
+        return send_stored("similar_links", "Similar_Links_Output.json", storage.similar_document)
+    return send_document("similar_links", ("Similar_Links_Output.json", read_json))
 
 
 @app.route("/results/classified_news")
 def get_classified_news():
-    return jsonify(load_json("classified_news.json"))
+    if storage.name == "sqlite":
+        return send_stored("classified_news", "classified_news.json", storage.classified_document)
+    return send_document("classified_news", ("classified_news.json", read_json))
 
 
 @app.route("/results/final_results")
 def get_final_results():
-    return jsonify(load_json("classified_results.json"))
+    if storage.name == "sqlite":
+        return send_stored(
+            "final_results", "bias_classified_output.json",
+            lambda: storage.bias_document(NewsBiasClassifier)
+        )
+    return send_document("final_results", ("bias_classified_output.json", read_json))
+
+
+# -----------------------
+# STORIES (paginated, filtered from in-memory indexes)
+# -----------------------
+def story_index():
+    if storage.name == "sqlite":
+        return SqliteStoryIndex(storage)
+
+    doc = documents.get("final_results", [("bias_classified_output.json", read_json)])
+    return doc.derive("stories", StoryIndex)
+
+
+def bad_request(message):
+    response = jsonify({"error": message})
+    response.status_code = 400
+    return response
+
+
+@app.route("/stories")
+def list_stories():
+    args = request.args
+
+    try:
+        cursor = decode_cursor(args["cursor"]) if args.get("cursor") else None
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return bad_request("invalid cursor or limit")
+
+    # ISO dates/datetimes or RSS timestamps, inclusive
+    since = parse_time(args.get("from")) if args.get("from") else None
+    until = parse_time(args.get("to")) if args.get("to") else None
+    if (args.get("from") and since is None) or (args.get("to") and until is None):
+        return bad_request("invalid from/to date")
+
+    # to=YYYY-MM-DD covers the whole day
+    if until is not None and len(args["to"]) == 10:
+        until += 86400 - 0.001
+
+    stories, next_cursor = story_index().query(
+        filters={
+            "category": args.get("category"),
+            "final_bias": args.get("final_bias"),
+            "publisher": args.get("publisher")
+        },
+        since=since,
+        until=until,
+        cursor=cursor,
+        limit=limit
+    )
+
+    return jsonify({"stories": stories, "next_cursor": next_cursor})
+
+
+@app.route("/stories/facets")
+def story_facets():
+    return jsonify(story_index().facets())
+
+
+@app.route("/stories/<story_id>")
+def get_story(story_id):
+    story = story_index().get(story_id)
+
+    if story is None:
+        response = jsonify({"error": f"story {story_id} not found"})
+        response.status_code = 404
+        return response
+
+    return jsonify({"id": story_id, **story})
+
+
+# -----------------------
+# SEARCH (inverted index, kept in step with the data)
+# -----------------------
+search_index = SearchIndex()
+
+
+def synced_search_index():
+    if storage.name == "sqlite":
+        # Only stories labelled since the last request. Read and applied
+        # under the index lock, so two requests cannot read the same rows
+        # or move the version back
+        with search_index.lock:
+            for id_, story, updated_at in SqliteStoryIndex(storage).labeled_since(search_index.version or 0):
+                search_index.add(id_, story)
+                search_index.version = updated_at
+        return search_index
+
+    doc = documents.get("final_results", [("bias_classified_output.json", read_json)])
+    if search_index.version != doc.etag:
+        index = doc.derive("stories", StoryIndex)
+        search_index.sync(
+            zip((id_ for _, id_ in index.keys), index.stories),
+            version=doc.etag
+        )
+    return search_index
+
+
+@app.route("/search")
+def search_stories():
+    args = request.args
+    query = args.get("q", "").strip()
+
+    if not query:
+        return bad_request("missing q")
+
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+        offset = max(0, int(args.get("offset", 0)))
+    except ValueError:
+        return bad_request("invalid limit or offset")
+
+    result = synced_search_index().search(
+        query,
+        filters={"category": args.get("category"), "final_bias": args.get("final_bias")},
+        limit=limit,
+        offset=offset
+    )
+
+    return jsonify({"query": query, **result})
+
+
+# -----------------------
+# SIMILAR STORIES (stored embeddings, read incrementally)
+# -----------------------
+embedding_index = EmbeddingIndex(story_embeddings)
+
+MAX_SIMILAR = 50
+
+
+@lru_cache(maxsize=256)
+def encode_query(query):
+    # Loaded on the first semantic query, not at startup
+    from models import get_sentence_model
+
+    return get_sentence_model().encode([query], normalize_embeddings=True, convert_to_numpy=True)[0]
+
+
+def similar_cards(matches, limit):
+    # Stories can be embedded before they are labelled; keep published ones
+    index = story_index()
+    cards = []
+
+    for id_, score in matches:
+        story = index.get(id_)
+        if story is not None:
+            cards.append(dict(story_card(id_, story), score=round(score, 4)))
+            if len(cards) == limit:
+                break
+
+    return cards
+
+
+def similar_limit(args):
+    return max(1, min(int(args.get("limit", 10)), MAX_SIMILAR))
+
+
+@app.route("/stories/<story_id>/similar")
+def similar_stories(story_id):
+    try:
+        limit = similar_limit(request.args)
+    except ValueError:
+        return bad_request("invalid limit")
+
+    embedding_index.refresh()
+    matches = embedding_index.similar(story_id, 2 * limit)
+
+    if matches is None:
+        response = jsonify({"error": f"no embedding for story {story_id}"})
+        response.status_code = 404
+        return response
+
+    return jsonify({"id": story_id, "results": similar_cards(matches, limit)})
+
+
+@app.route("/semantic_search")
+def semantic_search():
+    query = request.args.get("q", "").strip()
+
+    if not query:
+        return bad_request("missing q")
+
+    try:
+        limit = similar_limit(request.args)
+    except ValueError:
+        return bad_request("invalid limit")
+
+    embedding_index.refresh()
+    matches = embedding_index.search(encode_query(query), 2 * limit)
+
+    return jsonify({"query": query, "results": similar_cards(matches, limit)})
 
 
 # -----------------------
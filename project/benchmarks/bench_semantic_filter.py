@@ -0,0 +1,93 @@
+"""Micro-benchmark: batched semantic_filter vs. the old per-candidate loop.
+
+    python benchmarks/bench_semantic_filter.py [n_candidates] [repeats]
+
+Candidates are built from the titles/summaries already in data/, so no
+network access is needed.
+"""
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(BASE_DIR, "start_pipeline"))
+
+import Fetch_Similar_News as fsn
+from models import get_sentence_model
+from sklearn.metrics.pairwise import cosine_similarity
+
+
+def legacy_semantic_filter(event_text, candidates):
+    # The implementation semantic_filter replaced: one forward pass and one
+    # sklearn call per candidate
+    model = get_sentence_model()
+    event_embedding = model.encode(event_text)
+    matched = []
+
+    for article in candidates:
+        text = article["title"] + " " + article["description"]
+        if not text.strip():
+            continue
+
+        article_embedding = model.encode(text)
+        score = cosine_similarity([event_embedding], [article_embedding])[0][0]
+
+        if score >= fsn.SIMILARITY_THRESHOLD:
+            matched.append({**article, "similarity_score": round(float(score), 3)})
+
+    return sorted(matched, key=lambda x: x["similarity_score"], reverse=True)[:7]
+
+
+def load_candidates(n):
+    with open(os.path.join(BASE_DIR, "data", "Similar_Links_Output.json"), "r", encoding="utf-8") as f:
+        results = json.load(f).get("results", [])
+
+    candidates = []
+    for item in results:
+        for r in item.get("related_reports", []):
+            candidates.append({
+                "title": r.get("title") or "",
+                "description": r.get("summary") or "",
+                "url": r.get("url", "")
+            })
+
+    if not candidates:
+        raise SystemExit("No related reports in Similar_Links_Output.json to build candidates from")
+
+    while len(candidates) < n:
+        candidates.extend(candidates[:n - len(candidates)])
+
+    event_text = results[0]["input_article"].get("summary") or results[0]["input_article"].get("title")
+    return event_text, candidates[:n]
+
+
+def best_of(fn, repeats):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    event_text, candidates = load_candidates(n)
+
+    # warm up the model so neither side pays for lazy initialisation
+    fsn.encode_texts([event_text])
+
+    legacy_time, legacy = best_of(lambda: legacy_semantic_filter(event_text, candidates), repeats)
+    batched_time, batched = best_of(lambda: fsn.semantic_filter(event_text, candidates), repeats)
+
+    same = [m["url"] for m in legacy] == [m["url"] for m in batched]
+
+    print(f"candidates: {n} | repeats: {repeats}")
+    print(f"legacy loop : {legacy_time * 1000:9.1f} ms")
+    print(f"batched     : {batched_time * 1000:9.1f} ms")
+    print(f"speedup     : {legacy_time / batched_time:9.1f}x")
+    print(f"same top-{fsn.MAX_MATCHES}  : {same}")
@@ -0,0 +1,58 @@
+"""Deterministic stand-in for the sentence-transformers model.
+
+Texts are embedded by feature hashing their words (signed, crc32-based),
+so texts sharing words are close in cosine space and every run produces
+the same vectors without downloading or running a model:
+
+    from embedding_stub import HashingEncoder
+    from models import register_model
+    register_model(HashingEncoder())
+"""
+import re
+import zlib
+import numpy as np
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "have", "in", "is", "it", "its", "of", "on", "or", "that", "the", "this",
+    "to", "was", "were", "will", "with"
+}
+
+
+class HashingEncoder:
+    """The part of SentenceTransformer the pipeline uses: ``encode`` and
+    ``get_sentence_embedding_dimension``."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+        self._buckets = {}   # token → (index, sign)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _bucket(self, token):
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            h = zlib.crc32(token.encode("utf-8"))
+            bucket = self._buckets[token] = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+        return bucket
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False,
+               convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in TOKEN.findall((text or "").lower()):
+                if token not in STOPWORDS:
+                    index, sign = self._bucket(token)
+                    out[row, index] += sign
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out /= np.where(norms == 0, 1.0, norms)
+
+        return out[0] if single else out
@@ -0,0 +1,287 @@
+"""Recorded fixtures for the offline benchmarks, and the server that plays them back.
+
+The corpus is built from the stories frozen in benchmarks/corpus.json (a
+trimmed copy of an earlier data/Similar_Links_Output.json; refresh it with
+``python benchmarks/fixtures.py freeze``, then record a new baseline):
+their input articles become RSS items and article pages, and their related
+reports become Google News search results (behind a redirect map) or
+entries of the shared candidate feeds. Larger corpora repeat the stories
+under new URLs, so a corpus of any size is the same on every run.
+
+FixtureServer is an HTTP proxy. Stages run with http_proxy pointing at it
+and fetch the usual publisher, feed and news.google.com URLs (over plain
+http), which it answers from the corpus.
+"""
+import html
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BENCH_DIR = os.path.abspath(os.path.dirname(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "start_pipeline"))
+
+from rss_sources_indian import INDIAN_NEWS_SOURCES
+
+# Stories the corpus is built from; frozen so that pipeline runs, which
+# rewrite data/, do not change what is measured
+CORPUS_FILE = os.path.join(BENCH_DIR, "corpus.json")
+SIMILAR_FILE = os.path.join(BASE_DIR, "data", "Similar_Links_Output.json")
+
+GOOGLE_NEWS_RSS = "http://news.google.com/rss/search"
+
+# Shared candidate feeds (Fetch_Similar_News.RSS_FEEDS during a run)
+POOL_FEEDS = 9
+
+# Input articles are spread over this many hours before the corpus is built
+# (inside the default processing window)
+PUBLISHED_WITHIN_HOURS = 36
+
+# =====================================================
+# HELPERS
+# =====================================================
+
+def to_http(url):
+    return "http://" + url.split("://", 1)[1] if url.startswith("https://") else url
+
+
+def variant(url, copy):
+    # The n-th repetition of a story lives under its own URL
+    return url if copy == 0 else url.rstrip("/") + f"/v{copy}"
+
+
+def page_key(url):
+    parts = urlsplit(url)
+    return parts.netloc.lower() + (parts.path or "/")
+
+
+def flatten(text):
+    return " ".join((text or "").replace("*", " ").split())
+
+
+def article_html(title, url, paragraphs, image):
+    body = "".join(f"<p>{html.escape(p)}</p>" for p in paragraphs if p)
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{html.escape(title)}</title>"
+        f'<link rel="canonical" href="{html.escape(url)}">'
+        f'<meta property="og:image" content="{html.escape(image)}">'
+        "</head><body><article>"
+        f"<h1>{html.escape(title)}</h1>{body}"
+        "</article></body></html>"
+    ).encode("utf-8")
+
+
+def rss_item(title, link, description, published, guid=None):
+    return (
+        "<item>"
+        f"<title>{html.escape(title)}</title>"
+        f"<link>{html.escape(link)}</link>"
+        f"<guid>{html.escape(guid or link)}</guid>"
+        f"<description>{html.escape(description)}</description>"
+        f"<pubDate>{format_datetime(datetime.fromtimestamp(published, timezone.utc))}</pubDate>"
+        "</item>"
+    )
+
+
+def rss_document(title, items):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{html.escape(title)}</title>{''.join(items)}</channel></rss>"
+    ).encode("utf-8")
+
+# =====================================================
+# CORPUS
+# =====================================================
+
+def load_templates():
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def freeze_templates(source=SIMILAR_FILE, path=CORPUS_FILE):
+    """Write the stories of ``source`` with related reports to ``path``,
+    keeping only the fields Corpus reads."""
+    with open(source, "r", encoding="utf-8") as f:
+        stories = [s for s in json.load(f).get("results", []) if s.get("related_reports")]
+
+    if not stories:
+        raise SystemExit(f"No stories with related reports in {source} to build fixtures from")
+
+    def pick(d, keys):
+        return {k: d[k] for k in keys if d.get(k) is not None}
+
+    templates = [
+        {
+            "input_article": pick(s["input_article"], ("url", "title", "summary")),
+            "story_summary": s.get("story_summary"),
+            "related_reports": [
+                pick(r, ("url", "title", "description", "summary")) for r in s["related_reports"]
+            ]
+        }
+        for s in stories
+    ]
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(templates, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+
+    print(f"Froze {len(templates)} stories to {path}")
+
+
+class Corpus:
+    """Everything the fixture server answers for one corpus size."""
+
+    def __init__(self, size, now=None):
+        self.size = size
+        self.pages = {}        # page_key → (content type, body)
+        self.searches = []     # (input title, Google News RSS body), longest title first
+        self.redirects = {}    # Google News link → publisher URL
+
+        now = now or time.time()
+        rng = random.Random(size)
+        templates = load_templates()
+
+        self.sources = [dict(s, rss=to_http(s["rss"])) for s in INDIAN_NEWS_SOURCES]
+        self.pool_feeds = [f"http://feeds.fixture/pool/{k}.xml" for k in range(POOL_FEEDS)]
+
+        source_items = {s["rss"]: [] for s in self.sources}
+        pool_items = []
+
+        for i in range(size):
+            template = templates[i % len(templates)]
+            copy = i // len(templates)
+            article = template["input_article"]
+
+            url = variant(to_http(article["url"]), copy)
+            title = article["title"] + (f" ({copy + 1})" if copy else "")
+            lead = flatten(article.get("summary"))
+            published = now - rng.uniform(0, PUBLISHED_WITHIN_HOURS * 3600)
+
+            source = self.sources[i % len(self.sources)]
+            source_items[source["rss"]].append(
+                rss_item(title, url, lead[:300], published, guid=f"fixture-{size}-{i}")
+            )
+            self._page(url, article_html(
+                title, url, [title + ".", lead, flatten(template.get("story_summary"))],
+                image=f"http://{urlsplit(url).netloc}/img/{i}.jpg"
+            ))
+
+            google_items = []
+
+            for j, report in enumerate(template["related_reports"]):
+                report_url = variant(to_http(report["url"]), copy)
+                report_title = report.get("title") or ""
+
+                # Descriptions repeat the story's lead, as feed descriptions
+                # often do, so the hashing encoder matches them like the
+                # sentence model matched the recorded reports
+                description = flatten(report.get("description")) + " " + lead
+
+                self._page(report_url, article_html(
+                    report_title, report_url,
+                    [report_title + ".", flatten(report.get("summary") or report.get("description"))],
+                    image=f"http://{urlsplit(report_url).netloc}/img/{i}-{j}.jpg"
+                ))
+
+                # Half come from Google News (resolved through the redirect
+                # map), half from the shared candidate feeds
+                if j % 2 == 0:
+                    link = f"http://news.google.com/rss/articles/fixture-{i}-{j}?oc=5"
+                    self.redirects[link] = report_url
+                    google_items.append(rss_item(report_title, link, description, published))
+                else:
+                    pool_items.append(rss_item(report_title, report_url, description, published))
+
+            self.searches.append((title, rss_document("Google News", google_items)))
+
+        for source in self.sources:
+            self._page(source["rss"], rss_document(source["name"], source_items[source["rss"]]))
+
+        for k, feed in enumerate(self.pool_feeds):
+            self._page(feed, rss_document(f"Pool {k}", pool_items[k::POOL_FEEDS]))
+
+        self.searches.sort(key=lambda s: len(s[0]), reverse=True)
+        self.empty_search = rss_document("Google News", [])
+
+    def _page(self, url, body):
+        content_type = "application/rss+xml" if body.startswith(b"<?xml") else "text/html; charset=utf-8"
+        self.pages[page_key(url)] = (content_type, body)
+
+    def search(self, query):
+        # The stage queries with the start of the article text, which starts
+        # with the title
+        for title, body in self.searches:
+            if title in query:
+                return body
+        return self.empty_search
+
+# =====================================================
+# SERVER
+# =====================================================
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    corpus = None
+    requests_served = 0
+    lock = threading.Lock()
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # Proxied requests carry the absolute URL; direct ones only a path
+        url = self.path if "://" in self.path else f"http://{self.headers.get('Host', '')}{self.path}"
+        parts = urlsplit(url)
+
+        with FixtureHandler.lock:
+            FixtureHandler.requests_served += 1
+
+        corpus = FixtureHandler.corpus
+
+        if f"http://{parts.netloc}{parts.path}" == GOOGLE_NEWS_RSS:
+            query = parse_qs(parts.query).get("q", [""])[0]
+            self._send(200, "application/rss+xml", corpus.search(query))
+            return
+
+        page = corpus.pages.get(page_key(url))
+        if page is None:
+            self._send(404, "text/plain", b"not in fixtures")
+        else:
+            self._send(200, *page)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fixture_server(corpus=None, port=0):
+    """Start the proxy in a background thread; returns (server, proxy_url).
+
+    Swap corpora with ``FixtureHandler.corpus = ...``.
+    """
+    FixtureHandler.corpus = corpus
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["freeze"]:
+        freeze_templates()
+    else:
+        print("Usage: python fixtures.py freeze")
+        sys.exit(1)
@@ -0,0 +1,406 @@
+"""Offline benchmark of every pipeline stage.
+
+    python benchmarks/run_benchmarks.py [--sizes 25,100,400] [--repeats 3]
+                                        [--tolerance 0.4] [--memory-tolerance 0.3]
+                                        [--update-baseline]
+
+For each corpus size a scratch copy of the project is made and
+fetch_news_indian, Fetch_Similar_News, classify_news and LCR_classified run
+in order, each in its own interpreter. They read recorded fixtures
+(fixtures.py), tools/stub_ollama.py and a hashing embedding stub
+(embedding_stub.py); nothing touches the network or the real data/.
+
+Per stage: throughput (corpus articles per second), latency percentiles of
+its unit of work and tracemalloc peak memory. Every stage runs several
+times from the same data: ``--repeats`` timed passes (throughput from the
+fastest, percentiles over all of their samples), then once under
+tracemalloc, which would otherwise slow the timings down. Results are compared with benchmarks/baseline.json.
+A stage that is slower or larger than the tolerances allow, that produces
+a different number of items or that has no baseline entry makes the run
+exit with status 1. --update-baseline records the current results instead.
+"""
+import argparse
+import asyncio
+import functools
+import importlib
+import inspect
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.abspath(os.path.dirname(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+DEFAULT_SIZES = [25, 100, 400]
+
+# Differences smaller than these are noise whatever the tolerance says
+# (stages that take a fraction of a second, sub-millisecond latencies)
+MIN_WALL_DELTA_S = 0.1
+MIN_LATENCY_DELTA_MS = 1.0
+MIN_MEMORY_DELTA_MB = 1.0
+
+# "timed" is the stage's unit of work; every call is one latency sample
+STAGES = [
+    {"name": "fetch_news_indian", "unit": "feed", "timed": ("feed_fetcher", "fetch_feed")},
+    {"name": "Fetch_Similar_News", "unit": "article", "timed": ("Fetch_Similar_News", "process_article")},
+    {"name": "classify_news", "unit": "image lookup", "timed": ("image_fetcher", "fetch_image")},
+    {"name": "LCR_classified", "unit": "story", "timed": ("LCR_classified", "NewsBiasClassifier.classify_article")}
+]
+
+RESULT_MARKER = "BENCH_RESULT "
+
+# Imported lazily by the stages; loaded before the clock starts
+LAZY_IMPORTS = ["trafilatura", "bs4"]
+
+# =====================================================
+# STAGE RUN (child interpreter)
+# =====================================================
+
+def instrument(target, samples):
+    # Replace module.attr (or module.Class.attr) with a timing wrapper
+    module_name, attr = target
+    owner = importlib.import_module(module_name)
+    *path, name = attr.split(".")
+    for part in path:
+        owner = getattr(owner, part)
+
+    fn = getattr(owner, name)
+
+    if inspect.iscoroutinefunction(fn):
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+    else:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+
+    setattr(owner, name, functools.wraps(fn)(timed))
+
+
+def run_stage_here(stage, project, memory=False):
+    sys.path.insert(0, os.path.join(project, "start_pipeline"))
+    sys.path.insert(0, BENCH_DIR)
+
+    from embedding_stub import HashingEncoder
+    from models import register_model
+
+    register_model(HashingEncoder())
+
+    with open(os.path.join(project, "bench_fixtures.json"), "r", encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    module = importlib.import_module(stage["name"])
+
+    # Feed lists are code, not configuration; point them at the fixtures
+    if stage["name"] == "fetch_news_indian":
+        module.INDIAN_NEWS_SOURCES = fixtures["sources"]
+    elif stage["name"] == "Fetch_Similar_News":
+        module.RSS_FEEDS = fixtures["pool_feeds"]
+
+    for name in LAZY_IMPORTS:
+        importlib.import_module(name)
+
+    samples = []
+    instrument(stage["timed"], samples)
+
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    result = module.main()
+    if asyncio.iscoroutine(result):
+        asyncio.run(result)
+
+    wall = time.perf_counter() - started
+
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(RESULT_MARKER + json.dumps({"peak": peak}))
+    else:
+        print(RESULT_MARKER + json.dumps({"wall": wall, "samples": samples}))
+
+# =====================================================
+# SCRATCH PROJECT
+# =====================================================
+
+def make_scratch(corpus):
+    """Copy of the project code with an empty data/ seeded from ``corpus``."""
+    from pipeline_utils import normalize_url
+
+    scratch = tempfile.mkdtemp(prefix="hermes-bench-")
+    project = os.path.join(scratch, "project")
+
+    shutil.copytree(
+        BASE_DIR, project,
+        ignore=shutil.ignore_patterns("data", "benchmarks", "__pycache__", "*.db")
+    )
+
+    data_dir = os.path.join(project, "data")
+    os.makedirs(data_dir)
+    shutil.copy(os.path.join(BASE_DIR, "data", "publisher_list.json"), data_dir)
+
+    # The redirect map, in the format RedirectCache keeps
+    now = time.time()
+    with open(os.path.join(data_dir, "google_redirect_cache.json"), "w", encoding="utf-8") as f:
+        json.dump({normalize_url(k): {"final": v, "ts": now} for k, v in corpus.redirects.items()}, f)
+
+    with open(os.path.join(project, "bench_fixtures.json"), "w", encoding="utf-8") as f:
+        json.dump({"sources": corpus.sources, "pool_feeds": corpus.pool_feeds}, f)
+
+    return scratch, project
+
+
+def count_outputs(stage, data_dir):
+    from pipeline_utils import load_json_file
+
+    def load(name):
+        return load_json_file(os.path.join(data_dir, name), {}) or {}
+
+    if stage == "fetch_news_indian":
+        return load(os.path.join("raw_news", "state.json")).get("last_seq", 0)
+    if stage == "Fetch_Similar_News":
+        doc = load("Similar_Links_Output.json")
+        return len(doc.get("results", [])) + len(doc.get("no_related_reports", []))
+    if stage == "classify_news":
+        return len(load("classified_news.json").get("results", []))
+    doc = load("bias_classified_output.json")
+    return len(doc.get("political_articles_data", [])) + len(doc.get("non_political_articles_data", []))
+
+
+def run_stage(stage, project, env, memory=False):
+    command = [sys.executable, os.path.abspath(__file__), "--run-stage", stage["name"], "--project", project]
+    if memory:
+        command.append("--memory")
+
+    result = subprocess.run(
+        command,
+        cwd=project,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+
+    output = (result.stdout + result.stderr).strip().splitlines()
+    raise RuntimeError(f"{stage['name']} failed:\n" + "\n".join(output[-30:]))
+
+# =====================================================
+# METRICS
+# =====================================================
+
+def percentile(samples, p):
+    # Nearest rank on sorted samples
+    if not samples:
+        return None
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+def measure(stage, project, env, repeats=1):
+    """``repeats`` timed passes, then a tracemalloc pass, all from the same
+    starting data; the last pass's data is what the next stage reads."""
+    data_dir = os.path.join(project, "data")
+    snapshot = data_dir + ".before"
+    shutil.copytree(data_dir, snapshot)
+
+    walls, samples = [], []
+    for _ in range(repeats):
+        timed = run_stage(stage, project, env)
+        walls.append(timed["wall"])
+        samples += timed["samples"]
+
+        shutil.rmtree(data_dir)
+        shutil.copytree(snapshot, data_dir)
+
+    shutil.rmtree(snapshot)
+
+    memory = run_stage(stage, project, env, memory=True)
+    return {"wall": min(walls), "samples": samples, "calls": len(samples) // repeats, "peak": memory["peak"]}
+
+
+def summarize(size, raw, outputs):
+    samples = sorted(raw["samples"])
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "throughput": round(size / raw["wall"], 3),
+        "wall_s": round(raw["wall"], 3),
+        "calls": raw["calls"],
+        "p50_ms": ms(percentile(samples, 50)),
+        "p95_ms": ms(percentile(samples, 95)),
+        "p99_ms": ms(percentile(samples, 99)),
+        "peak_mb": round(raw["peak"] / 2 ** 20, 2),
+        "outputs": outputs
+    }
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """Regressions of ``results`` against ``baseline`` (both keyed stage@size)."""
+    failures = []
+
+    for key, m in results.items():
+        base = baseline.get(key)
+        if base is None:
+            failures.append(f"{key}: no baseline (record one with --update-baseline)")
+            continue
+
+        if m["outputs"] != base["outputs"]:
+            failures.append(f"{key}: produced {m['outputs']} items (baseline {base['outputs']})")
+
+        if (m["throughput"] < base["throughput"] * (1 - tolerance)
+                and m["wall_s"] - base["wall_s"] > MIN_WALL_DELTA_S):
+            failures.append(f"{key}: {m['throughput']:.2f} articles/s (baseline {base['throughput']:.2f})")
+
+        for p in ("p50_ms", "p95_ms"):
+            if (base[p] is not None and m[p] is not None and m[p] > base[p] * (1 + tolerance)
+                    and m[p] - base[p] > MIN_LATENCY_DELTA_MS):
+                failures.append(f"{key}: {p} {m[p]:.1f} (baseline {base[p]:.1f})")
+
+        if (m["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance)
+                and m["peak_mb"] - base["peak_mb"] > MIN_MEMORY_DELTA_MB):
+            failures.append(f"{key}: peak {m['peak_mb']:.1f} MB (baseline {base['peak_mb']:.1f} MB)")
+
+    return failures
+
+
+def print_report(results, baseline):
+    print(f"\n{'stage':<20}{'size':>6}{'art/s':>10}{'vs base':>9}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'peak MB':>9}{'outputs':>9}  unit")
+
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    for stage in STAGES:
+        for key, m in results.items():
+            name, size = key.split("@")
+            if name != stage["name"]:
+                continue
+
+            base = baseline.get(key)
+            delta = f"{(m['throughput'] / base['throughput'] - 1) * 100:+.0f}%" if base else "new"
+
+            print(f"{name:<20}{size:>6}{m['throughput']:>10.2f}{delta:>9}{fmt(m['p50_ms']):>10}"
+                  f"{fmt(m['p95_ms']):>10}{fmt(m['p99_ms']):>10}{m['peak_mb']:>9.1f}{m['outputs']:>9}"
+                  f"  {stage['unit']} ({m['calls']})")
+
+# =====================================================
+# MAIN
+# =====================================================
+
+def main(args):
+    sys.path.insert(0, os.path.join(BASE_DIR, "start_pipeline"))
+    sys.path.insert(0, os.path.join(BASE_DIR, "tools"))
+
+    from fixtures import Corpus, FixtureHandler, GOOGLE_NEWS_RSS, start_fixture_server
+    from stub_ollama import start_stub
+
+    fixture_server, proxy = start_fixture_server()
+    ollama_server, ollama_url = start_stub(delay=args.ollama_delay)
+
+    env = dict(
+        os.environ,
+        http_proxy=proxy, HTTP_PROXY=proxy,
+        no_proxy="127.0.0.1,localhost", NO_PROXY="127.0.0.1,localhost",
+        OLLAMA_HOST=ollama_url,
+        HERMES_GOOGLE_NEWS_RSS=GOOGLE_NEWS_RSS,
+        HERMES_STORAGE="json",
+        PYTHONHASHSEED="0"
+    )
+    # Every fixture host is local; per-domain politeness would only add sleeps
+    env.setdefault("HERMES_DOMAIN_INTERVAL", "0")
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+
+    try:
+        for size in args.sizes:
+            corpus = Corpus(size)
+            FixtureHandler.corpus = corpus
+            scratch, project = make_scratch(corpus)
+
+            try:
+                for stage in STAGES:
+                    print(f"▶ {stage['name']} @ {size} articles")
+                    raw = measure(stage, project, env, repeats=args.repeats)
+                    outputs = count_outputs(stage["name"], os.path.join(project, "data"))
+                    results[f"{stage['name']}@{size}"] = summarize(size, raw, outputs)
+            finally:
+                if args.keep:
+                    print(f"Scratch project kept at {project}")
+                else:
+                    shutil.rmtree(scratch, ignore_errors=True)
+    finally:
+        fixture_server.shutdown()
+        ollama_server.shutdown()
+
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline updated: {BASELINE_FILE}")
+        return 0
+
+    failures = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    if failures:
+        print("\n❌ Regressions:")
+        for failure in failures:
+            print("  " + failure)
+        return 1
+
+    print("\n✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=DEFAULT_SIZES)
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="timed passes per stage (the fastest counts)")
+    parser.add_argument("--tolerance", type=float, default=0.4,
+                        help="allowed throughput/latency regression (fraction)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.3,
+                        help="allowed peak memory growth (fraction)")
+    parser.add_argument("--ollama-delay", type=float, default=0.0,
+                        help="simulated model latency per summary (seconds)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch projects")
+    parser.add_argument("--run-stage", help=argparse.SUPPRESS)
+    parser.add_argument("--project", help=argparse.SUPPRESS)
+    parser.add_argument("--memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        run_stage_here(next(s for s in STAGES if s["name"] == args.run_stage), args.project, args.memory)
+    else:
+        sys.exit(main(args))
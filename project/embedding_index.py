@@ -0,0 +1,194 @@
+import os
+import threading
+import numpy as np
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+# Use the approximate (LSH) index from this many stories on; below it an
+# exact matrix product is already fast
+ANN_MIN_ROWS = int(os.environ.get("HERMES_ANN_MIN_ROWS", "20000"))
+
+# Hyperplanes per table and number of tables
+LSH_BITS = 10
+LSH_TABLES = 8
+
+# =====================================================
+# APPROXIMATE INDEX
+# =====================================================
+
+class LshIndex:
+    """Random-hyperplane LSH for cosine similarity.
+
+    Every row is hashed into one bucket per table; a query is compared
+    exactly against the union of its buckets only.
+    """
+
+    def __init__(self, dim, bits=LSH_BITS, tables=LSH_TABLES, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables, dim, bits)).astype(np.float32)
+        self.weights = 1 << np.arange(bits, dtype=np.int64)
+        self.buckets = [{} for _ in range(tables)]
+        self.row_codes = {}
+
+    def _codes(self, vectors):
+        # (n, tables) bucket codes
+        return np.stack(
+            [((vectors @ planes) > 0).astype(np.int64) @ self.weights for planes in self.planes],
+            axis=1
+        )
+
+    def add(self, rows, vectors):
+        for row, codes in zip(rows, self._codes(vectors)):
+            old = self.row_codes.get(row)
+            if old is not None:
+                for table, code in zip(self.buckets, old):
+                    table[code].discard(row)
+
+            codes = tuple(int(c) for c in codes)
+            for table, code in zip(self.buckets, codes):
+                table.setdefault(code, set()).add(row)
+            self.row_codes[row] = codes
+
+    def candidates(self, vector):
+        found = set()
+        for table, code in zip(self.buckets, self._codes(vector[None, :])[0]):
+            found |= table.get(int(code), set())
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+# =====================================================
+# EMBEDDING INDEX
+# =====================================================
+
+class EmbeddingIndex:
+    """Story embeddings as one normalized float32 matrix.
+
+    ``refresh`` reads only rows appended to the EmbeddingStore since the
+    last call (a re-embedded story overwrites its row), so the matrix
+    follows the pipeline without reloading. Top-k is a single matrix
+    product plus argpartition, restricted to LSH candidates once the
+    corpus reaches ``ann_min_rows``.
+    """
+
+    def __init__(self, store, ann_min_rows=ANN_MIN_ROWS):
+        self.store = store
+        self.ann_min_rows = ann_min_rows
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ids = []
+        self.pos = {}
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.n = 0
+        self.rows_read = 0
+        self.ids_offset = 0
+        self.lsh = None
+        self.stamp = None
+        self.meta = None
+
+    def __len__(self):
+        return self.n
+
+    def refresh(self):
+        try:
+            st = os.stat(self.store.ids_path)
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        meta = self.store.meta()
+
+        with self.lock:
+            if stamp == self.stamp and meta == self.meta:
+                return
+
+            # Compacted (id file replaced) or started over for another
+            # model or dimension: the rows read so far mean nothing now
+            if (stamp is None or self.stamp is None or stamp[0] != self.stamp[0]
+                    or stamp[2] < self.ids_offset or meta != self.meta):
+                self._reset()
+
+            ids, vectors, self.ids_offset = self.store.read(self.rows_read, self.ids_offset)
+            self.rows_read += len(ids)
+            self.stamp = stamp
+            self.meta = meta
+
+            if ids:
+                self._add(ids, vectors)
+
+    def _add(self, ids, vectors):
+        if self.matrix.shape[1] != vectors.shape[1]:
+            # Rows of another dimension cannot be kept next to these
+            self.ids = []
+            self.pos = {}
+            self.n = 0
+            self.lsh = None
+            self.matrix = np.zeros((max(1024, len(ids)), vectors.shape[1]), dtype=np.float32)
+
+        touched = []
+        for id_, vector in zip(ids, vectors):
+            row = self.pos.get(id_)
+            if row is None:
+                if self.n == len(self.matrix):
+                    grown = np.zeros((2 * len(self.matrix), self.matrix.shape[1]), dtype=np.float32)
+                    grown[:self.n] = self.matrix[:self.n]
+                    self.matrix = grown
+
+                row = self.n
+                self.n += 1
+                self.pos[id_] = row
+                self.ids.append(id_)
+
+            self.matrix[row] = vector
+            touched.append(row)
+
+        if self.lsh is None and self.n >= self.ann_min_rows:
+            self.lsh = LshIndex(self.matrix.shape[1])
+            touched = range(self.n)
+
+        if self.lsh is not None:
+            rows = np.fromiter(touched, dtype=np.int64)
+            self.lsh.add(rows.tolist(), self.matrix[rows])
+
+    def _top_k(self, vector, k, exclude=None):
+        rows = None
+        if self.lsh is not None:
+            rows = self.lsh.candidates(vector)
+            if len(rows) <= k:
+                rows = None   # too few candidates; fall back to exact
+
+        if rows is None:
+            scores = self.matrix[:self.n] @ vector
+            rows = np.arange(self.n)
+        else:
+            scores = self.matrix[rows] @ vector
+
+        if exclude is not None:
+            scores = np.where(rows == exclude, -np.inf, scores)
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            (self.ids[rows[i]], float(scores[i]))
+            for i in top if np.isfinite(scores[i])
+        ]
+
+    def similar(self, id_, k=10):
+        """Stories closest to story ``id_``; None when it has no embedding."""
+        with self.lock:
+            row = self.pos.get(id_)
+            if row is None:
+                return None
+            return self._top_k(self.matrix[row], k, exclude=row)
+
+    def search(self, vector, k=10):
+        with self.lock:
+            if not self.n:
+                return []
+            return self._top_k(np.asarray(vector, dtype=np.float32), k)
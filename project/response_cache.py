@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+# =====================================================
+# LOADERS
+# =====================================================
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# =====================================================
+# DOCUMENTS
+# =====================================================
+
+class CachedDocument:
+    """A data file parsed, serialized and gzipped once.
+
+    ``data`` is the parsed object (for building indexes), ``body`` and
+    ``gzipped`` are ready-to-send response bodies and ``etag`` identifies
+    this version of the file.
+    """
+
+    def __init__(self, stamp, data):
+        self.stamp = stamp
+        self.data = data
+        self.body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.gzipped = gzip.compress(self.body, compresslevel=6)
+        self.etag = hashlib.md5(self.body).hexdigest()
+
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    def derive(self, name, build):
+        """``build(data)``, computed once for this version of the file.
+
+        Used for indexes that must be rebuilt whenever the file changes.
+        """
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = build(self.data)
+            return self._derived[name]
+
+
+class ResponseCache:
+    """Serves data files from memory until the pipeline rewrites them.
+
+    Each request only stats the file. When its (mtime, size) changes the
+    file is parsed and serialized again, once, under a per-document lock;
+    the pipeline swaps files in atomically, so a reload never sees a
+    half-written file.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._documents = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _locate(self, sources):
+        # First source file that exists → (path, loader, stamp)
+        for filename, loader in sources:
+            path = os.path.join(self.data_dir, filename)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return path, loader, (path, st.st_mtime_ns, st.st_size)
+        return None, None, None
+
+    def get(self, key, sources):
+        """Current document for ``key``.
+
+        ``sources`` is a list of (filename, loader) pairs tried in order;
+        when none exist the document is an ``{"error": ...}`` body.
+        """
+        path, loader, stamp = self._locate(sources)
+
+        def load():
+            if path is None:
+                return {"error": f"{sources[0][0]} not found"}
+            return loader(path)
+
+        return self.compute(key, stamp, load)
+
+    def compute(self, key, stamp, build):
+        """Document for ``key`` holding ``build()``, built again only when
+        ``stamp`` changes (for data that does not live in a file)."""
+        doc = self._documents.get(key)
+        if doc is not None and doc.stamp == stamp:
+            return doc
+
+        with self._lock_for(key):
+            doc = self._documents.get(key)
+            if doc is not None and doc.stamp == stamp:
+                return doc
+
+            doc = CachedDocument(stamp, build())
+            self._documents[key] = doc
+
+        return doc
@@ -1,17 +1,207 @@
+import asyncio
+import hashlib
+import importlib
+import json
 import subprocess
 import sys
 import os
+import time
+import traceback
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 PIPELINE_DIR = os.path.join(BASE_DIR, "start_pipeline")
+DATA_DIR = os.path.join(BASE_DIR, "data")
 
-SCRIPTS = [
-    "fetch_news_indian.py",
-    "Fetch_Similar_News.py",   
-    "classify_news.py",        
-    "LCR_classified.py"
+# Input fingerprints of the last successful run of each stage
+STATE_FILE = os.path.join(DATA_DIR, "pipeline_state.json")
+
+# -----------------------
+# STAGE DAG
+# -----------------------
+# inputs/outputs are files in data/. A stage is skipped when the content
+# hashes of its inputs match the last successful run and its outputs exist.
+# Stages with always_run read external sources (RSS) and cannot be skipped;
+# if they produce nothing new, everything downstream is skipped. The raw
+# archive is a directory of day partitions; its state.json changes whenever
+# articles are appended. A stage with a consumer also runs while that
+# consumer's checkpoint is behind the archive, i.e. it has articles to retry.
+
+STAGES = [
+    {
+        "name": "fetch_news_indian",
+        "script": "fetch_news_indian.py",
+        "deps": [],
+        "inputs": [],
+        "outputs": ["raw_news/state.json"],
+        "always_run": True
+    },
+    {
+        "name": "Fetch_Similar_News",
+        "script": "Fetch_Similar_News.py",
+        "deps": ["fetch_news_indian"],
+        "inputs": ["raw_news/state.json"],
+        "outputs": ["Similar_Links_Output.json"],
+        "consumer": "similar_news"
+    },
+    {
+        "name": "classify_news",
+        "script": "classify_news.py",
+        "deps": ["Fetch_Similar_News"],
+        "inputs": ["Similar_Links_Output.json"],
+        "outputs": ["classified_news.json"]
+    },
+    {
+        "name": "LCR_classified",
+        "script": "LCR_classified.py",
+        "deps": ["classify_news"],
+        "inputs": ["classified_news.json", "publisher_list.json"],
+        "outputs": ["bias_classified_output.json"]
+    }
 ]
 
+
+def topological_order(stages):
+    by_name = {s["name"]: s for s in stages}
+    ordered = []
+    visiting = set()
+    done = set()
+
+    def visit(stage):
+        if stage["name"] in done:
+            return
+        if stage["name"] in visiting:
+            raise ValueError(f"Cycle in pipeline at {stage['name']}")
+        visiting.add(stage["name"])
+        for dep in stage["deps"]:
+            visit(by_name[dep])
+        visiting.discard(stage["name"])
+        done.add(stage["name"])
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+
+    return ordered
+
+# -----------------------
+# FINGERPRINTS
+# -----------------------
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {"files": {}, "stages": {}}
+    with open(STATE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    tmp_path = STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def storage_fingerprint(filename):
+    # Artifacts kept in the SQLite backend have a change marker instead of
+    # a file (None for plain files and the JSON backend)
+    if PIPELINE_DIR not in sys.path:
+        sys.path.insert(0, PIPELINE_DIR)
+
+    from storage import get_storage
+    return get_storage().fingerprint(filename)
+
+
+def consumer_behind(consumer):
+    # True when the consumer held its checkpoint back for failed articles
+    if PIPELINE_DIR not in sys.path:
+        sys.path.insert(0, PIPELINE_DIR)
+
+    from storage import get_storage
+    with get_storage().open_articles() as store:
+        return store.get_checkpoint(consumer) < store.last_seq
+
+
+def file_fingerprint(filename, state):
+    marker = storage_fingerprint(filename)
+    if marker is not None:
+        return marker
+
+    # Content hash; re-hashed only when size or mtime changed
+    path = os.path.join(DATA_DIR, filename)
+    if not os.path.exists(path):
+        return None
+
+    st = os.stat(path)
+    cached = state["files"].get(filename)
+    if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+        return cached["sha256"]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+
+    state["files"][filename] = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": h.hexdigest()
+    }
+    return h.hexdigest()
+
+
+def stale_reason(stage, state, force):
+    if force:
+        return "forced"
+    if stage.get("always_run"):
+        return "external input"
+
+    for output in stage["outputs"]:
+        if not os.path.exists(os.path.join(DATA_DIR, output)) and storage_fingerprint(output) is None:
+            return f"missing {output}"
+
+    previous = state["stages"].get(stage["name"], {}).get("inputs", {})
+    for filename in stage["inputs"]:
+        if file_fingerprint(filename, state) != previous.get(filename):
+            return f"{filename} changed"
+
+    if stage.get("consumer") and consumer_behind(stage["consumer"]):
+        return "retrying failed articles"
+
+    return None
+
+# -----------------------
+# IN-PROCESS STAGES
+# -----------------------
+# Each stage module exposes main(); models come from the shared registry
+# in start_pipeline/models.py, so they are loaded once for the whole run.
+
+def call_main(module):
+    result = module.main()
+    if asyncio.iscoroutine(result):
+        asyncio.run(result)
+
+
+def run_stage(script):
+    name = os.path.splitext(script)[0]
+
+    try:
+        if PIPELINE_DIR not in sys.path:
+            sys.path.insert(0, PIPELINE_DIR)
+
+        call_main(importlib.import_module(name))
+
+    except Exception:
+        print(f"❌ Error in {name}")
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+# -----------------------
+# SUBPROCESS STAGES (isolated, slower)
+# -----------------------
+
 def run_script(script):
     script_path = os.path.join(PIPELINE_DIR, script)
 
@@ -19,8 +209,6 @@ def run_script(script):
         print(f"❌ Missing: {script}")
         return False
 
-    print(f"▶ Running: {script}")
-
     result = subprocess.run(
         [sys.executable, script_path],
         cwd=BASE_DIR,
@@ -37,18 +225,54 @@ def run_script(script):
 
     return True
 
+# -----------------------
+# SCHEDULER
+# -----------------------
 
-def run_pipeline():
+def run_pipeline(in_process=True, force=False):
     print("🚀 Starting News Pipeline...\n")
 
-    for script in SCRIPTS:
-        success = run_script(script)
+    runner = run_stage if in_process else run_script
+    state = load_state()
+    timings = []
+
+    for stage in topological_order(STAGES):
+        name = stage["name"]
+        reason = stale_reason(stage, state, force)
+
+        if reason is None:
+            print(f"⏭ Skipping: {name} (inputs unchanged)")
+            timings.append((name, "skipped", 0.0))
+            continue
+
+        # Fingerprint inputs as the stage sees them
+        inputs = {f: file_fingerprint(f, state) for f in stage["inputs"]}
+
+        print(f"▶ Running: {name} ({reason})")
+        started = time.perf_counter()
+        success = runner(stage["script"])
+        elapsed = time.perf_counter() - started
+
+        timings.append((name, "ok" if success else "failed", elapsed))
+        print(f"⏱ {name}: {elapsed:.2f}s\n")
+
         if not success:
             print("⛔ Pipeline stopped due to error.")
-            return
+            break
 
-    print("\n✅ Pipeline Completed Successfully!")
+        state["stages"][name] = {"inputs": inputs, "finished_at": time.time()}
+        save_state(state)
+
+    print("\nStage timings:")
+    for name, status, elapsed in timings:
+        print(f"  {name:<22} {status:<8} {elapsed:8.2f}s")
+
+    if all(status != "failed" for _, status, _ in timings):
+        print("\n✅ Pipeline Completed Successfully!")
 
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    run_pipeline(
+        in_process="--subprocess" not in sys.argv,
+        force="--force" in sys.argv
+    )
@@ -0,0 +1,284 @@
+import bisect
+import hashlib
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from story_index import story_card
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Titles count more than summaries
+FIELD_WEIGHTS = {"title": 2.0, "summary": 1.0}
+
+# Vocabulary terms a prefix may expand to (most frequent first)
+MAX_PREFIX_TERMS = 50
+
+MAX_RESULTS = 100
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "have", "in", "is", "it", "its", "of", "on", "or", "that", "the", "this",
+    "to", "was", "were", "will", "with"
+}
+
+# =====================================================
+# TEXT
+# =====================================================
+
+def tokenize(text):
+    return [
+        t for t in TOKEN.findall(text.lower())
+        if len(t) > 1 and t not in STOPWORDS
+    ]
+
+
+def story_fields(story):
+    article = story.get("input_article", {})
+    reports = story.get("related_reports", [])
+
+    titles = [article.get("title")] + [r.get("title") for r in reports]
+    summaries = [article.get("summary"), story.get("story_summary")] + [r.get("summary") for r in reports]
+
+    return {
+        "title": " ".join(t for t in titles if t),
+        "summary": " ".join(s for s in summaries if s)
+    }
+
+
+def story_facets(story):
+    bias = story.get("bias_classification")
+    return {
+        "category": story.get("category"),
+        "final_bias": bias["final_bias"] if bias else None
+    }
+
+# =====================================================
+# INDEX
+# =====================================================
+
+class SearchIndex:
+    """In-memory inverted index over story titles and summaries.
+
+    Postings map each term to {doc: weighted term frequency}; documents
+    are added, replaced and removed one at a time, so a new version of the
+    data only costs the stories that changed. Queries are ranked with BM25;
+    the last query word (and any word ending in ``*``) also matches as a
+    prefix.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        self.postings = {}       # term → {doc: tf}
+        self.doc_terms = {}      # doc → Counter of its terms (for removal)
+        self.doc_len = {}        # doc → weighted length
+        self.total_len = 0.0
+
+        self.docs = {}           # story id → doc
+        self.signatures = {}     # story id → signature of the indexed content
+        self.cards = {}          # doc → story card
+        self.facets = {}         # doc → {"category", "final_bias"}
+
+        self._next_doc = 0
+        self._terms_sorted = None
+
+        # Whatever the caller uses to know what has been synced
+        self.version = None
+
+    # -------------------------------
+    # Updates
+    # -------------------------------
+
+    @staticmethod
+    def signature(story):
+        fields = story_fields(story)
+        facets = story_facets(story)
+        raw = "\0".join([fields["title"], fields["summary"], str(facets["category"]), str(facets["final_bias"])])
+        return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+    def add(self, id_, story, signature=None):
+        signature = signature or self.signature(story)
+
+        with self.lock:
+            if self.signatures.get(id_) == signature:
+                return
+            self.remove(id_)
+
+            terms = Counter()
+            for field, text in story_fields(story).items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    terms[token] += weight
+
+            doc = self._next_doc
+            self._next_doc += 1
+
+            for term, tf in terms.items():
+                if term not in self.postings:
+                    self.postings[term] = {}
+                    self._terms_sorted = None
+                self.postings[term][doc] = tf
+
+            self.doc_terms[doc] = terms
+            self.doc_len[doc] = sum(terms.values())
+            self.total_len += self.doc_len[doc]
+
+            self.docs[id_] = doc
+            self.signatures[id_] = signature
+            self.cards[doc] = story_card(id_, story)
+            self.facets[doc] = story_facets(story)
+
+    def remove(self, id_):
+        with self.lock:
+            doc = self.docs.pop(id_, None)
+            if doc is None:
+                return
+            self.signatures.pop(id_, None)
+
+            for term in self.doc_terms.pop(doc):
+                postings = self.postings[term]
+                del postings[doc]
+                if not postings:
+                    del self.postings[term]
+                    self._terms_sorted = None
+
+            self.total_len -= self.doc_len.pop(doc)
+            del self.cards[doc]
+            del self.facets[doc]
+
+    def sync(self, stories, version=None):
+        """Make the index hold exactly ``stories`` (pairs of id, story).
+
+        Unchanged stories are skipped by signature; returns the number of
+        stories (re)indexed.
+        """
+        with self.lock:
+            if version is not None and version == self.version:
+                return 0
+
+            seen = set()
+            changed = 0
+
+            for id_, story in stories:
+                seen.add(id_)
+                signature = self.signature(story)
+                if self.signatures.get(id_) != signature:
+                    self.add(id_, story, signature)
+                    changed += 1
+
+            for id_ in [i for i in self.docs if i not in seen]:
+                self.remove(id_)
+
+            self.version = version
+            return changed
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+
+    def _expand(self, prefix):
+        if self._terms_sorted is None:
+            self._terms_sorted = sorted(self.postings)
+
+        terms = self._terms_sorted
+        lo = bisect.bisect_left(terms, prefix)
+        hi = bisect.bisect_left(terms, prefix + "\U0010ffff")
+
+        matches = terms[lo:hi]
+        if len(matches) > MAX_PREFIX_TERMS:
+            # The word as typed always counts; longer terms by document
+            # frequency fill the rest
+            exact = [prefix] if prefix in self.postings else []
+            longer = sorted(
+                (t for t in matches if t != prefix),
+                key=lambda t: len(self.postings[t]), reverse=True
+            )
+            matches = exact + longer[:MAX_PREFIX_TERMS - len(exact)]
+        return matches
+
+    def _term_scores(self, term, avgdl, n):
+        postings = self.postings.get(term, {})
+        idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+
+        return {
+            doc: idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * self.doc_len[doc] / avgdl))
+            for doc, tf in postings.items()
+        }
+
+    def search(self, query, filters=None, limit=20, offset=0):
+        """Stories matching every query word, best first.
+
+        Returns {"total", "results", "facets"}; facets count category and
+        final_bias over all matches (before ``filters`` are applied).
+        """
+        raw_words = query.lower().split()
+        limit = max(1, min(limit, MAX_RESULTS))
+
+        with self.lock:
+            n = len(self.docs)
+            if not n:
+                return {"total": 0, "results": [], "facets": {}}
+            avgdl = self.total_len / n
+
+            scores = None
+
+            for i, raw in enumerate(raw_words):
+                is_prefix = raw.endswith("*") or i == len(raw_words) - 1
+                tokens = tokenize(raw)
+                if not tokens:
+                    continue
+
+                for j, token in enumerate(tokens):
+                    if is_prefix and j == len(tokens) - 1:
+                        terms = self._expand(token)
+                    else:
+                        terms = [token] if token in self.postings else []
+
+                    # Best matching expansion per document
+                    word_scores = {}
+                    for term in terms:
+                        for doc, score in self._term_scores(term, avgdl, n).items():
+                            if score > word_scores.get(doc, 0.0):
+                                word_scores[doc] = score
+
+                    if scores is None:
+                        scores = word_scores
+                    else:
+                        scores = {
+                            doc: s + word_scores[doc]
+                            for doc, s in scores.items() if doc in word_scores
+                        }
+
+            scores = scores or {}
+
+            facets = {"category": Counter(), "final_bias": Counter()}
+            for doc in scores:
+                for field, value in self.facets[doc].items():
+                    if value:
+                        facets[field][value] += 1
+
+            active = {k: v.lower() for k, v in (filters or {}).items() if v}
+            if active:
+                scores = {
+                    doc: s for doc, s in scores.items()
+                    if all((self.facets[doc][k] or "").lower() == v for k, v in active.items())
+                }
+
+            top = heapq.nlargest(offset + limit, scores.items(), key=lambda ds: ds[1])
+            page = top[offset:]
+
+            return {
+                "total": len(scores),
+                "results": [dict(self.cards[doc], score=round(score, 4)) for doc, score in page],
+                "facets": {field: dict(counts) for field, counts in facets.items()}
+            }
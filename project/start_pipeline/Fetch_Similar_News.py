@@ -1,18 +1,22 @@
 import feedparser
-import requests
-import trafilatura
-import spacy
 import asyncio
-import hashlib
+import atexit
 import json
 import os
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus, urlparse, urlunparse
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from datetime import datetime, timezone
-from playwright.async_api import async_playwright
-import ollama
+import threading
+import time
+import numpy as np
+from urllib.parse import quote_plus, urlparse
+from pipeline_utils import normalize_url, hash_url
+from storage import get_storage
+from article_store import advance_checkpoint, processing_window_start, PROCESSING_WINDOW_HOURS
+from feed_fetcher import fetch_feeds, print_feed_report
+from browser_pool import BrowserPool, ResolveError
+from redirect_cache import RedirectCache
+import page_cache
+from summarizer import SummaryService
+from models import get_sentence_model
+from rate_limit import limiter
 
 # =====================================================
 # CONFIG
@@ -30,165 +34,89 @@ RSS_FEEDS = [
     "https://www.republicworld.com/rss"
 ]
 
+# Google News search feed (benchmarks point it at recorded fixtures)
+GOOGLE_NEWS_RSS = os.environ.get("HERMES_GOOGLE_NEWS_RSS", "https://news.google.com/rss/search")
+
 SIMILARITY_THRESHOLD = 0.55
+MAX_MATCHES = 7
+ENCODE_BATCH_SIZE = 64
+
+# Input articles processed at the same time
+ARTICLE_WORKERS = int(os.environ.get("HERMES_ARTICLE_WORKERS", "4"))
+
+# RSS_FEEDS are downloaded once per run and shared by every article;
+# the pool is rebuilt only when it is older than this (seconds)
+CANDIDATE_POOL_TTL = int(os.environ.get("HERMES_CANDIDATE_POOL_TTL", "900"))
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 
-INPUT_FILE = os.path.join(DATA_DIR, "raw_news_indian.json")
+# Name under which this stage keeps its read position in the raw article store
+STORE_CONSUMER = "similar_news"
 OUTPUT_FILE = os.path.join(DATA_DIR, "Similar_Links_Output.json")
-CACHE_FILE = os.path.join(DATA_DIR, "publisher_cache.json")
 
-# Load models once
-nlp = spacy.load("en_core_web_sm")
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# =====================================================
-# AI SUMMARY — SINGLE ARTICLE
-# =====================================================
-
-def generate_article_summary(text):
-
-    if not text or len(text) < 200:
-        return None
-
-    try:
-        response = ollama.chat(
-            model="llama3.2",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You summarize news articles factually."
-                },
-                {
-                    "role": "user",
-                    "content": f"""
-Summarize this news article in 2–3 factual lines.
-No opinions. Neutral journalistic tone.
-
-{text[:4000]}
-"""
-                }
-            ]
-        )
-
-        return clean_summary(
-    response["message"]["content"].strip()
-)
-
-    except Exception as e:
-        print("Summary error:", e)
-        return None
+# New publisher entries are saved to storage in batches of this size
+# (and once more at exit)
+PUBLISHER_FLUSH_EVERY = 25
 
+# Models are loaded lazily, once per process (see models.py)
 
 # =====================================================
-# AI SUMMARY — COMBINED STORY
+# AI SUMMARIES (queued, cached — see summarizer.py)
 # =====================================================
 
-def generate_story_summary(main_text, related_texts):
-
-    combined = main_text[:2500]
-
-    for t in related_texts[:5]:   # limit sources
-        combined += "\n\nSOURCE:\n" + t[:1200]
-
-    try:
-        response = ollama.chat(
-            model="llama3.2",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a neutral news editor combining multiple reports."
-                },
-                {
-                    "role": "user",
-                    "content": f"""
-Create a unified news summary in 3–4 lines combining all sources.
-Remove repetition.
-Stay factual and neutral.
-
-{combined}
-"""
-                }
-            ]
-        )
-
-        return clean_summary(
-    response["message"]["content"].strip()
-)
+summarizer = SummaryService()
 
-    except Exception as e:
-        print("Story summary error:", e)
-        return None
-
-def clean_summary(text: str) -> str:
-    if not text:
-        return ""
-
-    # remove unwanted starting phrases
-    unwanted_prefixes = [
-        "Here is a summary",
-        "Here are",
-        "Here is a unified",
-        "Here is the summary",
-        "Summary:",
-        "Here’s",
-    ]
-
-    cleaned = text.strip()
-
-    for phrase in unwanted_prefixes:
-        if cleaned.lower().startswith(phrase.lower()):
-            # remove first line completely
-            cleaned = "\n".join(cleaned.split("\n")[1:]).strip()
-            break
+async def generate_article_summary(text):
+    return await summarizer.article_summary(text)
 
-    return cleaned
+async def generate_story_summary(main_text, related_texts):
+    return await summarizer.story_summary(main_text, related_texts)
 
 # =========================
 # CACHE
 # =========================
 def load_cache():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Keep only domain → string mappings
-        cleaned = {
-            k: v for k, v in data.items()
-            if isinstance(k, str) and isinstance(v, str)
-        }
-
-        return cleaned
-
-    return {}
+    # domain → publisher name (publisher_cache.json or the publishers table)
+    return get_storage().load_publishers()
 
 
 def save_cache(cache):
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(cache, f, indent=2, ensure_ascii=False)
+    # Merged with what is already stored; returns the merged mapping
+    return get_storage().save_publishers(cache)
+
+# Process-wide registry: loaded once, looked up in memory, flushed behind
+_publishers = {
+    "cache": None,
+    "pending": 0,
+    "lock": threading.Lock()
+}
 
-# =====================================================
-# UTILITIES
-# =====================================================
+def get_publisher_cache():
+    with _publishers["lock"]:
+        if _publishers["cache"] is None:
+            _publishers["cache"] = load_cache()
+            atexit.register(flush_publisher_cache)
+        return _publishers["cache"]
 
-def normalize_url(url):
-    parsed = urlparse(url)
-    return urlunparse(
-        (parsed.scheme, parsed.netloc.replace("www.", ""), parsed.path, "", "", "")
-    )
+def flush_publisher_cache():
+    with _publishers["lock"]:
+        if _publishers["cache"] is None or not _publishers["pending"]:
+            return
 
-def hash_url(url):
-    return hashlib.md5(normalize_url(url).encode()).hexdigest()
+        # Adopt the stored mapping, which now includes publishers other
+        # stages resolved since this one was loaded
+        _publishers["cache"] = save_cache(_publishers["cache"])
+        _publishers["pending"] = 0
 
 # =====================================================
 # ARTICLE EXTRACTION
 # =====================================================
 
 def extract_article(url):
-    downloaded = trafilatura.fetch_url(url)
-    return trafilatura.extract(downloaded) or ""
+    # Downloaded and extracted at most once, shared with other stages/runs
+    return page_cache.get_text(url) or ""
 
 def extract_event(text):
     return text[:800]
@@ -198,24 +126,27 @@ def extract_event(text):
 # =====================================================
 
 def fetch_rss():
+    results = fetch_feeds(RSS_FEEDS)
+    print_feed_report(results)
+
     articles = []
-    for rss in RSS_FEEDS:
-        feed = feedparser.parse(rss)
-        for entry in feed.entries:
+    for result in results:
+        for entry in result["entries"]:
             articles.append({
-        "title": entry.get("title", ""),
-        "description": entry.get("summary", ""),
-        "url": entry.get("link", ""),
-        "source": rss,
-        "publishedAt": entry.get("published", None)
-    })
+                "title": entry.get("title", ""),
+                "description": entry.get("summary", ""),
+                "url": entry.get("link", ""),
+                "source": result["url"],
+                "publishedAt": entry.get("published", None)
+            })
     return articles
 
 def fetch_google_news(query):
     encoded = quote_plus(query)
     # rss = f"https://news.google.com/rss/search?q={encoded}&hl=en-US&gl=US&ceid=US:en"
-    rss = f"https://news.google.com/rss/search?q={encoded}&hl=en-IN&gl=IN&ceid=IN:en"
-    feed = feedparser.parse(rss)
+    rss = f"{GOOGLE_NEWS_RSS}?q={encoded}&hl=en-IN&gl=IN&ceid=IN:en"
+    with limiter.limit(rss):
+        feed = feedparser.parse(rss)
 
     articles = []
     # for entry in feed.entries[:15]:
@@ -229,27 +160,141 @@ def fetch_google_news(query):
     })
     return articles
 
+# =====================================================
+# CANDIDATE POOL (SHARED ACROSS ARTICLES)
+# =====================================================
+
+_candidate_pool = {
+    "built_at": 0.0,
+    "articles": [],
+    "hashes": [],
+    "embeddings": None
+}
+_candidate_pool_lock = threading.Lock()
+
+def get_candidate_pool(force=False):
+    # Workers run this from threads; only one of them builds the pool
+    with _candidate_pool_lock:
+        return _build_candidate_pool(force)
+
+def _build_candidate_pool(force):
+    age = time.time() - _candidate_pool["built_at"]
+
+    if force or not _candidate_pool["articles"] or age > CANDIDATE_POOL_TTL:
+
+        articles = []
+        hashes = []
+        seen = set()
+
+        for c in fetch_rss():
+            if not c["url"]:
+                continue
+            h = hash_url(c["url"])
+            if h in seen:
+                continue
+            seen.add(h)
+            articles.append(c)
+            hashes.append(h)
+
+        _candidate_pool.update(
+            built_at=time.time(),
+            articles=articles,
+            hashes=hashes,
+            # encoded once here instead of once per article in semantic_filter
+            embeddings=encode_texts([candidate_text(a) for a in articles])
+        )
+
+        print(f"Candidate pool: {len(articles)} unique RSS articles")
+
+    return _candidate_pool
+
+def gather_candidates(google_articles):
+    # Google results first, then the shared pool; same first-wins
+    # URL-hash dedupe as before, but the pool is already deduped.
+    # Returns the candidates and their (normalized) embeddings.
+    pool = get_candidate_pool()
+
+    unique = []
+    google_hashes = set()
+
+    for c in google_articles:
+        h = hash_url(c["url"])
+        if h not in google_hashes:
+            google_hashes.add(h)
+            unique.append(c)
+
+    google_embeddings = encode_texts([candidate_text(c) for c in unique])
+
+    if google_hashes.isdisjoint(pool["hashes"]):
+        keep = np.arange(len(pool["articles"]))
+    else:
+        keep = np.array(
+            [i for i, h in enumerate(pool["hashes"]) if h not in google_hashes],
+            dtype=np.int64
+        )
+
+    unique.extend(pool["articles"][i] for i in keep)
+    embeddings = np.vstack([google_embeddings, pool["embeddings"][keep]])
+
+    return unique, embeddings
+
 # =====================================================
 # SEMANTIC FILTER
 # =====================================================
 
-def semantic_filter(event_text, candidates):
-    event_embedding = model.encode(event_text)
-    matched = []
+# One forward pass at a time; workers call encode from executor threads
+_encode_lock = threading.Lock()
 
-    for article in candidates:
-        text = article["title"] + " " + article["description"]
-        if not text.strip():
-            continue
+def candidate_text(article):
+    return (article.get("title") or "") + " " + (article.get("description") or "")
+
+def encode_texts(texts):
+    # One batched forward pass; normalized so cosine similarity is a dot product
+    model = get_sentence_model()
+
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    with _encode_lock:
+        embeddings = model.encode(
+            texts,
+            batch_size=ENCODE_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    return embeddings.astype(np.float32, copy=False)
+
+def semantic_filter(event_text, candidates, candidate_embeddings=None):
+    if not candidates:
+        return []
 
-        article_embedding = model.encode(text)
-        score = cosine_similarity([event_embedding], [article_embedding])[0][0]
+    if candidate_embeddings is None:
+        candidate_embeddings = encode_texts([candidate_text(c) for c in candidates])
 
-        if score >= SIMILARITY_THRESHOLD:
-            article["similarity_score"] = round(float(score), 3)
-            matched.append(article)
+    event_embedding = encode_texts([event_text])[0]
 
-    return sorted(matched, key=lambda x: x["similarity_score"], reverse=True)[:7]
+    # Same cosine scores as before, computed as a single matrix product
+    scores = candidate_embeddings @ event_embedding
+
+    # Blank candidates were never scored by the old loop
+    blank = np.array([not candidate_text(c).strip() for c in candidates])
+    scores[blank] = -np.inf
+
+    above = np.flatnonzero(scores >= SIMILARITY_THRESHOLD)
+
+    if len(above) > MAX_MATCHES:
+        # partial sort: only the top MAX_MATCHES need to be ordered
+        above = above[np.argpartition(-scores[above], MAX_MATCHES - 1)[:MAX_MATCHES]]
+
+    top = above[np.argsort(-scores[above], kind="stable")]
+
+    # copies: candidates may belong to the shared pool
+    return [
+        {**candidates[i], "similarity_score": round(float(scores[i]), 3)}
+        for i in top
+    ]
 
 # =====================================================
 # CANONICAL + PUBLISHER
@@ -257,31 +302,35 @@ def semantic_filter(event_text, candidates):
 
 def get_canonical_url(url):
     try:
-        r = requests.get(url, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        tag = soup.find("link", rel="canonical")
-        if tag and tag.get("href"):
-            return normalize_url(tag["href"])
+        canonical = page_cache.get_canonical(url)
+        if canonical:
+            return normalize_url(canonical)
     except:
         pass
     return normalize_url(url)
 
 def extract_publisher(url):
 
-    cache = load_cache()
+    cache = get_publisher_cache()
 
     domain = urlparse(url).netloc.replace("www.", "")
 
     # If already cached → return directly
-    if domain in cache:
-        return cache[domain]
+    publisher = cache.get(domain)
+    if publisher is not None:
+        return publisher
 
     # Otherwise generate publisher name
     publisher = domain.split(".")[0].replace("-", " ").title()
 
-    # Save to cache
-    cache[domain] = publisher
-    save_cache(cache)
+    # Save to cache (written out in batches by flush_publisher_cache)
+    with _publishers["lock"]:
+        cache[domain] = publisher
+        _publishers["pending"] += 1
+        should_flush = _publishers["pending"] >= PUBLISHER_FLUSH_EVERY
+
+    if should_flush:
+        flush_publisher_cache()
 
     return publisher
 
@@ -290,300 +339,328 @@ def extract_publisher(url):
 # GOOGLE REDIRECT RESOLVE
 # =====================================================
 
-async def resolve_google(page, url):
-    try:
-        await page.goto(url, wait_until="domcontentloaded", timeout=10000)
-        await page.wait_for_timeout(2000)
-        final = page.url
-        if "news.google.com" in final:
-            return None
-        return final
-    except:
-        return None
+# One browser for the whole run, launched on first use
+browser_pool = BrowserPool()
+
+# Google link → publisher URL, persisted across runs
+redirect_cache = RedirectCache()
+
+async def resolve_google_links(reports):
+    # Resolve every Google News link concurrently; drop the ones that
+    # never leave news.google.com. Cached links never touch the browser;
+    # links that failed to load are dropped for now but not cached.
+    google = [r for r in reports if r["source"] == "Google News"]
+
+    finals = {}
+    to_resolve = []
+
+    for r in google:
+        found, final = redirect_cache.get(r["url"])
+        if found:
+            finals[id(r)] = final
+        else:
+            to_resolve.append(r)
+
+    if to_resolve:
+        resolved = await browser_pool.resolve_many([r["url"] for r in to_resolve])
+        for r, final in zip(to_resolve, resolved):
+            if isinstance(final, ResolveError):
+                finals[id(r)] = None
+                continue
+            if isinstance(final, BaseException):
+                raise final
+
+            redirect_cache.put(r["url"], final)
+            finals[id(r)] = final
+
+    failed = set()
+    for r in google:
+        final = finals[id(r)]
+        if final:
+            r["url"] = final
+        else:
+            failed.add(id(r))
+
+    return [r for r in reports if id(r) not in failed]
 
 # =====================================================
 # PROCESS SINGLE ARTICLE
 # =====================================================
 
+def cancel_pending(tasks):
+    # Summary tasks started ahead of a step that raised; nothing will
+    # await them any more, so they must not keep calling the LLM
+    for task in tasks:
+        task.cancel()
+
+
 async def process_article(article_meta):
 
     input_url = article_meta["url"]
-    input_title = article_meta.get("title")
-    input_published = article_meta.get("publishedAt")
-    cache = load_cache()
-    
-    text = extract_article(input_url)
+
+    text = await asyncio.to_thread(extract_article, input_url)
     if not text:
         return None
-    
-    input_summary = generate_article_summary(text)
+
+    # LLM call runs while candidates are fetched and matched
+    input_summary = asyncio.create_task(generate_article_summary(text))
     event_text = extract_event(text)
 
-    candidates = []
-    candidates.extend(fetch_google_news(event_text))
-    candidates.extend(fetch_rss())
+    try:
+        # Remove duplicates (RSS candidates come from the per-run pool)
+        google = await asyncio.to_thread(fetch_google_news, event_text)
+        unique, embeddings = await asyncio.to_thread(gather_candidates, google)
 
-    # Remove duplicates
-    seen = set()
-    unique = []
-    for c in candidates:
-        h = hash_url(c["url"])
-        if h not in seen:
-            seen.add(h)
-            unique.append(c)
+        matched = await asyncio.to_thread(semantic_filter, event_text, unique, embeddings)
 
-    matched = semantic_filter(event_text, unique)
+        # Made Changes
+        if not matched:
+            title_query = text.split(".")[0][:150]
+            candidates = await asyncio.to_thread(fetch_google_news, title_query)
+            matched = await asyncio.to_thread(semantic_filter, title_query, candidates)
+        # Changes Ended
 
-    # Made Changes
-    if not matched:
-        title_query = text.split(".")[0][:150]
-        candidates = fetch_google_news(title_query)
-        matched = semantic_filter(title_query, candidates)
-    # Changes Ended
+        return await build_story(article_meta, text, input_summary, matched)
 
-    input_canonical = get_canonical_url(input_url)
-    input_source = extract_publisher(input_url)
+    except BaseException:
+        cancel_pending([input_summary])
+        raise
 
+# =====================================================
+# BUILD STORY FROM MATCHED CANDIDATES
+# =====================================================
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
+async def build_story(article_meta, text, input_summary, matched):
+    # input_summary is an asyncio task started by the caller, so the LLM
+    # works while related reports are resolved and fetched
 
-        final_reports = []
+    input_url = article_meta["url"]
+    input_title = article_meta.get("title")
+    input_published = article_meta.get("publishedAt")
 
-        for r in matched:
+    summary_tasks = []
 
-            if r["source"] == "Google News":
-                page = await context.new_page()
-                resolved = await resolve_google(page, r["url"])
-                await page.close()
-                if not resolved:
-                    continue
-                r["url"] = resolved
+    try:
+        # extract_publisher may flush the publisher cache to disk; off the loop
+        input_canonical = await asyncio.to_thread(get_canonical_url, input_url)
+        input_source = await asyncio.to_thread(extract_publisher, input_url)
+
+        final_reports = []
 
-            canonical = get_canonical_url(r["url"])
-            source = extract_publisher(r["url"])
-            
+        for r in await resolve_google_links(matched):
 
+            canonical = await asyncio.to_thread(get_canonical_url, r["url"])
+            source = await asyncio.to_thread(extract_publisher, r["url"])
 
             if canonical == input_canonical:
                 continue
 
             if source.lower() == input_source.lower():
                 continue
-            
-            # article_text = extract_article(r["url"])
-            # r["summary"] = generate_article_summary(article_text)
-            article_text = extract_article(r["url"])
+
+            article_text = await asyncio.to_thread(extract_article, r["url"])
 
             r["_full_text"] = article_text   # ← store temporarily
-            r["summary"] = generate_article_summary(article_text)
+            r["summary"] = None              # ← filled once the task finishes
+            summary_tasks.append(asyncio.create_task(generate_article_summary(article_text)))
             r["source_name"] = source
             r.pop("source", None)
             final_reports.append(r)
 
-        await browser.close()
-
-        # related_texts = []
         related_texts = [
-    r["_full_text"]
-    for r in final_reports
-    if r.get("_full_text")
-]
+            r["_full_text"]
+            for r in final_reports
+            if r.get("_full_text")
+        ]
+
+        story_summary, input_summary, *report_summaries = await asyncio.gather(
+            generate_story_summary(text, related_texts),
+            input_summary,
+            *summary_tasks
+        )
 
-    for r in final_reports:
-        txt = extract_article(r["url"])
-        if txt:
-            related_texts.append(txt)
+    except BaseException:
+        cancel_pending([input_summary, *summary_tasks])
+        raise
 
-    story_summary = generate_story_summary(text, related_texts)
-    
-    for r in final_reports:
+    for r, summary in zip(final_reports, report_summaries):
+        r["summary"] = summary
         r.pop("_full_text", None)
+
     return {
-    "input_article": {
-        "url": input_url,
-        "source_name": input_source,
-        "title": input_title,
-        "publishedAt": input_published,
-        "summary": input_summary
-    },
-    "story_summary": story_summary,
-    "related_reports": final_reports
-}
+        "input_article": {
+            "url": input_url,
+            "source_name": input_source,
+            "title": input_title,
+            "publishedAt": input_published,
+            "summary": input_summary
+        },
+        "story_summary": story_summary,
+        "related_reports": final_reports
+    }
 
 # =====================================================
-# MAIN (SAVE ONE BY ONE + FIXED JSON HANDLING)
+# OUTPUT FILE
 # =====================================================
 
-async def main():
+# Per-article results go to an append-only journal that is periodically
+# compacted into OUTPUT_FILE (see results_journal.py), or to the stories
+# table with the SQLite backend (see storage.py)
+results_journal = get_storage().results()
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
+def load_processed():
+    # Resume support
+    return results_journal.processed_keys()
 
-    # ===============================
-    # FIX 1 — Preserve metadata
-    # ===============================
-    input_articles = []
 
-    if isinstance(raw_data, list):
-        for item in raw_data:
-            if isinstance(item, dict):
-
-                url = item.get("url") or item.get("link")
-
-                if isinstance(url, str):
-                    input_articles.append({
-                        "url": url,
-                        "title": item.get("title"),
-                        "publishedAt": item.get("publishedAt"),
-                        "source": item.get("source")
-                    })
-
-            elif isinstance(item, str):
-                # fallback if raw list contains plain URLs
-                input_articles.append({
-                    "url": item,
-                    "title": None,
-                    "publishedAt": None,
-                    "source": None
-                })
-
-    elif isinstance(raw_data, dict):
-        possible_list = raw_data.get("results") or raw_data.get("urls")
-
-        if isinstance(possible_list, list):
-            for item in possible_list:
-                if isinstance(item, dict):
-
-                    url = item.get("url") or item.get("link")
-
-                    if isinstance(url, str):
-                        input_articles.append({
-                            "url": url,
-                            "title": item.get("title"),
-                            "publishedAt": item.get("publishedAt"),
-                            "source": item.get("source")
-                        })
-
-                elif isinstance(item, str):
-                    input_articles.append({
-                        "url": item,
-                        "title": None,
-                        "publishedAt": None,
-                        "source": None
-                    })
+def save_result(article, result):
 
-    # ===============================
-    # Initialize output file
-    # ===============================
-    # if not os.path.exists(OUTPUT_FILE):
-    #     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    #         json.dump({
-    #             "generated_at": datetime.now(timezone.utc).isoformat(),
-    #             "results": [],
-    #             "failed_urls": []
-    #         }, f, indent=2)
-    if not os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump({
-                "generated_at": datetime.now(timezone.utc).isoformat(),
-                "results": [],
-                "no_related_reports": [],
-                "failed_urls": []
-            }, f, indent=2)
+    # =========================
+    # CASE 1 — No related reports
+    # =========================
+    if not result.get("related_reports"):
 
-    # Resume support
-    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-        saved = json.load(f)
+        print("No related reports found")
 
-    results = saved.get("results", [])
-    no_related = saved.get("no_related_reports", [])
+        results_journal.append("no_related", {
+            "url": article["url"],
+            "title": article.get("title"),
+            "publishedAt": article.get("publishedAt")
+        })
 
-    processed = {
-        normalize_url(r["input_article"]["url"])
-        for r in results
-        if isinstance(r, dict)
-    }
+    # =========================
+    # CASE 2 — Normal result
+    # =========================
+    else:
 
-    # ===============================
-    # Process one by one
-    # ===============================
-    for article in input_articles:
+        results_journal.append("result", result)
 
-        url = article["url"]
+        print("Saved")
 
-        if not isinstance(url, str):
-            continue
 
-        if normalize_url(url) in processed:
+def save_members(article, members):
+    # Raw articles clustered into ``article``'s story (cluster_events.py):
+    # processed, and pointing at the story they ended up in
+    for member in members:
+        if normalize_url(member["url"]) == normalize_url(article["url"]):
             continue
 
-        print("Processing:", url)
+        results_journal.append("member", {
+            "url": member["url"],
+            "title": member.get("title"),
+            "publishedAt": member.get("publishedAt"),
+            "story_url": article["url"]
+        })
 
-        try:
-            # ✅ pass full metadata object
-            result = await process_article(article)
 
-            # if result:
-            #     results.append(result)
+# =====================================================
+# INPUT
+# =====================================================
 
-            #     with open(OUTPUT_FILE, "r+", encoding="utf-8") as f:
-            #         data = json.load(f)
-            #         data["results"].append(result)
-            #         data["generated_at"] = datetime.now(timezone.utc).isoformat()
-            #         f.seek(0)
-            #         json.dump(data, f, indent=2, ensure_ascii=False)
-            #         f.truncate()
+def load_new_articles(store):
+    # Read only articles added since the last run and published inside the
+    # processing window (older day partitions are not opened)
+    since_seq = store.get_checkpoint(STORE_CONSUMER)
 
-            #     print("Saved")
-            if result:
+    input_articles = []
 
-            # =========================
-            # CASE 1 — No related reports
-            # =========================
-                if not result.get("related_reports"):
+    for item in store.iter_records(since_seq=since_seq, since_ts=processing_window_start()):
 
-                    print("No related reports found")
+        url = item.get("url") or item.get("link")
 
-                    with open(OUTPUT_FILE, "r+", encoding="utf-8") as f:
-                        data = json.load(f)
+        if isinstance(url, str):
+            input_articles.append({
+                "url": url,
+                "title": item.get("title"),
+                "publishedAt": item.get("publishedAt"),
+                "source": item.get("source"),
+                "seq": item.get("seq")
+            })
 
-                        data.setdefault("no_related_reports", []).append({
-                            "url": article["url"],
-                            "title": article.get("title"),
-                            "publishedAt": article.get("publishedAt")
-                        })
+    print(f"{len(input_articles)} new articles since seq {since_seq} "
+          f"(last {PROCESSING_WINDOW_HOURS}h)")
 
-                        data["generated_at"] = datetime.now(timezone.utc).isoformat()
+    return input_articles
 
-                        f.seek(0)
-                        json.dump(data, f, indent=2, ensure_ascii=False)
-                        f.truncate()
+# =====================================================
+# WORKERS
+# =====================================================
+
+async def run_workers(items, handle, workers=ARTICLE_WORKERS):
+    # handle(item) for every item, at most `workers` at a time
+    slots = asyncio.Semaphore(workers)
 
-                # =========================
-                # CASE 2 — Normal result
-                # =========================
-                else:
+    async def run(item):
+        async with slots:
+            await handle(item)
 
-                    results.append(result)
+    await asyncio.gather(*(run(item) for item in items))
+
+# =====================================================
+# MAIN (SAVE AS RESULTS ARRIVE + FIXED JSON HANDLING)
+# =====================================================
 
-                    with open(OUTPUT_FILE, "r+", encoding="utf-8") as f:
-                        data = json.load(f)
+async def main():
 
-                        data.setdefault("results", []).append(result)
-                        data["generated_at"] = datetime.now(timezone.utc).isoformat()
+    store = get_storage().open_articles()
+    last_seq = store.last_seq
+    input_articles = load_new_articles(store)
 
-                        f.seek(0)
-                        json.dump(data, f, indent=2, ensure_ascii=False)
-                        f.truncate()
+    processed = load_processed()
 
-                    print("Saved")
+    # ===============================
+    # Process in parallel (ARTICLE_WORKERS at a time)
+    # ===============================
+    todo = []
+    queued = set()
+
+    for article in input_articles:
+
+        url = article["url"]
+
+        if not isinstance(url, str):
+            continue
+
+        key = normalize_url(url)
+        if key in processed or key in queued:
+            continue
+
+        queued.add(key)
+        todo.append(article)
+
+    # Seqs of articles to retry next run (no text, errors)
+    failed = []
+
+    async def handle(article):
+
+        print("Processing:", article["url"])
+
+        try:
+            # ✅ pass full metadata object
+            result = await process_article(article)
+
+            if result:
+                # fsync + periodic compaction; off the event loop
+                await asyncio.to_thread(save_result, article, result)
+            else:
+                failed.append(article["seq"])
 
         except Exception as e:
             print("Error:", e)
+            failed.append(article["seq"])
+
+    await run_workers(todo, handle)
+
+    await browser_pool.close()
+    results_journal.compact()
+    flush_publisher_cache()
+    redirect_cache.save()
+    redirect_cache.report()
+    summarizer.save()
+    summarizer.report()
+    advance_checkpoint(store, STORE_CONSUMER, last_seq, failed)
 
-    print("Finished")
+    print(f"Finished ({len(failed)} articles left for the next run)")
 
 # =====================================================
 # RUN
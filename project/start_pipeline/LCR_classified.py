@@ -1,27 +1,37 @@
+import hashlib
 import json
 import os
-import copy
+import sys
 from collections import Counter
 from typing import Dict, List, Tuple
 from urllib.parse import urlparse
+from pipeline_utils import atomic_write_json, load_json_file, normalize_url
+from storage import get_storage
 
 
 class NewsBiasClassifier:
-    def __init__(self, publisher_list_path: str, classified_news_path: str):
+    def __init__(self, publisher_list_path: str, classified_news_path: str = None):
 
         # Load publisher bias list
-        with open(publisher_list_path, 'r', encoding='utf-8') as f:
-            publishers = json.load(f)
+        with open(publisher_list_path, 'rb') as f:
+            raw = f.read()
+            publishers = json.loads(raw)
+
+        # A different publisher list invalidates every stored classification
+        self.publisher_fingerprint = hashlib.sha256(raw).hexdigest()
 
         self.domain_bias_map = {
             pub['Domain'].lower(): pub['Final Bias'].lower()
             for pub in publishers
         }
 
-        # Load classified news
-        with open(classified_news_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            self.news_articles = data["results"] 
+        # Load classified news (None → stories are passed in one at a time,
+        # as in stream_pipeline.py)
+        self.news_articles = []
+        if classified_news_path:
+            with open(classified_news_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                self.news_articles = data["results"]
 
     # -------------------------------
     # Utility functions
@@ -40,7 +50,7 @@ class NewsBiasClassifier:
                 domain = ".".join(parts[-2:])
 
             return domain.strip()
-        except:
+        except (ValueError, AttributeError, TypeError):
             return ""
 
     def get_bias_for_url(self, url: str) -> str:
@@ -87,14 +97,10 @@ class NewsBiasClassifier:
         biases = []
 
         for report in related_reports:
-            report_copy = copy.deepcopy(report)  
-
-            url = report_copy.get("url", "")
-            bias = self.get_bias_for_url(url)
-
-            report_copy["bias"] = bias 
+            bias = self.get_bias_for_url(report.get("url", ""))
 
-            enriched_reports.append(report_copy)
+            # New top-level dict; the input report is left untouched
+            enriched_reports.append({**report, "bias": bias})
             biases.append(bias)
 
         return enriched_reports, biases
@@ -105,8 +111,9 @@ class NewsBiasClassifier:
 
     def classify_article(self, article: Dict) -> Tuple[Dict, str]:
 
-        # ✅ FULL DEEP COPY → preserves EVERYTHING (title, image, publishedAt, etc.)
-        result = copy.deepcopy(article)
+        # ✅ SHALLOW COPY → preserves EVERYTHING (title, image, publishedAt, etc.);
+        # only top-level keys are added, nested data is never modified
+        result = dict(article)
 
         # 👉 APPLY ONLY FOR POLITICAL
         if result.get("category") == "political":
@@ -158,17 +165,99 @@ class NewsBiasClassifier:
         return political, non_political
 
     # -------------------------------
-    # Save final output
+    # Incremental classification
     # -------------------------------
 
-    def save_results(self, output_path: str):
+    @staticmethod
+    def story_key(article: Dict) -> str:
+        return normalize_url(article.get("input_article", {}).get("url", ""))
+
+    @staticmethod
+    def story_fingerprint(article: Dict) -> str:
+        # Only what classify_article reads: the category and the URLs
+        parts = [article.get("category") or "", article.get("input_article", {}).get("url", "")]
+        parts += [r.get("url", "") for r in article.get("related_reports", [])]
+        return hashlib.md5("\n".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def reuse_classification(article: Dict, old: Dict) -> Dict:
+        # ``article`` as classify_article would return it, with the labels
+        # of ``old`` (same fingerprint, so the same category and URLs)
+        result = dict(article)
+
+        if "bias_classification" in old:
+            result["related_reports"] = [
+                {**report, "bias": old_report["bias"]}
+                for report, old_report in zip(article.get("related_reports", []), old["related_reports"])
+            ]
+            result["bias_classification"] = old["bias_classification"]
+
+        return result
+
+    def classify_incremental(self, previous: Dict, fingerprints: Dict[str, str]):
+        """Classify only stories that are new or changed since ``previous``.
+
+        ``fingerprints`` maps story keys to the fingerprint each story had
+        when ``previous`` was written. Stories whose category and URLs are
+        unchanged keep their labels; the bias distribution is updated by removing the old entry of
+        every changed or dropped story and adding the new ones.
+
+        Returns (political, non_political, bias_counter, fingerprints,
+        classified_count).
+        """
+        reusable = {}
+        for art in previous.get("political_articles_data", []) + previous.get("non_political_articles_data", []):
+            reusable[self.story_key(art)] = art
+
+        bias_counter = Counter(previous.get("final_bias_distribution", {}))
+
+        political = []
+        non_political = []
+        new_fingerprints = {}
+        classified_count = 0
+
+        for article in self.news_articles:
+            key = self.story_key(article)
+            fingerprint = self.story_fingerprint(article)
+            old = reusable.pop(key, None)
+
+            if old is not None and fingerprints.get(key) == fingerprint:
+                classified = self.reuse_classification(article, old)
+            else:
+                if old is not None and "bias_classification" in old:
+                    bias_counter[old["bias_classification"]["final_bias"]] -= 1
 
-        political, non_political = self.classify_all_articles()
+                classified, article_type = self.classify_article(article)
+                if article_type == "political":
+                    bias_counter[classified["bias_classification"]["final_bias"]] += 1
+                classified_count += 1
 
-        bias_counter = Counter(
-            art["bias_classification"]["final_bias"]
-            for art in political
-        )
+            if "bias_classification" in classified:
+                political.append(classified)
+            else:
+                non_political.append(classified)
+
+            new_fingerprints[key] = fingerprint
+
+        # Stories no longer in the input
+        for old in reusable.values():
+            if "bias_classification" in old:
+                bias_counter[old["bias_classification"]["final_bias"]] -= 1
+
+        return political, non_political, bias_counter, new_fingerprints, classified_count
+
+    # -------------------------------
+    # Save final output
+    # -------------------------------
+
+    @staticmethod
+    def build_report(political: List[Dict], non_political: List[Dict], bias_counter: Counter = None) -> Dict:
+
+        if bias_counter is None:
+            bias_counter = Counter(
+                art["bias_classification"]["final_bias"]
+                for art in political
+            )
 
         report = {
             "total_articles": len(political) + len(non_political),
@@ -186,10 +275,36 @@ class NewsBiasClassifier:
             "non_political_articles_data": non_political
         }
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+    def save_results(self, output_path: str, state_path: str = None):
+        """Write the report; with ``state_path`` only new or changed
+        stories are classified and the rest are taken from the last output.
+        """
+
+        state = load_json_file(state_path, {}) if state_path else {}
+
+        if state and state.get("publisher_list") == self.publisher_fingerprint:
+            previous = load_json_file(output_path, {}) or {}
+            fingerprints = state.get("stories", {})
+        else:
+            previous, fingerprints = {}, {}
+
+        political, non_political, bias_counter, fingerprints, classified_count = \
+            self.classify_incremental(previous, fingerprints)
 
-        print("✅ Bias classification completed!")
+        report = self.build_report(political, non_political, bias_counter)
+
+        atomic_write_json(output_path, report)
+
+        if state_path:
+            atomic_write_json(state_path, {
+                "publisher_list": self.publisher_fingerprint,
+                "stories": fingerprints
+            }, indent=None)
+
+        print(f"✅ Bias classification completed! ({classified_count} classified, "
+              f"{len(political) + len(non_political) - classified_count} unchanged)")
         print(f"📁 Output saved to: {output_path}")
 
 
@@ -197,15 +312,23 @@ class NewsBiasClassifier:
 # Entry point
 # -------------------------------
 
-if __name__ == "__main__":
+def main():
 
-    BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
     classifier = NewsBiasClassifier(
-        publisher_list_path=os.path.join(BASE_DIR, "data", "publisher_list.json"),
-        classified_news_path=os.path.join(BASE_DIR, "data", "classified_news.json")
+        publisher_list_path=os.path.join(BASE_DIR, "data", "publisher_list.json")
     )
 
-    classifier.save_results(
-        os.path.join(BASE_DIR, "data", "bias_classified_output.json")
-    )
\ No newline at end of file
+    # classified_news.json → bias_classified_output.json, or the
+    # classifications table with the SQLite backend.
+    # --full ignores the previous output and classifies every story
+    get_storage().label_bias(
+        classifier,
+        state_path=os.path.join(BASE_DIR, "data", "bias_classified_state.json"),
+        full="--full" in sys.argv
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,604 @@
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from pipeline_utils import atomic_write_json, hash_url, load_json_file, parse_time
+
+# =====================================================
+# PATHS
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# One JSONL log (+ sidecar index) per UTC day of publication, and
+# state.json holding the last seq handed out
+PARTITION_DIR = os.path.join(DATA_DIR, "raw_news")
+STATE_FILE = os.path.join(PARTITION_DIR, "state.json")
+
+# Partitions past the retention period, gzipped
+ARCHIVE_DIR = os.path.join(DATA_DIR, "raw_archive")
+
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "raw_news_checkpoints.json")
+
+# The single log the partitions replaced, and the whole-file JSON before
+# it; imported once, then raw_news_indian.json is kept as an export
+STORE_FILE = os.path.join(DATA_DIR, "raw_news_indian.jsonl")
+INDEX_FILE = os.path.join(DATA_DIR, "raw_news_indian.idx")
+LEGACY_FILE = os.path.join(DATA_DIR, "raw_news_indian.json")
+
+# =====================================================
+# RETENTION
+# =====================================================
+
+# Days of partitions kept hot: loaded for duplicate checks and readable by
+# consumers. Older ones are never opened and `archive` moves them away.
+RETENTION_DAYS = int(os.environ.get("HERMES_RAW_RETENTION_DAYS", "30"))
+
+# Consumers only process articles published this recently
+PROCESSING_WINDOW_HOURS = int(os.environ.get("HERMES_PROCESSING_WINDOW_HOURS", "72"))
+
+# Runs in which a record may fail before its consumer's checkpoint moves
+# past it (a dead link would otherwise hold the checkpoint back for as
+# long as the record is retained)
+MAX_ATTEMPTS = int(os.environ.get("HERMES_MAX_ATTEMPTS", "3"))
+
+
+def guid_key(guid):
+    return hashlib.md5(str(guid).encode("utf-8")).hexdigest()
+
+
+def partition_day(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def day_end(day):
+    start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return start.timestamp() + 86400
+
+
+def record_time(record, now=None):
+    # Publication time, else when it was fetched; never in the future
+    now = now or time.time()
+    ts = parse_time(record.get("publishedAt")) or parse_time(record.get("createdAt")) or now
+    return min(ts, now)
+
+
+def processing_window_start(hours=PROCESSING_WINDOW_HOURS):
+    return time.time() - hours * 3600
+
+
+def retention_start(days=RETENTION_DAYS):
+    # Start of the oldest day partition still kept hot
+    return day_end(partition_day(time.time() - days * 86400)) - 86400
+
+
+def checkpoint_seq(last_seq, failed_seqs, attempts=None, max_attempts=MAX_ATTEMPTS):
+    """Where a consumer that read up to ``last_seq`` can checkpoint.
+
+    Records it failed on must be read again next run, so the checkpoint
+    stops just before the first of them (records after it that did
+    succeed are skipped by the consumer's own processed set). Records
+    that ``attempts`` (seq → runs failed in) shows have failed
+    ``max_attempts`` times are given up on.
+    """
+    attempts = attempts or {}
+    failed = [
+        seq for seq in failed_seqs
+        if seq is not None and attempts.get(seq, 1) < max_attempts
+    ]
+    return min(failed) - 1 if failed else last_seq
+
+
+def advance_checkpoint(store, consumer, last_seq, failed_seqs, max_attempts=MAX_ATTEMPTS):
+    """Checkpoint ``consumer`` after a run over records up to ``last_seq``.
+
+    Failures are counted per record across runs; the counts of records
+    the checkpoint still stops at are kept in the store. Returns the new
+    checkpoint.
+    """
+    previous = store.get_failures(consumer)
+    attempts = {
+        seq: previous.get(seq, 0) + 1
+        for seq in set(failed_seqs) if seq is not None
+    }
+
+    seq = checkpoint_seq(last_seq, failed_seqs, attempts, max_attempts)
+
+    given_up = sorted(s for s, n in attempts.items() if n >= max_attempts and s > seq)
+    if given_up:
+        print(f"Giving up on {len(given_up)} records after {max_attempts} attempts (seqs {given_up[:10]})")
+
+    store.set_failures(consumer, {s: n for s, n in attempts.items() if s > seq})
+    store.set_checkpoint(consumer, seq)
+    return seq
+
+
+def partition_days(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(".jsonl")] for name in os.listdir(directory) if name.endswith(".jsonl"))
+
+# =====================================================
+# PARTITION
+# =====================================================
+
+class Partition:
+    """One day of the archive: a JSONL log and its sidecar index.
+
+    The index holds ``seq offset ts guid_key link_key`` per record, so
+    opening a partition never reads the articles themselves.
+    """
+
+    def __init__(self, directory, day):
+        self.day = day
+        self.path = os.path.join(directory, day + ".jsonl")
+        self.index_path = os.path.join(directory, day + ".idx")
+
+        self.seqs = []       # seq numbers in file order
+        self.offsets = []    # byte offset of each record, parallel to seqs
+        self.times = []      # record_time of each record, parallel to seqs
+        self.keys = set()    # guid and normalized-link hashes
+
+        self._data_f = None
+        self._index_f = None
+
+    def __len__(self):
+        return len(self.seqs)
+
+    def load(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 5:
+                        continue
+                    self._add_to_index(int(parts[0]), int(parts[1]), float(parts[2]), parts[3], parts[4])
+
+        self._recover_tail()
+        return self
+
+    def _add_to_index(self, seq, offset, ts, g_key, l_key):
+        self.seqs.append(seq)
+        self.offsets.append(offset)
+        self.times.append(ts)
+        if g_key:
+            self.keys.add(g_key)
+        if l_key:
+            self.keys.add(l_key)
+
+    def _recover_tail(self):
+        # A crash between writing a record and writing its index line leaves
+        # records that are not indexed yet; a crash mid-record leaves a
+        # partial line. Index the former, drop the latter.
+        if not os.path.exists(self.path):
+            return
+
+        start = 0
+        if self.offsets:
+            with open(self.path, "rb") as f:
+                f.seek(self.offsets[-1])
+                f.readline()
+                start = f.tell()
+
+        recovered = []
+        good_end = start
+
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                recovered.append((record, offset))
+                good_end = f.tell()
+
+        if os.path.getsize(self.path) > good_end:
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+
+        if recovered:
+            with open(self.index_path, "a", encoding="utf-8") as idx:
+                for record, offset in recovered:
+                    entry = index_entry(record, offset, record_time(record))
+                    self._add_to_index(*entry)
+                    idx.write(index_line(*entry))
+
+    def append(self, record, ts):
+        if self._data_f is None:
+            self._data_f = open(self.path, "ab")
+            self._index_f = open(self.index_path, "a", encoding="utf-8")
+
+        offset = self._data_f.tell()
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._data_f.write(line.encode("utf-8"))
+        self._data_f.flush()
+
+        entry = index_entry(record, offset, ts)
+        self._index_f.write(index_line(*entry))
+        self._index_f.flush()
+
+        self._add_to_index(*entry)
+
+    def close(self):
+        for f in (self._data_f, self._index_f):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+        self._data_f = None
+        self._index_f = None
+
+    def iter_records(self, since_seq=0, since_ts=None):
+        """Records with ``seq > since_seq`` (and time >= ``since_ts``);
+        records outside the window are skipped without being parsed."""
+        if self._data_f is not None:
+            self._data_f.flush()
+
+        pos = bisect.bisect_right(self.seqs, since_seq)
+        if pos >= len(self.seqs):
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[pos])
+            for i, line in zip(range(pos, len(self.seqs)), f):
+                if since_ts is None or self.times[i] >= since_ts:
+                    yield json.loads(line)
+
+
+def index_entry(record, offset, ts):
+    guid = record.get("guid")
+    link = record.get("link") or record.get("url")
+    return (
+        int(record["seq"]),
+        offset,
+        ts,
+        guid_key(guid) if guid else "",
+        hash_url(link) if link else ""
+    )
+
+
+def index_line(seq, offset, ts, g_key, l_key):
+    return f"{seq}\t{offset}\t{ts:.0f}\t{g_key}\t{l_key}\n"
+
+# =====================================================
+# PARTITIONED ARTICLE STORE
+# =====================================================
+
+class ArticleStore:
+    """Append-only raw articles, partitioned by UTC day of publication.
+
+    Every record gets a monotonically increasing ``seq``. Only partitions
+    inside the retention period are opened (their sidecar indexes, not the
+    articles), so startup cost depends on the retention period, not on how
+    much history is kept. Articles published before it are not stored.
+    """
+
+    def __init__(self, directory=PARTITION_DIR, checkpoint_path=CHECKPOINT_FILE,
+                 archive_dir=ARCHIVE_DIR, retention_days=RETENTION_DAYS,
+                 legacy_paths=(STORE_FILE, LEGACY_FILE)):
+        self.directory = directory
+        self.state_path = os.path.join(directory, "state.json")
+        self.checkpoint_path = checkpoint_path
+        self.failures_path = os.path.splitext(checkpoint_path)[0] + "_failures.json"
+        self.archive_dir = archive_dir
+        self.retention_days = retention_days
+        self.legacy_paths = legacy_paths
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        if not os.path.exists(self.state_path) and not partition_days(self.directory):
+            self._import_legacy()
+
+        self._open()
+
+    def _open(self):
+        state = load_json_file(self.state_path, {}) or {}
+        self._last_seq = int(state.get("last_seq", 0))
+        self._saved_seq = self._last_seq
+
+        # Oldest day still kept hot
+        self.first_day = partition_day(time.time() - self.retention_days * 86400)
+
+        self.partitions = {}
+        for day in partition_days(self.directory):
+            if day >= self.first_day:
+                partition = Partition(self.directory, day).load()
+                self.partitions[day] = partition
+                if partition.seqs:
+                    self._last_seq = max(self._last_seq, partition.seqs[-1])
+
+    # -------------------------------
+    # Lookups
+    # -------------------------------
+
+    def __len__(self):
+        return sum(len(p) for p in self.partitions.values())
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def seen(self, guid=None, link=None):
+        keys = [k for k in (guid_key(guid) if guid else None, hash_url(link) if link else None) if k]
+        return any(k in p.keys for p in self.partitions.values() for k in keys)
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+
+    def append(self, article):
+        """Append ``article`` unless its guid or link is already stored.
+
+        Returns the assigned seq, or None for duplicates and for articles
+        published before the retention period.
+        """
+        ts = record_time(article)
+        day = partition_day(ts)
+        if day < self.first_day:
+            return None
+
+        if self.seen(guid=article.get("guid"), link=article.get("link") or article.get("url")):
+            return None
+
+        partition = self.partitions.get(day)
+        if partition is None:
+            partition = self.partitions[day] = Partition(self.directory, day).load()
+
+        record = dict(article)
+        record["seq"] = self._last_seq + 1
+        partition.append(record, ts)
+
+        self._last_seq = record["seq"]
+        return record["seq"]
+
+    def close(self):
+        for partition in self.partitions.values():
+            partition.close()
+
+        # Written only when something was appended; its mtime marks new data
+        if self._last_seq != self._saved_seq:
+            atomic_write_json(self.state_path, {"last_seq": self._last_seq})
+            self._saved_seq = self._last_seq
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------------
+    # Reads
+    # -------------------------------
+
+    def iter_records(self, since_seq=0, since_ts=None):
+        """Yield records with ``seq > since_seq`` from the hot partitions,
+        day by day; with ``since_ts`` only those published since then
+        (whole partitions before it are not opened)."""
+        for day in sorted(self.partitions):
+            if since_ts is not None and day_end(day) <= since_ts:
+                continue
+            yield from self.partitions[day].iter_records(since_seq, since_ts)
+
+    def iter_all(self):
+        """Every record in the partition directory, retention ignored."""
+        for day in partition_days(self.directory):
+            partition = self.partitions.get(day) or Partition(self.directory, day).load()
+            yield from partition.iter_records()
+
+    # -------------------------------
+    # Consumer checkpoints
+    # -------------------------------
+
+    def get_checkpoint(self, consumer):
+        checkpoints = load_json_file(self.checkpoint_path, {}) or {}
+        return int(checkpoints.get(consumer, 0))
+
+    def set_checkpoint(self, consumer, seq):
+        checkpoints = load_json_file(self.checkpoint_path, {}) or {}
+        checkpoints[consumer] = int(seq)
+        atomic_write_json(self.checkpoint_path, checkpoints)
+
+    def get_failures(self, consumer):
+        # seq → runs the consumer failed on it in (see advance_checkpoint)
+        failures = load_json_file(self.failures_path, {}) or {}
+        return {int(seq): n for seq, n in failures.get(consumer, {}).items()}
+
+    def set_failures(self, consumer, failures):
+        data = load_json_file(self.failures_path, {}) or {}
+        data[consumer] = {str(seq): n for seq, n in failures.items()}
+        atomic_write_json(self.failures_path, data)
+
+    # -------------------------------
+    # Migration / maintenance
+    # -------------------------------
+
+    def _import_legacy(self):
+        # The single-file log keeps its seqs (so checkpoints stay valid);
+        # the whole-file JSON gets new ones. Everything is imported, however
+        # old; `archive` moves what is past retention out afterwards.
+        source = next((p for p in self.legacy_paths if p and os.path.exists(p)), None)
+        if source is None:
+            return
+
+        if source.endswith(".jsonl"):
+            records = []
+            with open(source, "rb") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        else:
+            records = load_json_file(source, []) or []
+            if not isinstance(records, list):
+                return
+
+        now = time.time()
+        partitions = {}
+        keys = set()
+        last_seq = 0
+
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+
+            guid = record.get("guid")
+            link = record.get("link") or record.get("url")
+            record_keys = {k for k in (guid_key(guid) if guid else "", hash_url(link) if link else "") if k}
+            if record_keys & keys:
+                continue
+            keys |= record_keys
+
+            record = dict(record)
+            record["seq"] = int(record.get("seq") or last_seq + 1)
+            last_seq = max(last_seq, record["seq"])
+
+            ts = record_time(record, now)
+            day = partition_day(ts)
+            if day not in partitions:
+                partitions[day] = Partition(self.directory, day)
+            partitions[day].append(record, ts)
+
+        for partition in partitions.values():
+            partition.close()
+        atomic_write_json(self.state_path, {"last_seq": last_seq})
+
+        # The single log is superseded; keep it aside rather than delete it
+        if source.endswith(".jsonl"):
+            os.replace(source, source + ".migrated")
+            if os.path.exists(INDEX_FILE):
+                os.remove(INDEX_FILE)
+
+        print(f"Imported {sum(len(p) for p in partitions.values())} articles "
+              f"from {os.path.basename(source)} into {len(partitions)} daily partitions")
+
+    def archive(self):
+        """Move partitions older than the retention period to gzipped
+        files in ``archive_dir`` (appended to if a day is archived twice)."""
+        self.close()
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        archived = 0
+        for day in partition_days(self.directory):
+            if day >= self.first_day:
+                continue
+
+            partition = Partition(self.directory, day)
+            target = os.path.join(self.archive_dir, day + ".jsonl.gz")
+
+            with open(partition.path, "rb") as src, open(target, "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="ab") as out:
+                    shutil.copyfileobj(src, out)
+                raw.flush()
+                os.fsync(raw.fileno())
+
+            os.remove(partition.path)
+            if os.path.exists(partition.index_path):
+                os.remove(partition.index_path)
+            archived += 1
+
+        print(f"Archived {archived} partitions older than {self.first_day} to {self.archive_dir}")
+
+    def compact(self, export=True):
+        """Rewrite the hot partitions without duplicates or broken lines.
+
+        Seq numbers are preserved so consumer checkpoints stay valid. With
+        ``export`` the legacy whole-file JSON is refreshed (hot data only)
+        for old readers.
+        """
+        self.close()
+
+        keys = set()
+        kept = []
+        dropped = 0
+
+        for day in sorted(self.partitions):
+            partition = self.partitions[day]
+            tmp_data = partition.path + ".compact"
+            tmp_index = partition.index_path + ".compact"
+
+            with open(tmp_data, "wb") as out, open(tmp_index, "w", encoding="utf-8") as idx:
+                for record, ts in zip(partition.iter_records(), partition.times):
+                    entry = index_entry(record, out.tell(), ts)
+                    record_keys = {k for k in entry[3:] if k}
+
+                    if record_keys & keys:
+                        dropped += 1
+                        continue
+
+                    keys |= record_keys
+                    out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                    idx.write(index_line(*entry))
+
+                    if export:
+                        kept.append(record)
+
+                out.flush()
+                os.fsync(out.fileno())
+                idx.flush()
+                os.fsync(idx.fileno())
+
+            os.replace(tmp_data, partition.path)
+            os.replace(tmp_index, partition.index_path)
+            self.partitions[day] = Partition(self.directory, day).load()
+
+        if export and LEGACY_FILE:
+            atomic_write_json(LEGACY_FILE, kept)
+
+        print(f"Compacted store: {len(self)} records kept, {dropped} duplicates dropped")
+
+
+def read_recent(since_ts=None, directory=PARTITION_DIR):
+    """Read-only: records of the partitions overlapping ``since_ts`` onwards
+    (default: the processing window). Safe while a writer is appending."""
+    since_ts = processing_window_start() if since_ts is None else since_ts
+    records = []
+
+    for day in partition_days(directory):
+        if day_end(day) <= since_ts:
+            continue
+        with open(os.path.join(directory, day + ".jsonl"), "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                if record_time(record) >= since_ts:
+                    records.append(record)
+
+    return records
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    store = ArticleStore()
+
+    if command == "archive":
+        store.archive()
+    elif command == "compact":
+        store.compact()
+    elif command == "stats":
+        days = partition_days(store.directory)
+        print(f"Hot partitions: {len(store.partitions)} (since {store.first_day}) | "
+              f"due for archiving: {sum(d < store.first_day for d in days)}")
+        print(f"Records: {len(store)} | last seq: {store.last_seq}")
+        print(f"Checkpoints: {load_json_file(store.checkpoint_path, {})}")
+    else:
+        print("Usage: python article_store.py [stats|archive|compact]")
+        sys.exit(1)
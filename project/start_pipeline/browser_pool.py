@@ -0,0 +1,123 @@
+import asyncio
+import os
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+# Pages resolving redirects at the same time
+MAX_PAGES = int(os.environ.get("HERMES_BROWSER_PAGES", "4"))
+
+# Milliseconds to wait for a redirect to leave news.google.com
+REDIRECT_TIMEOUT = int(os.environ.get("HERMES_REDIRECT_TIMEOUT_MS", "10000"))
+
+GOOGLE_NEWS_HOST = "news.google.com"
+
+
+class ResolveError(Exception):
+    """A redirect could not be followed this time (browser error, timeout,
+    server error); unlike a link that stays on Google, worth retrying."""
+
+# =====================================================
+# SHARED BROWSER
+# =====================================================
+
+class BrowserPool:
+    """One headless Chromium + context shared by every article in a run.
+
+    The browser is launched on first use, so runs without Google News links
+    never pay for it. At most ``max_pages`` pages are open at once.
+    """
+
+    def __init__(self, max_pages=MAX_PAGES):
+        self.max_pages = max_pages
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._pages = None
+        self._start_lock = None
+
+    async def _ensure_started(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+
+        async with self._start_lock:
+            if self._context is not None:
+                return
+
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._context = await self._browser.new_context()
+            self._pages = asyncio.Semaphore(self.max_pages)
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._start_lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # -------------------------------
+    # Redirect resolution
+    # -------------------------------
+
+    async def resolve(self, url, timeout=REDIRECT_TIMEOUT):
+        """Follow a Google News link to the publisher URL.
+
+        Returns as soon as the page URL leaves news.google.com instead of
+        sleeping a fixed delay. Returns None when Google served the page
+        and it never left news.google.com within ``timeout`` (a dead
+        link); raises ResolveError when the page could not be loaded.
+        """
+        await self._ensure_started()
+
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        async with self._pages:
+            page = await self._context.new_page()
+            try:
+                response = await page.goto(url, wait_until="commit", timeout=timeout)
+
+                if response is not None and (response.status >= 500 or response.status == 429):
+                    raise ResolveError(f"{url}: HTTP {response.status}")
+
+                if GOOGLE_NEWS_HOST in page.url:
+                    try:
+                        await page.wait_for_url(
+                            lambda u: GOOGLE_NEWS_HOST not in u,
+                            wait_until="commit",
+                            timeout=timeout
+                        )
+                    except PlaywrightTimeoutError:
+                        # Loaded, but stayed on Google
+                        if response is None:
+                            raise
+                        return None
+
+                return page.url
+            except ResolveError:
+                raise
+            except Exception as e:
+                raise ResolveError(f"{url}: {e}") from e
+            finally:
+                await page.close()
+
+    async def resolve_many(self, urls, timeout=REDIRECT_TIMEOUT):
+        """resolve() for every URL, in the order of ``urls``; links that
+        could not be followed come back as their ResolveError."""
+        return await asyncio.gather(
+            *(self.resolve(u, timeout) for u in urls),
+            return_exceptions=True
+        )
@@ -1,8 +1,12 @@
 import json
 import os
-import requests
-from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from image_fetcher import fetch_image, fetch_images
+from pipeline_utils import normalize_url
+from storage import get_storage, story_id
+from models import get_sentence_model, SENTENCE_MODEL_NAME
+from embedding_store import story_embeddings
 
 # ==================================================
 # PATHS
@@ -11,45 +15,17 @@ from sentence_transformers import SentenceTransformer, util
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-INPUT_FILE = os.path.join(DATA_DIR, "Similar_Links_Output.json")
-OUTPUT_FILE = os.path.join(DATA_DIR, "classified_news.json")
+# Input (Similar_Links_Output.json) and output (classified_news.json) are
+# read and written through storage.py
 
-# ==================================================
-# LOAD MODEL
-# ==================================================
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
+ENCODE_BATCH_SIZE = 64
 
 # ==================================================
-# IMAGE EXTRACTOR (STRONG VERSION)
+# IMAGE EXTRACTOR (HEAD-ONLY, CACHED — see image_fetcher.py)
 # ==================================================
 
 def extract_image_url(url):
-    try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=10)
-
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        # Open Graph
-        og = soup.find("meta", property="og:image") or soup.find("meta", attrs={"name": "og:image"})
-        if og and og.get("content"):
-            return og["content"]
-
-        # Twitter
-        tw = soup.find("meta", property="twitter:image")
-        if tw and tw.get("content"):
-            return tw["content"]
-
-        # Fallback img
-        img = soup.find("img")
-        if img:
-            return img.get("data-src") or img.get("src")
-
-    except Exception as e:
-        print("Image fetch error:", e)
-
-    return None
+    return fetch_image(url)
 
 # ==================================================
 # REFERENCE TEXTS
@@ -76,180 +52,206 @@ NON_POLITICAL_TEXTS = [
     "business earnings report"
 ]
 
-political_embeddings = model.encode(POLITICAL_TEXTS, convert_to_tensor=True)
-non_political_embeddings = model.encode(NON_POLITICAL_TEXTS, convert_to_tensor=True)
+# Normalized prototype matrices (cosine similarity is a plain dot product),
+# encoded on first use with the shared model
+_prototypes = {}
+
+def get_prototypes():
+    if not _prototypes:
+        model = get_sentence_model()
+        _prototypes["political"] = model.encode(POLITICAL_TEXTS, normalize_embeddings=True)
+        _prototypes["non_political"] = model.encode(NON_POLITICAL_TEXTS, normalize_embeddings=True)
+    return _prototypes["political"], _prototypes["non_political"]
 
 # ==================================================
 # CLASSIFIER
 # ==================================================
 
-def classify_news(text, margin=0.05):
-    if not text or not text.strip():
-        return "non_political"
+def classify_texts(texts, margin=0.05, return_embeddings=False):
+    """Classify many texts with one batched encode.
 
-    emb = model.encode(text, convert_to_tensor=True)
-    p = util.cos_sim(emb, political_embeddings).max().item()
-    n = util.cos_sim(emb, non_political_embeddings).max().item()
+    A text is political when its best match among the political
+    prototypes beats the best non-political match by ``margin``.
+    With ``return_embeddings`` the normalized embeddings come back too
+    (zero rows for empty texts).
+    """
+    labels = ["non_political"] * len(texts)
 
-    return "political" if p >= n + margin else "non_political"
+    idx = [i for i, t in enumerate(texts) if t and t.strip()]
+    if not idx:
+        return (labels, None) if return_embeddings else labels
 
-# ==================================================
-# MAIN PROCESSING
-# ==================================================
+    political_embeddings, non_political_embeddings = get_prototypes()
 
-def process_event(input_file, output_file):
+    emb = get_sentence_model().encode(
+        [texts[i] for i in idx],
+        batch_size=ENCODE_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
 
-    if not os.path.exists(input_file):
-        raise FileNotFoundError(f"Input file not found: {input_file}")
+    p = (emb @ political_embeddings.T).max(axis=1)
+    n = (emb @ non_political_embeddings.T).max(axis=1)
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    for i, is_political in zip(idx, p >= n + margin):
+        if is_political:
+            labels[i] = "political"
 
-    # ==================================================
-    # MODIFY EXISTING STRUCTURE ONLY (NO REBUILD)
-    # ==================================================
+    if return_embeddings:
+        full = np.zeros((len(texts), emb.shape[1]), dtype=np.float32)
+        full[idx] = emb
+        return labels, full
 
-    for item in data.get("results", []):
+    return labels
 
-        combined_text_parts = []
 
-        # ============================
-        # RELATED REPORTS (KEEP IMAGE LOGIC)
-        # ============================
-        reports = item.get("related_reports", [])
+def classify_news(text, margin=0.05):
+    return classify_texts([text], margin)[0]
 
-        for r in reports:
+# ==================================================
+# MAIN PROCESSING
+# ==================================================
 
-            title = r.get("title", "")
-            desc = r.get("description", "")
-            url = r.get("url")
+def story_text(item):
+    # Related report titles/descriptions, then the input article's
+    # title/summary — the text the category is decided on
+    combined_text_parts = []
 
-            if title:
-                combined_text_parts.append(title)
+    for r in item.get("related_reports", []):
+        if r.get("title"):
+            combined_text_parts.append(r["title"])
+        if r.get("description"):
+            combined_text_parts.append(r["description"])
 
-            if desc:
-                combined_text_parts.append(desc)
+    main_article = item.get("input_article", {})
 
-            # ✅ YOUR ORIGINAL IMAGE LOGIC (UNCHANGED)
-            image_url = r.get("image_url")
+    if main_article.get("title"):
+        combined_text_parts.append(main_article["title"])
 
-            if not image_url and url:
-                image_url = extract_image_url(url)
+    if main_article.get("summary"):
+        combined_text_parts.append(main_article["summary"])
 
-            if image_url:
-                r["image_url"] = image_url
+    return " ".join(combined_text_parts)
 
-        # ============================
-        # INPUT ARTICLE (KEEP IMAGE LOGIC)
-        # ============================
-        main_article = item.get("input_article", {})
-        main_url = main_article.get("url")
 
-        main_image = main_article.get("image_url")
+def categorize(stories):
+    """Set ``category`` on every story with one batched encode and keep
+    the story embeddings for similarity search (see embedding_store.py)."""
+    categories, embeddings = classify_texts([story_text(s) for s in stories], return_embeddings=True)
 
-        if not main_image and main_url:
-            main_image = extract_image_url(main_url)
+    for story, category in zip(stories, categories):
+        # ✅ ADD ONLY NEW FIELD
+        story["category"] = category
 
-        if main_image:
-            main_article["image_url"] = main_image
+    if embeddings is not None:
+        story_embeddings.add_many([story_id(s) for s in stories], embeddings, model=SENTENCE_MODEL_NAME)
 
-        # classification text
-        if main_article.get("title"):
-            combined_text_parts.append(main_article["title"])
 
-        if main_article.get("summary"):
-            combined_text_parts.append(main_article["summary"])
+def encode_stories(stories):
+    # Embeddings only (backfill for stories classified earlier)
+    if not stories:
+        return
 
-        # ============================
-        # CLASSIFICATION
-        # ============================
-        combined_text = " ".join(combined_text_parts)
+    embeddings = get_sentence_model().encode(
+        [story_text(s) for s in stories],
+        batch_size=ENCODE_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+    story_embeddings.add_many([story_id(s) for s in stories], embeddings, model=SENTENCE_MODEL_NAME)
 
-        category = classify_news(combined_text)
 
-        # ✅ ADD ONLY NEW FIELD
-        item["category"] = category
+def missing_images(item):
+    # Every article object of the story still lacking an image
+    targets = list(item.get("related_reports", []))
+    targets.append(item.get("input_article", {}))
 
-    # ==================================================
-    # SAVE SAME JSON STRUCTURE
-    # ==================================================
+    return [a for a in targets if not a.get("image_url") and a.get("url")]
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
 
-    print("[DONE] Structure retained | Image logic preserved")
-    print(f"[OUTPUT] {output_file}")
+def story_key(item):
+    return normalize_url(item.get("input_article", {}).get("url", ""))
 
-    if not os.path.exists(input_file):
-        raise FileNotFoundError(f"Input file not found: {input_file}")
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def reuse_previous(items, previous):
+    """Carry category and images over from the last output.
 
-    # ==================================================
-    # LOOP THROUGH EXISTING STRUCTURE (NO REBUILDING)
-    # ==================================================
+    A story is reused when its text is unchanged; the rest are returned
+    and are the only ones the model has to look at.
+    """
+    by_key = {
+        story_key(item): item for item in previous
+        if isinstance(item, dict) and "category" in item
+    }
 
-    for item in data.get("results", []):
+    fresh = []
+    for item in items:
+        prev = by_key.get(story_key(item))
 
-        reports = item.get("related_reports", [])
-        combined_text_parts = []
+        if prev is None or story_text(prev) != story_text(item):
+            fresh.append(item)
+            continue
 
-        # ============================
-        # RELATED REPORTS PROCESSING
-        # ============================
-        for r in reports:
-            title = r.get("title", "")
-            desc = r.get("description", "")
-            url = r.get("url")
+        item["category"] = prev["category"]
 
-            if title:
-                combined_text_parts.append(title)
-            if desc:
-                combined_text_parts.append(desc)
+        known = {a.get("url"): a.get("image_url") for a in prev.get("related_reports", [])}
+        known[prev.get("input_article", {}).get("url")] = prev.get("input_article", {}).get("image_url")
 
-            # ✅ ADD IMAGE URL IF MISSING
-            if not r.get("image_url") and url:
-                r["image_url"] = extract_image_url(url)
+        for a in missing_images(item):
+            if known.get(a["url"]):
+                a["image_url"] = known[a["url"]]
 
-        # ============================
-        # INPUT ARTICLE PROCESSING
-        # ============================
-        main_article = item.get("input_article", {})
-        main_url = main_article.get("url")
+    return fresh
 
-        if not main_article.get("image_url") and main_url:
-            main_article["image_url"] = extract_image_url(main_url)
 
-        # Include main article text for classification
-        if main_article.get("title"):
-            combined_text_parts.append(main_article["title"])
+def process_event(storage):
 
-        if main_article.get("summary"):
-            combined_text_parts.append(main_article["summary"])
+    # JSON backend: every story plus the last output to reuse from;
+    # SQLite backend: only stories that have no category yet
+    data, items, previous = storage.load_for_classification()
+    fresh = reuse_previous(items, previous)
 
+    targets = [a for item in items for a in missing_images(item)]
+
+    with ThreadPoolExecutor(max_workers=1) as background:
         # ============================
-        # CLASSIFICATION
+        # IMAGES — page heads fetched concurrently (cached per URL)
+        # while the model runs
         # ============================
-        combined_text = " ".join(combined_text_parts)
-        category = classify_news(combined_text)
+        images_future = background.submit(fetch_images, [a["url"] for a in targets])
 
-        # ✅ ADD CATEGORY TO SAME OBJECT
-        item["category"] = category
+        # ============================
+        # CLASSIFICATION — one batched encode for every new or
+        # changed story (embeddings kept for similarity search)
+        # ============================
+        categorize(fresh)
+
+        images = images_future.result()
+
+    for a in targets:
+        a["image_url"] = images[a["url"]]
 
     # ==================================================
-    # SAVE SAME STRUCTURE BACK
+    # SAVE SAME JSON STRUCTURE
     # ==================================================
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    storage.save_classified(data, items)
 
-    print("[DONE] Structure preserved and enriched")
-    print(f"[OUTPUT] {output_file}")
+    print(
+        f"[DONE] {len(fresh)} stories classified | {len(items) - len(fresh)} reused | "
+        f"{len(images)} images looked up"
+    )
+    print(f"[OUTPUT] {storage.name} storage")
 
 # ==================================================
 # RUN
 # ==================================================
 
+def main():
+    process_event(get_storage())
+
+
 if __name__ == "__main__":
-    process_event(INPUT_FILE, OUTPUT_FILE)
\ No newline at end of file
+    main()
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import numpy as np
+import Fetch_Similar_News as fsn
+from storage import get_storage
+from article_store import advance_checkpoint
+from pipeline_utils import normalize_url
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+# Minimum cosine similarity between an article and a story centroid
+CLUSTER_THRESHOLD = float(os.environ.get("HERMES_CLUSTER_THRESHOLD", "0.6"))
+
+# One Google News query per story (not per article) to widen coverage
+GOOGLE_QUERY_PER_STORY = os.environ.get("HERMES_CLUSTER_GOOGLE", "1") == "1"
+
+# =====================================================
+# CLUSTERING
+# =====================================================
+
+def leader_cluster(embeddings, threshold=CLUSTER_THRESHOLD, n_seeds=None):
+    """Group normalized embeddings into stories in a single pass.
+
+    Each row joins the story whose centroid it is most similar to, or starts
+    a new story when nothing reaches ``threshold``. Only the first
+    ``n_seeds`` rows may start stories; the rest can only join one. Every
+    row is compared against story centroids, never against other rows, so
+    the cost is rows × stories.
+
+    Returns (labels, n_stories); rows that joined nothing get label -1.
+    """
+    n = len(embeddings)
+    n_seeds = n if n_seeds is None else n_seeds
+
+    sums = np.zeros_like(embeddings)
+    centroids = np.zeros_like(embeddings)
+    labels = np.full(n, -1, dtype=np.int64)
+    k = 0
+
+    for i in range(n):
+        e = embeddings[i]
+
+        if k:
+            sims = centroids[:k] @ e
+            j = int(np.argmax(sims))
+
+            if sims[j] >= threshold:
+                labels[i] = j
+                sums[j] += e
+                centroids[j] = sums[j] / np.linalg.norm(sums[j])
+                continue
+
+        if i < n_seeds:
+            labels[i] = k
+            sums[k] = e
+            centroids[k] = e
+            k += 1
+
+    return labels, k
+
+
+def cluster_text(article):
+    # Raw archive records have no description, so every article is
+    # clustered on its title alone
+    return article.get("title") or ""
+
+
+def raw_to_candidate(article):
+    # Raw archive records in the same shape fetch_rss() produces
+    return {
+        "title": article.get("title") or "",
+        "description": "",
+        "url": article["url"],
+        "source": article.get("source") or "",
+        "publishedAt": article.get("publishedAt")
+    }
+
+
+def build_clusters(raw_articles):
+    """Cluster the new raw articles together with the shared candidate pool.
+
+    Returns one dict per story with its representative raw article, all raw
+    members and the candidates matched to the representative.
+    """
+    pool = fsn.get_candidate_pool()
+
+    # pool["embeddings"] include descriptions (semantic_filter); encode the
+    # pool the way the raw articles are encoded instead
+    embeddings = fsn.encode_texts(
+        [cluster_text(a) for a in raw_articles] + [cluster_text(a) for a in pool["articles"]]
+    )
+
+    labels, k = leader_cluster(embeddings, n_seeds=len(raw_articles))
+
+    members = [[] for _ in range(k)]
+    for i, label in enumerate(labels):
+        if label >= 0:
+            members[label].append(i)
+
+    stories = []
+
+    for rows in members:
+        raw_rows = [i for i in rows if i < len(raw_articles)]
+
+        # Representative: the raw article closest to the story centroid
+        centroid = embeddings[rows].sum(axis=0)
+        rep_row = max(raw_rows, key=lambda i: float(embeddings[i] @ centroid))
+        rep_embedding = embeddings[rep_row]
+
+        candidates = []
+        for i in rows:
+            if i == rep_row:
+                continue
+            if i < len(raw_articles):
+                candidate = raw_to_candidate(raw_articles[i])
+            else:
+                candidate = pool["articles"][i - len(raw_articles)]
+            score = float(embeddings[i] @ rep_embedding)
+            candidates.append({**candidate, "similarity_score": round(score, 3)})
+
+        stories.append({
+            "article": raw_articles[rep_row],
+            "members": [raw_articles[i] for i in raw_rows],
+            "matched": candidates
+        })
+
+    return stories
+
+
+def story_matches(story):
+    matched = list(story["matched"])
+
+    if GOOGLE_QUERY_PER_STORY and story["article"].get("title"):
+        query = story["article"]["title"]
+        google = fsn.fetch_google_news(query)
+        matched.extend(fsn.semantic_filter(query, google))
+
+    # Same cap and ordering as the per-article path
+    seen = set()
+    unique = []
+    for m in sorted(matched, key=lambda x: x["similarity_score"], reverse=True):
+        key = normalize_url(m["url"])
+        if key not in seen:
+            seen.add(key)
+            unique.append(m)
+
+    return unique[:fsn.MAX_MATCHES]
+
+# =====================================================
+# MAIN
+# =====================================================
+
+async def main():
+
+    store = get_storage().open_articles()
+    last_seq = store.last_seq
+
+    processed = fsn.load_processed()
+
+    raw_articles = [
+        a for a in fsn.load_new_articles(store)
+        if normalize_url(a["url"]) not in processed
+    ]
+
+    if not raw_articles:
+        advance_checkpoint(store, fsn.STORE_CONSUMER, last_seq, [])
+        print("Finished (nothing new)")
+        return
+
+    stories = build_clusters(raw_articles)
+
+    print(f"Clustered {len(raw_articles)} articles into {len(stories)} stories")
+
+    # Seqs of raw articles to retry next run: every member of a story that
+    # could not be built
+    failed = []
+
+    async def handle(story):
+
+        article = story["article"]
+        print("Processing story:", article["url"], f"({len(story['members'])} raw articles)")
+
+        try:
+            text = await asyncio.to_thread(fsn.extract_article, article["url"])
+            result = None
+
+            if text:
+                # Summarized while the story's candidates are matched
+                input_summary = asyncio.create_task(fsn.generate_article_summary(text))
+                try:
+                    matched = await asyncio.to_thread(story_matches, story)
+                except BaseException:
+                    fsn.cancel_pending([input_summary])
+                    raise
+                result = await fsn.build_story(article, text, input_summary, matched)
+
+            if result:
+                # fsync + periodic compaction; off the event loop
+                await asyncio.to_thread(fsn.save_result, article, result)
+                await asyncio.to_thread(fsn.save_members, article, story["members"])
+            else:
+                failed.extend(a["seq"] for a in story["members"])
+
+        except Exception as e:
+            print("Error:", e)
+            failed.extend(a["seq"] for a in story["members"])
+
+    await fsn.run_workers(stories, handle)
+
+    await fsn.browser_pool.close()
+    fsn.results_journal.compact()
+    fsn.flush_publisher_cache()
+    fsn.redirect_cache.save()
+    fsn.redirect_cache.report()
+    fsn.summarizer.save()
+    fsn.summarizer.report()
+    advance_checkpoint(store, fsn.STORE_CONSUMER, last_seq, failed)
+
+    print(f"Finished ({len(failed)} articles left for the next run)")
+
+# =====================================================
+# RUN
+# =====================================================
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import threading
+import numpy as np
+from pipeline_utils import load_json_file, atomic_write_json
+
+# =====================================================
+# PATHS
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# <base>.f32 holds float32 rows, <base>.ids one story id per row and
+# <base>.meta.json the dimension and model they came from
+EMBEDDING_BASE = os.path.join(DATA_DIR, "story_embeddings")
+
+# =====================================================
+# APPEND-ONLY EMBEDDING STORE
+# =====================================================
+
+class EmbeddingStore:
+    """Normalized story embeddings, appended as stories are classified.
+
+    Rows are written before their ids, so a reader only trusts as many
+    rows as there are complete id lines. A story classified again gets a
+    new row; the last row for an id wins.
+    """
+
+    def __init__(self, base=EMBEDDING_BASE):
+        self.vectors_path = base + ".f32"
+        self.ids_path = base + ".ids"
+        self.meta_path = base + ".meta.json"
+        self.lock = threading.Lock()
+
+    def meta(self):
+        return load_json_file(self.meta_path, None)
+
+    def add_many(self, ids, vectors, model=None):
+        """Append ``vectors`` (one row per id); all-zero rows are skipped."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        keep = [i for i in range(len(ids)) if vectors[i].any()]
+        if not keep:
+            return 0
+
+        with self.lock:
+            meta = self.meta()
+            dim = vectors.shape[1]
+
+            # Another model (or dimension) makes old rows meaningless
+            if meta is None or meta["dim"] != dim or meta.get("model") != model:
+                for path in (self.vectors_path, self.ids_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                atomic_write_json(self.meta_path, {"dim": dim, "model": model})
+
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors[keep]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self.ids_path, "a", encoding="utf-8") as f:
+                f.writelines(ids[i] + "\n" for i in keep)
+
+        return len(keep)
+
+    def read(self, start_row=0, ids_offset=0):
+        """Rows appended since ``start_row`` / byte ``ids_offset`` of the id file.
+
+        Returns (ids, vectors, next_ids_offset).
+        """
+        meta = self.meta()
+        if meta is None or not os.path.exists(self.ids_path):
+            return [], np.zeros((0, 0), dtype=np.float32), ids_offset
+
+        dim = meta["dim"]
+
+        with open(self.ids_path, "rb") as f:
+            f.seek(ids_offset)
+            chunk = f.read()
+
+        # Ignore a partial last line
+        end = chunk.rfind(b"\n") + 1
+        ids = chunk[:end].decode("utf-8").split("\n")[:-1]
+
+        available = os.path.getsize(self.vectors_path) // (4 * dim) - start_row
+        ids = ids[:max(0, available)]
+        consumed = sum(len(i.encode("utf-8")) + 1 for i in ids)
+
+        vectors = np.fromfile(
+            self.vectors_path, dtype=np.float32,
+            count=len(ids) * dim, offset=start_row * 4 * dim
+        ).reshape(len(ids), dim)
+
+        return ids, vectors, ids_offset + consumed
+
+    def compact(self):
+        """Keep only the latest row per id."""
+        with self.lock:
+            ids, vectors, _ = self.read()
+            if not ids:
+                return
+
+            latest = {id_: i for i, id_ in enumerate(ids)}
+            order = sorted(latest.values())
+
+            tmp = self.vectors_path + ".compact"
+            with open(tmp, "wb") as f:
+                f.write(np.ascontiguousarray(vectors[order]).tobytes())
+            tmp_ids = self.ids_path + ".compact"
+            with open(tmp_ids, "w", encoding="utf-8") as f:
+                f.writelines(ids[i] + "\n" for i in order)
+
+            os.replace(tmp, self.vectors_path)
+            os.replace(tmp_ids, self.ids_path)
+
+        print(f"Compacted embeddings: {len(order)} kept, {len(ids) - len(order)} superseded")
+
+
+# Shared by the stages that classify stories
+story_embeddings = EmbeddingStore()
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+
+    if command == "backfill":
+        # Embed stories classified before embeddings were kept
+        from classify_news import encode_stories
+        from storage import BIAS_FILE, get_storage, story_id
+
+        ids, _, _ = story_embeddings.read()
+        have = set(ids)
+        storage = get_storage()
+        if storage.name == "sqlite":
+            from LCR_classified import NewsBiasClassifier
+            report = storage.bias_document(NewsBiasClassifier)
+        else:
+            report = load_json_file(BIAS_FILE, {}) or {}
+        missing = [
+            s for s in report.get("political_articles_data", []) + report.get("non_political_articles_data", [])
+            if story_id(s) not in have
+        ]
+        encode_stories(missing)
+        print(f"Embedded {len(missing)} stories")
+    elif command == "compact":
+        story_embeddings.compact()
+    elif command == "stats":
+        ids, _, _ = story_embeddings.read()
+        print(f"Rows: {len(ids)} | stories: {len(set(ids))} | meta: {json.dumps(story_embeddings.meta())}")
+    else:
+        print("Usage: python embedding_store.py [stats|backfill|compact]")
+        sys.exit(1)
@@ -0,0 +1,120 @@
+import os
+import time
+import feedparser
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+# How many feeds are downloaded at the same time
+FEED_CONCURRENCY = int(os.environ.get("HERMES_FEED_CONCURRENCY", "16"))
+
+# Hard limit (seconds) for downloading a single feed, body included
+FEED_TIMEOUT = float(os.environ.get("HERMES_FEED_TIMEOUT", "15"))
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+CHUNK_SIZE = 64 * 1024
+
+
+# =====================================================
+# SESSION
+# =====================================================
+
+def make_session(pool_size=FEED_CONCURRENCY):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+# =====================================================
+# SINGLE FEED
+# =====================================================
+
+def fetch_feed(url, session=None, timeout=FEED_TIMEOUT):
+    """Download and parse one feed.
+
+    Never raises: failures are reported in the ``error`` field so one bad
+    feed cannot take the whole ingestion run down.
+    """
+    started = time.perf_counter()
+    deadline = started + timeout
+    http = session or requests
+
+    entries = []
+    error = None
+
+    try:
+        # requests' timeout only bounds each socket operation, so the body
+        # is streamed and checked against the deadline as it arrives
+        with http.get(url, headers=HEADERS, timeout=timeout, stream=True) as r:
+            r.raise_for_status()
+
+            body = bytearray()
+            for chunk in r.iter_content(CHUNK_SIZE):
+                body.extend(chunk)
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f"feed took longer than {timeout}s")
+
+        feed = feedparser.parse(bytes(body))
+        entries = feed.entries
+
+        if not entries and feed.get("bozo"):
+            error = f"parse error: {feed.get('bozo_exception')}"
+
+    except Exception as e:
+        error = str(e) or e.__class__.__name__
+
+    return {
+        "url": url,
+        "entries": entries,
+        "latency": round(time.perf_counter() - started, 3),
+        "error": error
+    }
+
+
+# =====================================================
+# ALL FEEDS (CONCURRENT)
+# =====================================================
+
+def fetch_feeds(urls, concurrency=FEED_CONCURRENCY, timeout=FEED_TIMEOUT):
+    """Fetch every feed at the same time.
+
+    Results come back in the same order as ``urls``. Total time is roughly
+    the slowest feed (capped by ``timeout``) instead of the sum of all feeds.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+
+    workers = max(1, min(concurrency, len(urls)))
+    session = make_session(workers)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(
+                lambda u: fetch_feed(u, session=session, timeout=timeout),
+                urls
+            ))
+    finally:
+        session.close()
+
+
+def print_feed_report(results, names=None):
+    names = names or [r["url"] for r in results]
+
+    ok = sum(1 for r in results if not r["error"])
+    total_entries = sum(len(r["entries"]) for r in results)
+    slowest = max((r["latency"] for r in results), default=0)
+
+    print(f"Feeds: {ok}/{len(results)} ok | {total_entries} entries | slowest {slowest:.2f}s")
+
+    for name, r in sorted(zip(names, results), key=lambda x: -x[1]["latency"]):
+        status = "ERROR " + r["error"] if r["error"] else f"{len(r['entries'])} entries"
+        print(f"  {r['latency']:6.2f}s  {name}: {status}")
@@ -1,50 +1,67 @@
-import feedparser
-import json
-import os
 from datetime import datetime
 from rss_sources_indian import INDIAN_NEWS_SOURCES
+from feed_fetcher import fetch_feeds, print_feed_report, FEED_CONCURRENCY, FEED_TIMEOUT
+from storage import get_storage
 
-os.makedirs("data", exist_ok=True)
-
-output_file = "data/raw_news_indian.json"
-
-# Load existing data if file exists
-if os.path.exists(output_file):
-    with open(output_file, "r", encoding="utf-8") as f:
-        try:
-            articles = json.load(f)
-        except json.JSONDecodeError:
-            articles = []
-else:
-    articles = []
-
-seen_guids = {a.get("guid") for a in articles}
-
-for source in INDIAN_NEWS_SOURCES:
-    feed = feedparser.parse(source["rss"])
-
-    for entry in feed.entries:
-        guid = entry.get("id", entry.get("link"))
-        if guid in seen_guids:
-            continue
-
-        article = {
-            "title": entry.get("title"),
-            "normalizedTitle": entry.get("title", "").lower(),
-            "link": entry.get("link"),
-            "source": source["name"],
-            "bias": source["bias"],
-            "publishedAt": entry.get("published", ""),
-            "guid": guid,
-            "createdAt": datetime.utcnow().isoformat(),
-            "updatedAt": datetime.utcnow().isoformat()
-        }
-
-        articles.append(article)
-        seen_guids.add(guid)
-
-        # 🔥 write immediately
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(articles, f, indent=2, ensure_ascii=False)
-
-print(f"Fetched {len(articles)} articles")
+def fetch_new_articles(store):
+    """Download every feed and append unseen entries to ``store``.
+
+    Returns the newly stored articles in feed order.
+    """
+
+    # Download every feed at the same time (bounded by FEED_CONCURRENCY)
+    feed_results = fetch_feeds(
+        [source["rss"] for source in INDIAN_NEWS_SOURCES],
+        concurrency=FEED_CONCURRENCY,
+        timeout=FEED_TIMEOUT
+    )
+
+    print_feed_report(feed_results, names=[s["name"] for s in INDIAN_NEWS_SOURCES])
+
+    new_articles = []
+
+    for source, feed in zip(INDIAN_NEWS_SOURCES, feed_results):
+
+        for entry in feed["entries"]:
+            guid = entry.get("id", entry.get("link"))
+            if store.seen(guid=guid, link=entry.get("link")):
+                continue
+
+            article = {
+                "title": entry.get("title"),
+                "normalizedTitle": entry.get("title", "").lower(),
+                "link": entry.get("link"),
+                "source": source["name"],
+                "bias": source["bias"],
+                "publishedAt": entry.get("published", ""),
+                "guid": guid,
+                "createdAt": datetime.utcnow().isoformat(),
+                "updatedAt": datetime.utcnow().isoformat()
+            }
+
+            # 🔥 one appended line per article, no whole-file rewrite
+            # (None for duplicates and articles older than the retention period)
+            seq = store.append(article)
+            if seq:
+                article["seq"] = seq
+                new_articles.append(article)
+
+    return new_articles
+
+
+def main():
+
+    # Day-partitioned append-only store (data/raw_news/, or the articles
+    # table with the SQLite backend); imports the old single-file archive on
+    # first use
+    store = get_storage().open_articles()
+
+    new_articles = fetch_new_articles(store)
+
+    store.close()
+
+    print(f"Fetched {len(new_articles)} new articles ({len(store)} total)")
+
+
+if __name__ == "__main__":
+    main()
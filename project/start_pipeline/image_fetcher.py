@@ -0,0 +1,162 @@
+import os
+import re
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+import page_cache
+from pipeline_utils import atomic_write_json, load_json_file, normalize_url
+from rate_limit import limiter
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+CACHE_FILE = os.path.join(DATA_DIR, "image_cache.json")
+
+IMAGE_WORKERS = int(os.environ.get("HERMES_IMAGE_WORKERS", "16"))
+
+# Pages that were read and had no image are looked at again after this
+# many seconds (failed fetches are not cached at all)
+NEGATIVE_TTL = int(os.environ.get("HERMES_IMAGE_NEGATIVE_TTL", str(24 * 3600)))
+
+# Give up looking for </head> after this many bytes
+MAX_HEAD_BYTES = 512 * 1024
+
+FETCH_TIMEOUT = 10
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+HEAD_END = re.compile(rb"</head\s*>", re.IGNORECASE)
+
+# =====================================================
+# HEAD-ONLY FETCH
+# =====================================================
+
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=IMAGE_WORKERS, pool_maxsize=IMAGE_WORKERS))
+_session.mount("https://", HTTPAdapter(pool_connections=IMAGE_WORKERS, pool_maxsize=IMAGE_WORKERS))
+_session.headers.update(HEADERS)
+
+
+def read_head(url):
+    """Download ``url`` only until ``</head>`` arrives and return the head."""
+    buf = bytearray()
+
+    with limiter.limit(url):
+        with _session.get(url, timeout=FETCH_TIMEOUT, stream=True) as r:
+            r.raise_for_status()
+            encoding = r.encoding or "utf-8"
+
+            for chunk in r.iter_content(16 * 1024):
+                # only re-scan the tail of the buffer (tag may span chunks)
+                start = max(0, len(buf) - 16)
+                buf.extend(chunk)
+
+                match = HEAD_END.search(buf, start)
+                if match:
+                    del buf[match.end():]
+                    break
+
+                if len(buf) >= MAX_HEAD_BYTES:
+                    break
+
+    return buf.decode(encoding, errors="replace")
+
+
+def find_image(html, allow_body=False):
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Open Graph
+    og = soup.find("meta", property="og:image") or soup.find("meta", attrs={"name": "og:image"})
+    if og and og.get("content"):
+        return og["content"]
+
+    # Twitter
+    tw = soup.find("meta", property="twitter:image") or soup.find("meta", attrs={"name": "twitter:image"})
+    if tw and tw.get("content"):
+        return tw["content"]
+
+    # Fallback img (only possible when the full page is at hand)
+    if allow_body:
+        img = soup.find("img")
+        if img:
+            return img.get("data-src") or img.get("src")
+
+    return None
+
+# =====================================================
+# CACHE
+# =====================================================
+
+_cache = {
+    "entries": None,
+    "dirty": False,
+    "lock": threading.Lock()
+}
+
+
+def _entries():
+    with _cache["lock"]:
+        if _cache["entries"] is None:
+            _cache["entries"] = load_json_file(CACHE_FILE, {}) or {}
+        return _cache["entries"]
+
+
+def save_cache():
+    with _cache["lock"]:
+        if _cache["entries"] is not None and _cache["dirty"]:
+            atomic_write_json(CACHE_FILE, _cache["entries"], indent=None)
+            _cache["dirty"] = False
+
+# =====================================================
+# PUBLIC API
+# =====================================================
+
+def fetch_image(url):
+    """og:image / twitter:image for ``url`` (None if there is none).
+
+    Answers from the image cache, then from a page the pipeline already
+    downloaded, and only then reads the page head from the network.
+    """
+    key = normalize_url(url)
+    entries = _entries()
+
+    entry = entries.get(key)
+    if entry is not None:
+        if entry["image"] or time.time() - entry["ts"] < NEGATIVE_TTL:
+            return entry["image"]
+
+    try:
+        html = page_cache.peek_html(url)
+        if html:
+            image = find_image(html, allow_body=True)
+        else:
+            image = find_image(read_head(url))
+    except Exception as e:
+        # Not cached: a network error says nothing about the page
+        print("Image fetch error:", e)
+        return None
+
+    with _cache["lock"]:
+        entries[key] = {"image": image, "ts": time.time()}
+        _cache["dirty"] = True
+
+    return image
+
+
+def fetch_images(urls, workers=IMAGE_WORKERS):
+    """Look up many pages concurrently; returns {url: image or None}."""
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(urls))) as pool:
+        images = dict(zip(urls, pool.map(fetch_image, urls)))
+
+    save_cache()
+    return images
@@ -0,0 +1,34 @@
+import threading
+
+# =====================================================
+# SHARED MODEL REGISTRY
+# =====================================================
+#
+# Models are loaded on first use and then shared by every stage running in
+# the same process (see run_pipeline.py). Heavy imports (torch via
+# sentence_transformers) happen here, not when a stage module is imported.
+
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+
+_models = {}
+_lock = threading.Lock()
+
+
+def get_sentence_model(name=SENTENCE_MODEL_NAME):
+    with _lock:
+        if name not in _models:
+            from sentence_transformers import SentenceTransformer
+
+            _models[name] = SentenceTransformer(name)
+        return _models[name]
+
+
+def register_model(model, name=SENTENCE_MODEL_NAME):
+    # Use ``model`` for ``name`` from now on (benchmarks register a
+    # deterministic stand-in with the same encode() interface)
+    with _lock:
+        _models[name] = model
+
+
+def loaded_models():
+    return list(_models)
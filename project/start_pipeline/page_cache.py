@@ -0,0 +1,242 @@
+import gzip
+import json
+import os
+import threading
+import time
+import requests
+from collections import OrderedDict
+from pipeline_utils import hash_url, normalize_url
+from rate_limit import limiter
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+CACHE_DIR = os.path.join(DATA_DIR, "page_cache")
+
+# Oldest entries are evicted once the cache grows past this size
+MAX_CACHE_BYTES = int(float(os.environ.get("HERMES_PAGE_CACHE_MB", "512")) * 1024 * 1024)
+
+# Entries kept decoded in memory by this process
+MAX_MEMORY_ENTRIES = 256
+
+# Locks shared out among keys by hash, so their number stays fixed; two
+# URLs that share one only wait for each other's download
+LOCK_STRIPES = 256
+
+FETCH_TIMEOUT = 10
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# =====================================================
+# CONTENT-ADDRESSED PAGE CACHE
+# =====================================================
+#
+# One entry per normalized URL (hash_url), shared by every stage and run:
+#   {"url", "html", "text", "canonical", "fetched_at"}
+# "text" and "canonical" are filled in the first time someone asks for
+# them, so each page is downloaded once and parsed once.
+
+_memory = OrderedDict()
+_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+_state = {"lock": threading.Lock(), "size": None}
+
+_session = requests.Session()
+_session.headers.update(HEADERS)
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key[:2], key + ".json.gz")
+
+
+def _key_lock(key):
+    # key is a hex digest
+    return _locks[int(key[:8], 16) % LOCK_STRIPES]
+
+
+def _read(key):
+    path = _path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path)   # LRU: mtime doubles as "last used"
+        return entry
+    except (OSError, ValueError):
+        return None
+
+
+def _write(key, entry):
+    path = _path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    old_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+    _track_size(os.path.getsize(path) - old_size)
+
+
+def _track_size(delta):
+    with _state["lock"]:
+        if _state["size"] is None:
+            _state["size"] = _disk_usage()
+        else:
+            _state["size"] += delta
+        over = _state["size"] > MAX_CACHE_BYTES
+
+    if over:
+        evict()
+
+
+def _disk_usage():
+    total = 0
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def evict(target_ratio=0.9):
+    """Delete least recently used entries until the cache is under
+    ``target_ratio`` of MAX_CACHE_BYTES."""
+    files = []
+    for root, _, names in os.walk(CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    target = MAX_CACHE_BYTES * target_ratio
+
+    for _, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+    with _state["lock"]:
+        _state["size"] = total
+
+
+def get_entry(url):
+    """Return the cache entry for ``url``, downloading the page on a miss.
+
+    Download failures are not persisted (the next run retries) but are
+    remembered for the rest of this process.
+    """
+    key = hash_url(url)
+
+    entry = _recall(key)
+    if entry is not None:
+        return key, entry
+
+    with _key_lock(key):
+        entry = _recall(key)
+        if entry is not None:
+            return key, entry
+
+        entry = _read(key)
+
+        if entry is None:
+            entry = {
+                "url": normalize_url(url),
+                "html": "",
+                "text": None,
+                "canonical": None,
+                "fetched_at": time.time()
+            }
+            try:
+                with limiter.limit(url):
+                    r = _session.get(url, timeout=FETCH_TIMEOUT)
+                r.raise_for_status()
+                entry["html"] = r.text
+                _write(key, entry)
+            except Exception as e:
+                print("Page fetch error:", url, e)
+
+        _remember(key, entry)
+        return key, entry
+
+
+def _recall(key):
+    # Memory hit, marked most recently used
+    with _state["lock"]:
+        entry = _memory.get(key)
+        if entry is not None:
+            _memory.move_to_end(key)
+        return entry
+
+
+def _remember(key, entry):
+    with _state["lock"]:
+        _memory[key] = entry
+        while len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _update(key, entry, field, value):
+    with _key_lock(key):
+        entry[field] = value
+        if entry["html"]:
+            _write(key, entry)
+
+
+# =====================================================
+# ACCESSORS
+# =====================================================
+
+def get_html(url):
+    return get_entry(url)[1]["html"]
+
+
+def peek_html(url):
+    """HTML for ``url`` only if it is already cached; never downloads."""
+    key = hash_url(url)
+
+    entry = _recall(key)
+    if entry is None:
+        entry = _read(key)
+    return entry["html"] if entry else ""
+
+
+def get_text(url):
+    key, entry = get_entry(url)
+
+    if entry["text"] is None:
+        import trafilatura
+
+        text = trafilatura.extract(entry["html"]) if entry["html"] else ""
+        _update(key, entry, "text", text or "")
+
+    return entry["text"]
+
+
+def get_canonical(url):
+    key, entry = get_entry(url)
+
+    if entry["canonical"] is None:
+        from bs4 import BeautifulSoup
+
+        canonical = ""
+        if entry["html"]:
+            soup = BeautifulSoup(entry["html"], "html.parser")
+            tag = soup.find("link", rel="canonical")
+            if tag and tag.get("href"):
+                canonical = tag["href"]
+        _update(key, entry, "canonical", canonical)
+
+    return entry["canonical"]
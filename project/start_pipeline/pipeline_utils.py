@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse, urlunparse
+
+# =====================================================
+# URLS
+# =====================================================
+
+def normalize_url(url):
+    parsed = urlparse(url)
+    return urlunparse(
+        (parsed.scheme, parsed.netloc.replace("www.", ""), parsed.path, "", "", "")
+    )
+
+def hash_url(url):
+    return hashlib.md5(normalize_url(url).encode()).hexdigest()
+
+def story_id(story):
+    # Hash of the normalized input URL; the id the API, the database and
+    # the embedding store all use
+    return hash_url(story.get("input_article", {}).get("url") or story.get("url", ""))
+
+# =====================================================
+# TIMESTAMPS
+# =====================================================
+
+def parse_time(value):
+    """Epoch seconds for an RSS (RFC 822) or ISO timestamp, else None.
+
+    Naive timestamps are taken as UTC (the store writes utcnow()).
+    """
+    if not value:
+        return None
+
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+# =====================================================
+# FILES
+# =====================================================
+
+def atomic_write_json(path, data, indent=2):
+    """Write JSON to a temp file next to ``path`` and swap it in.
+
+    Readers never observe a half-written document, and a crash mid-write
+    leaves the previous version intact.
+    """
+    _atomic_write(path, lambda f: json.dump(data, f, indent=indent, ensure_ascii=False))
+
+def atomic_write_text(path, text):
+    # atomic_write_json for a document that is already serialized
+    _atomic_write(path, lambda f: f.write(text))
+
+def _atomic_write(path, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_json_file(path, default=None):
+    if not os.path.exists(path):
+        return default
+
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return default
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+# Minimum seconds between two requests to the same publisher domain
+DOMAIN_INTERVAL = float(os.environ.get("HERMES_DOMAIN_INTERVAL", "0.5"))
+
+# Requests to the same domain allowed in flight at once
+DOMAIN_CONCURRENCY = int(os.environ.get("HERMES_DOMAIN_CONCURRENCY", "2"))
+
+# =====================================================
+# PER-DOMAIN LIMITER
+# =====================================================
+
+def domain_of(url):
+    return urlparse(url).netloc.lower().replace("www.", "")
+
+
+class DomainRateLimiter:
+    """Keeps concurrent workers polite towards each publisher.
+
+    Blocking (thread-based) on purpose: the network calls it guards run in
+    executor threads, so waiting here never stalls the event loop.
+    """
+
+    def __init__(self, interval=DOMAIN_INTERVAL, concurrency=DOMAIN_CONCURRENCY):
+        self.interval = interval
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_at = {}
+
+    def _slot(self, domain):
+        with self._lock:
+            if domain not in self._slots:
+                self._slots[domain] = threading.BoundedSemaphore(self.concurrency)
+            return self._slots[domain]
+
+    def _reserve(self, domain):
+        # Book the next start time for this domain and return the wait
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at.get(domain, 0.0))
+            self._next_at[domain] = start + self.interval
+            return start - now
+
+    @contextmanager
+    def limit(self, url):
+        domain = domain_of(url)
+        slot = self._slot(domain)
+
+        with slot:
+            wait = self._reserve(domain)
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
+
+# Shared by every stage in the process
+limiter = DomainRateLimiter()
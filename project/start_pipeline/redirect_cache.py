@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+from pipeline_utils import atomic_write_json, load_json_file, normalize_url
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+CACHE_FILE = os.path.join(DATA_DIR, "google_redirect_cache.json")
+
+# Resolved links practically never change
+POSITIVE_TTL = int(os.environ.get("HERMES_REDIRECT_TTL", str(30 * 24 * 3600)))
+
+# Links that stayed on Google are retried after a while (Google or the
+# publisher may recover); load errors and timeouts are never cached
+NEGATIVE_TTL = int(os.environ.get("HERMES_REDIRECT_NEGATIVE_TTL", str(6 * 3600)))
+
+# =====================================================
+# CACHE
+# =====================================================
+
+class RedirectCache:
+    """Persistent Google News URL → publisher URL mapping.
+
+    Dead links (the page loaded but never left Google) are stored too,
+    with ``final`` None, so they are not sent to the browser again until
+    NEGATIVE_TTL expires.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.entries = load_json_file(path, {}) or {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    @staticmethod
+    def key(url):
+        # The article id lives in the path; drop tracking params like ?oc=5
+        return normalize_url(url)
+
+    def get(self, url):
+        """Return (found, final_url); final_url is None for cached failures."""
+        with self.lock:
+            entry = self.entries.get(self.key(url))
+
+            if entry is not None:
+                ttl = POSITIVE_TTL if entry.get("final") else NEGATIVE_TTL
+                if time.time() - entry.get("ts", 0) < ttl:
+                    if entry.get("final"):
+                        self.hits += 1
+                    else:
+                        self.negative_hits += 1
+                    return True, entry.get("final")
+
+            self.misses += 1
+            return False, None
+
+    def put(self, url, final):
+        with self.lock:
+            self.entries[self.key(url)] = {"final": final, "ts": time.time()}
+            self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+
+            now = time.time()
+            self.entries = {
+                k: v for k, v in self.entries.items()
+                if now - v.get("ts", 0) < (POSITIVE_TTL if v.get("final") else NEGATIVE_TTL)
+            }
+            atomic_write_json(self.path, self.entries, indent=None)
+            self.dirty = False
+
+    def report(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        rate = (self.hits + self.negative_hits) / lookups * 100 if lookups else 0
+
+        print(
+            f"Redirect cache: {lookups} lookups | {self.hits} hits | "
+            f"{self.negative_hits} negative hits | {self.misses} misses | "
+            f"{rate:.1f}% hit rate | {len(self.entries)} entries"
+        )
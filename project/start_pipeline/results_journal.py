@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pipeline_utils import atomic_write_text, load_json_file, normalize_url
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+# Fold the journal into the published JSON after this many new entries
+COMPACT_EVERY = int(os.environ.get("HERMES_JOURNAL_COMPACT_EVERY", "25"))
+
+# ... and not before the journal holds this fraction of the entries
+# already published. Every compaction rewrites the whole document, so
+# letting the journal grow with it keeps the total I/O linear in the
+# number of entries.
+COMPACT_RATIO = float(os.environ.get("HERMES_JOURNAL_COMPACT_RATIO", "0.25"))
+
+# Entry kind → list of the published document it goes to. "member" is a
+# raw article folded into another article's story by cluster_events.py
+SECTIONS = {
+    "result": "results",
+    "no_related": "no_related_reports",
+    "member": "clustered_articles"
+}
+
+# =====================================================
+# SERIALIZATION
+# =====================================================
+# The published document is written as json.dump(..., indent=2) would
+# write it, but list items are serialized once, when they are first
+# published, and reused by every later compaction.
+
+def dump_item(value):
+    # One list item, indented as it sits inside a top-level list
+    return "    " + json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+
+
+def render(document):
+    # ``document`` maps keys to plain values or to lists of dump_item strings
+    parts = []
+    for key, value in document.items():
+        if isinstance(value, list):
+            body = "[\n" + ",\n".join(value) + "\n  ]" if value else "[]"
+        else:
+            body = json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        parts.append(f"  {json.dumps(key, ensure_ascii=False)}: {body}")
+    return "{\n" + ",\n".join(parts) + "\n}"
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+# =====================================================
+# RESULTS JOURNAL
+# =====================================================
+
+class ResultsJournal:
+    """Append-only journal in front of a published results document.
+
+    Each finished article is one line in ``<output>.journal.jsonl``; the
+    published JSON is rewritten atomically only when the journal is
+    compacted. ``<output>.keys`` lists every processed input URL, one per
+    line, so resuming never needs to parse the results themselves.
+
+    The published document is parsed once per process and kept with its
+    items serialized; a compaction only serializes the journaled entries.
+    """
+
+    def __init__(self, output_file, compact_every=COMPACT_EVERY, compact_ratio=COMPACT_RATIO):
+        self.output_file = output_file
+        self.journal_path = os.path.splitext(output_file)[0] + ".journal.jsonl"
+        self.keys_path = os.path.splitext(output_file)[0] + ".keys"
+        self.compact_every = compact_every
+        self.compact_ratio = compact_ratio
+
+        self.lock = threading.Lock()
+        self.pending = sum(1 for _ in self._read_journal())
+
+        # Published document as last read or written (see _document)
+        self._document = None
+        self._present = None
+        self._stamp = None
+
+    # -------------------------------
+    # Reads
+    # -------------------------------
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # partial last line from a crash mid-append
+                    continue
+
+    def _published(self):
+        data = load_json_file(self.output_file, None)
+        if not isinstance(data, dict):
+            data = {
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "results": [],
+                "no_related_reports": [],
+                "failed_urls": []
+            }
+        return data
+
+    def _load_document(self):
+        # Called with the lock held. Read again only when another process
+        # rewrote the file since we last read or wrote it.
+        stamp = file_stamp(self.output_file)
+        if self._document is not None and stamp == self._stamp:
+            return self._document
+
+        data = self._published()
+
+        self._present = {
+            self._entry_key(kind, r)
+            for kind, section in SECTIONS.items()
+            for r in data.get(section, []) if isinstance(r, dict)
+        }
+        self._document = {
+            key: [dump_item(v) for v in value] if isinstance(value, list) else value
+            for key, value in data.items()
+        }
+        self._stamp = stamp
+        return self._document
+
+    def published_count(self):
+        with self.lock:
+            document = self._load_document()
+            return sum(len(document.get(section, [])) for section in SECTIONS.values())
+
+    @staticmethod
+    def _entry_key(kind, entry):
+        url = entry["input_article"]["url"] if kind == "result" else entry["url"]
+        return normalize_url(url)
+
+    def processed_keys(self):
+        if not os.path.exists(self.keys_path):
+            self._bootstrap_keys()
+
+        with open(self.keys_path, "r", encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+
+    def _bootstrap_keys(self):
+        # First run on an existing output: derive the key list once
+        data = self._published()
+        keys = [
+            self._entry_key(kind, r)
+            for kind, section in SECTIONS.items()
+            for r in data.get(section, []) if isinstance(r, dict)
+        ] + [
+            self._entry_key(line["kind"], line["entry"]) for line in self._read_journal()
+        ]
+
+        tmp_path = self.keys_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(k + "\n" for k in keys)
+        os.replace(tmp_path, self.keys_path)
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+
+    def append(self, kind, entry):
+        """Record one ``result``, ``no_related`` or ``member`` entry durably.
+
+        Blocking (fsync, and now and then a compaction); async callers run
+        it in a thread.
+        """
+        line = json.dumps({"kind": kind, "entry": entry}, ensure_ascii=False) + "\n"
+        key = self._entry_key(kind, entry)
+
+        with self.lock:
+            if not os.path.exists(self.keys_path):
+                self._bootstrap_keys()
+
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self.keys_path, "a", encoding="utf-8") as f:
+                f.write(key + "\n")
+
+            self.pending += 1
+            pending = self.pending
+
+        if pending >= self.compact_every and pending >= self.compact_ratio * self.published_count():
+            self.compact()
+
+    def compact(self):
+        """Fold journaled entries into the published JSON atomically.
+
+        Entries already present (a crash between publishing and truncating
+        the journal) are skipped, so replaying is safe.
+        """
+        with self.lock:
+            entries = list(self._read_journal())
+            if not entries:
+                return
+
+            document = self._load_document()
+
+            try:
+                for line in entries:
+                    key = self._entry_key(line["kind"], line["entry"])
+                    if key in self._present:
+                        continue
+                    self._present.add(key)
+
+                    document.setdefault(SECTIONS[line["kind"]], []).append(dump_item(line["entry"]))
+
+                document["generated_at"] = datetime.now(timezone.utc).isoformat()
+
+                atomic_write_text(self.output_file, render(document))
+                self._stamp = file_stamp(self.output_file)
+            except BaseException:
+                # The file may not hold what is in memory; read it again
+                self._document = None
+                raise
+
+            # Published; the journal can start over
+            open(self.journal_path, "w", encoding="utf-8").close()
+            self.pending = 0
+
+        print(f"Published {len(entries)} journaled entries to {os.path.basename(self.output_file)}")
@@ -0,0 +1,721 @@
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from article_store import ArticleStore, guid_key, partition_day, retention_start, ARCHIVE_DIR
+from results_journal import ResultsJournal
+from pipeline_utils import atomic_write_json, hash_url, load_json_file, normalize_url, parse_time, story_id
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# "json" (the files in data/) or "sqlite" (data/hermes.db)
+STORAGE_BACKEND = os.environ.get("HERMES_STORAGE", "json").lower()
+
+DB_FILE = os.path.join(DATA_DIR, "hermes.db")
+
+# With the SQLite backend, also write the JSON documents. On by default:
+# the frontend imports bias_classified_output.json directly. Each export
+# rewrites a whole document, so turn it off when only the API is used
+JSON_EXPORT = os.environ.get("HERMES_JSON_EXPORT", "1") == "1"
+
+RAW_FILE = os.path.join(DATA_DIR, "raw_news_indian.json")
+SIMILAR_FILE = os.path.join(DATA_DIR, "Similar_Links_Output.json")
+CLASSIFIED_FILE = os.path.join(DATA_DIR, "classified_news.json")
+BIAS_FILE = os.path.join(DATA_DIR, "bias_classified_output.json")
+PUBLISHER_CACHE_FILE = os.path.join(DATA_DIR, "publisher_cache.json")
+
+# =====================================================
+# JSON BACKEND
+# =====================================================
+
+class JsonStorage:
+    """The whole-document JSON files in data/ (the default)."""
+
+    name = "json"
+
+    def __init__(self):
+        self._results = None
+
+    # -------------------------------
+    # Raw articles
+    # -------------------------------
+
+    def open_articles(self):
+        return ArticleStore()
+
+    # -------------------------------
+    # Publishers
+    # -------------------------------
+
+    def load_publishers(self):
+        data = load_json_file(PUBLISHER_CACHE_FILE, {}) or {}
+
+        # Keep only domain → string mappings
+        return {
+            k: v for k, v in data.items()
+            if isinstance(k, str) and isinstance(v, str)
+        }
+
+    def save_publishers(self, publishers):
+        # merge so entries written by another process are not lost
+        merged = self.load_publishers()
+        merged.update(publishers)
+        atomic_write_json(PUBLISHER_CACHE_FILE, merged)
+        return merged
+
+    # -------------------------------
+    # Similar-news results
+    # -------------------------------
+
+    def results(self):
+        if self._results is None:
+            self._results = ResultsJournal(SIMILAR_FILE)
+        return self._results
+
+    # -------------------------------
+    # Classification
+    # -------------------------------
+
+    def load_for_classification(self):
+        """(document, stories to classify, previously classified stories)."""
+        if not os.path.exists(SIMILAR_FILE):
+            raise FileNotFoundError(f"Input file not found: {SIMILAR_FILE}")
+
+        data = load_json_file(SIMILAR_FILE, {}) or {}
+        previous = (load_json_file(CLASSIFIED_FILE, {}) or {}).get("results", [])
+
+        return data, data.get("results", []), previous
+
+    def save_classified(self, data, stories):
+        atomic_write_json(CLASSIFIED_FILE, data)
+
+    def label_bias(self, classifier, state_path=None, full=False):
+        classifier.news_articles = (load_json_file(CLASSIFIED_FILE, {}) or {}).get("results", [])
+        classifier.save_results(BIAS_FILE, state_path=None if full else state_path)
+
+    # -------------------------------
+    # Scheduler
+    # -------------------------------
+
+    def fingerprint(self, filename):
+        # Artifacts are plain files; run_pipeline hashes them itself
+        return None
+
+# =====================================================
+# SQLITE BACKEND
+# =====================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    guid_key     TEXT,
+    link_key     TEXT,
+    url          TEXT,
+    published_ts REAL,
+    data         TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS articles_guid ON articles(guid_key);
+CREATE UNIQUE INDEX IF NOT EXISTS articles_link ON articles(link_key);
+CREATE INDEX IF NOT EXISTS articles_url ON articles(url);
+CREATE INDEX IF NOT EXISTS articles_published ON articles(published_ts);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    consumer TEXT PRIMARY KEY,
+    seq      INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS checkpoint_failures (
+    consumer TEXT NOT NULL,
+    seq      INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    PRIMARY KEY (consumer, seq)
+);
+
+CREATE TABLE IF NOT EXISTS stories (
+    id           TEXT PRIMARY KEY,
+    url          TEXT NOT NULL,
+    kind         TEXT NOT NULL,
+    published_ts REAL NOT NULL,
+    publisher    TEXT,
+    data         TEXT NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS stories_url ON stories(url);
+CREATE INDEX IF NOT EXISTS stories_published ON stories(published_ts DESC, id);
+CREATE INDEX IF NOT EXISTS stories_publisher ON stories(publisher);
+
+CREATE TABLE IF NOT EXISTS reports (
+    story_id     TEXT NOT NULL REFERENCES stories(id) ON DELETE CASCADE,
+    url          TEXT NOT NULL,
+    publisher    TEXT,
+    published_ts REAL,
+    bias         TEXT,
+    PRIMARY KEY (story_id, url)
+);
+CREATE INDEX IF NOT EXISTS reports_url ON reports(url);
+CREATE INDEX IF NOT EXISTS reports_publisher ON reports(publisher);
+CREATE INDEX IF NOT EXISTS reports_bias ON reports(bias);
+
+CREATE TABLE IF NOT EXISTS publishers (
+    domain TEXT PRIMARY KEY,
+    name   TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS classifications (
+    story_id       TEXT PRIMARY KEY REFERENCES stories(id) ON DELETE CASCADE,
+    category       TEXT,
+    classified     TEXT,
+    final_bias     TEXT,
+    labeled        TEXT,
+    publisher_list TEXT,
+    updated_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS classifications_category ON classifications(category, final_bias);
+CREATE INDEX IF NOT EXISTS classifications_bias ON classifications(final_bias);
+CREATE INDEX IF NOT EXISTS classifications_updated ON classifications(updated_at);
+"""
+
+
+class SqliteArticleStore:
+    """ArticleStore interface on the ``articles`` table."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def conn(self):
+        return self.storage.conn
+
+    def __len__(self):
+        return self.conn.execute("SELECT count(*) FROM articles").fetchone()[0]
+
+    @property
+    def last_seq(self):
+        # From AUTOINCREMENT's counter, which archived (deleted) rows keep
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'articles'").fetchone()
+        return row[0] if row else 0
+
+    def seen(self, guid=None, link=None):
+        row = self.conn.execute(
+            "SELECT 1 FROM articles WHERE guid_key = ? OR link_key = ? LIMIT 1",
+            (guid_key(guid) if guid else None, hash_url(link) if link else None)
+        ).fetchone()
+        return row is not None
+
+    def retention_start(self):
+        # Same day boundary as the partitioned JSON store
+        return retention_start()
+
+    def append(self, article, seq=None):
+        """Insert ``article`` unless its guid or link is already stored.
+
+        Returns the assigned seq, or None for duplicates and (unless
+        ``seq`` is given, as when importing) for articles published before
+        the retention period.
+        """
+        guid = article.get("guid")
+        link = article.get("link") or article.get("url")
+        published = parse_time(article.get("publishedAt"))
+
+        if seq is None and published is not None and published < self.retention_start():
+            return None
+
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO articles (seq, guid_key, link_key, url, published_ts, data) "
+                "VALUES (?, ?, ?, ?, ?, '')",
+                (
+                    seq,
+                    guid_key(guid) if guid else None,
+                    hash_url(link) if link else None,
+                    normalize_url(link) if link else None,
+                    published
+                )
+            )
+            if not cur.rowcount:
+                return None
+
+            record = dict(article)
+            record["seq"] = cur.lastrowid
+            self.conn.execute(
+                "UPDATE articles SET data = ? WHERE seq = ?",
+                (json.dumps(record, ensure_ascii=False), record["seq"])
+            )
+
+        return record["seq"]
+
+    def close(self):
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def iter_records(self, since_seq=0, since_ts=None):
+        """Yield records with ``seq > since_seq`` in insertion order; with
+        ``since_ts`` only those published since then (or undated)."""
+        if since_ts is None:
+            rows = self.conn.execute(
+                "SELECT data FROM articles WHERE seq > ? ORDER BY seq", (since_seq,)
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT data FROM articles WHERE seq > ? "
+                "AND (published_ts >= ? OR published_ts IS NULL) ORDER BY seq",
+                (since_seq, since_ts)
+            )
+
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def get_checkpoint(self, consumer):
+        row = self.conn.execute(
+            "SELECT seq FROM checkpoints WHERE consumer = ?", (consumer,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def set_checkpoint(self, consumer, seq):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO checkpoints (consumer, seq) VALUES (?, ?) "
+                "ON CONFLICT(consumer) DO UPDATE SET seq = excluded.seq",
+                (consumer, int(seq))
+            )
+
+    def get_failures(self, consumer):
+        return dict(self.conn.execute(
+            "SELECT seq, attempts FROM checkpoint_failures WHERE consumer = ?", (consumer,)
+        ))
+
+    def set_failures(self, consumer, failures):
+        with self.conn:
+            self.conn.execute("DELETE FROM checkpoint_failures WHERE consumer = ?", (consumer,))
+            self.conn.executemany(
+                "INSERT INTO checkpoint_failures (consumer, seq, attempts) VALUES (?, ?, ?)",
+                [(consumer, seq, n) for seq, n in failures.items()]
+            )
+
+    def archive(self):
+        """Move articles published before the retention period to gzipped
+        day files in ARCHIVE_DIR (the layout the JSON store uses)."""
+        cutoff = self.retention_start()
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+        by_day = {}
+        for seq, published, data in self.conn.execute(
+            "SELECT seq, published_ts, data FROM articles WHERE published_ts < ? ORDER BY seq",
+            (cutoff,)
+        ):
+            by_day.setdefault(partition_day(published), []).append(data)
+
+        for day, rows in by_day.items():
+            with open(os.path.join(ARCHIVE_DIR, day + ".jsonl.gz"), "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="ab") as out:
+                    out.write("".join(row + "\n" for row in rows).encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+
+        # Only after the archive files are durable
+        with self.conn:
+            self.conn.execute("DELETE FROM articles WHERE published_ts < ?", (cutoff,))
+
+        print(f"Archived {sum(len(r) for r in by_day.values())} articles "
+              f"({len(by_day)} days) to {ARCHIVE_DIR}")
+
+    def compact(self, export=True):
+        # Duplicates cannot exist (unique keys); reclaim space and export
+        self.conn.execute("VACUUM")
+
+        if export:
+            atomic_write_json(RAW_FILE, list(self.iter_records()))
+
+        print(f"Compacted store: {len(self)} records")
+
+
+class ProcessedKeys:
+    """``key in processed`` answered by the stories table.
+
+    Keys added locally (queued in this run) are remembered in memory, so
+    callers can use it like the set ResultsJournal returns.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.local = set()
+
+    def __contains__(self, key):
+        if key in self.local:
+            return True
+        row = self.storage.conn.execute(
+            "SELECT 1 FROM stories WHERE url = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def add(self, key):
+        self.local.add(key)
+
+
+class SqliteResults:
+    """ResultsJournal interface on the ``stories`` and ``reports`` tables."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def processed_keys(self):
+        return ProcessedKeys(self.storage)
+
+    def append(self, kind, entry):
+        self.storage.put_story(kind, entry)
+
+    def compact(self):
+        if self.storage.export:
+            self.storage.export_similar()
+
+
+class SqliteStorage:
+    """All pipeline artifacts in one SQLite database.
+
+    Each thread gets its own connection (WAL mode, so the API can read
+    while the pipeline writes). Stages read only what they still have to
+    work on; the JSON documents are written as exports when ``export``
+    is on.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=DB_FILE, export=JSON_EXPORT):
+        self.path = path
+        self.export = export
+        self._local = threading.local()
+
+        fresh = not os.path.exists(path)
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+        if fresh:
+            self.import_json()
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # -------------------------------
+    # Raw articles
+    # -------------------------------
+
+    def open_articles(self):
+        return SqliteArticleStore(self)
+
+    # -------------------------------
+    # Publishers
+    # -------------------------------
+
+    def load_publishers(self):
+        return dict(self.conn.execute("SELECT domain, name FROM publishers"))
+
+    def save_publishers(self, publishers):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO publishers (domain, name) VALUES (?, ?) "
+                "ON CONFLICT(domain) DO UPDATE SET name = excluded.name",
+                publishers.items()
+            )
+        return self.load_publishers()
+
+    # -------------------------------
+    # Similar-news results
+    # -------------------------------
+
+    def results(self):
+        return SqliteResults(self)
+
+    def put_story(self, kind, entry):
+        if kind == "result":
+            article = entry.get("input_article", {})
+            url, published, publisher = article.get("url"), article.get("publishedAt"), article.get("source_name")
+        else:
+            url, published, publisher = entry["url"], entry.get("publishedAt"), None
+
+        sid = story_id(entry)
+        now = time.time()
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO stories (id, url, kind, published_ts, publisher, data, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET kind = excluded.kind, "
+                "published_ts = excluded.published_ts, publisher = excluded.publisher, "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                (
+                    sid, normalize_url(url), kind, parse_time(published) or 0.0,
+                    publisher.lower() if publisher else None,
+                    json.dumps(entry, ensure_ascii=False), now
+                )
+            )
+
+            # A changed story is classified again
+            self.conn.execute("DELETE FROM classifications WHERE story_id = ?", (sid,))
+            self.conn.execute("DELETE FROM reports WHERE story_id = ?", (sid,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO reports (story_id, url, publisher, published_ts) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        sid, normalize_url(r["url"]),
+                        r["source_name"].lower() if r.get("source_name") else None,
+                        parse_time(r.get("publishedAt"))
+                    )
+                    for r in entry.get("related_reports", []) if r.get("url")
+                ]
+            )
+
+    # -------------------------------
+    # Classification
+    # -------------------------------
+
+    def load_for_classification(self):
+        # Only stories without a category; nothing to reuse
+        rows = self.conn.execute(
+            "SELECT s.data FROM stories s "
+            "LEFT JOIN classifications c ON c.story_id = s.id "
+            "WHERE s.kind = 'result' AND c.story_id IS NULL "
+            "ORDER BY s.rowid"
+        )
+        return None, [json.loads(data) for (data,) in rows], []
+
+    def save_classified(self, data, stories):
+        now = time.time()
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO classifications (story_id, category, classified, updated_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(story_id) DO UPDATE SET category = excluded.category, "
+                "classified = excluded.classified, final_bias = NULL, labeled = NULL, "
+                "publisher_list = NULL, updated_at = excluded.updated_at",
+                [
+                    (story_id(s), s.get("category"), json.dumps(s, ensure_ascii=False), now)
+                    for s in stories
+                ]
+            )
+
+        if self.export:
+            self.export_classified()
+
+    def label_bias(self, classifier, state_path=None, full=False, ids=None):
+        """Bias-label stories classified since the last run, or all of
+        them when the publisher list changed (or with ``full``). With
+        ``ids`` only those stories are looked at."""
+        fingerprint = classifier.publisher_fingerprint
+
+        query = (
+            "SELECT story_id, classified FROM classifications "
+            "WHERE category IS NOT NULL AND (? OR labeled IS NULL OR publisher_list IS NOT ?)"
+        )
+        params = [full, fingerprint]
+        if ids is not None:
+            query += f" AND story_id IN ({', '.join('?' * len(ids))})"
+            params += ids
+
+        rows = self.conn.execute(query + " ORDER BY rowid", params).fetchall()
+
+        now = time.time()
+
+        with self.conn:
+            for sid, classified in rows:
+                result, article_type = classifier.classify_article(json.loads(classified))
+                bias = result["bias_classification"]["final_bias"] if article_type == "political" else None
+
+                self.conn.execute(
+                    "UPDATE classifications SET final_bias = ?, labeled = ?, "
+                    "publisher_list = ?, updated_at = ? WHERE story_id = ?",
+                    (bias, json.dumps(result, ensure_ascii=False), fingerprint, now, sid)
+                )
+                self.conn.executemany(
+                    "UPDATE reports SET bias = ? WHERE story_id = ? AND url = ?",
+                    [
+                        (r.get("bias"), sid, normalize_url(r["url"]))
+                        for r in result.get("related_reports", []) if r.get("url")
+                    ]
+                )
+
+        if self.export:
+            self.export_bias(classifier)
+
+        print(f"✅ Bias classification completed! ({len(rows)} classified)")
+
+    def bias_distribution(self):
+        return Counter(dict(self.conn.execute(
+            "SELECT final_bias, count(*) FROM classifications "
+            "WHERE final_bias IS NOT NULL GROUP BY final_bias"
+        )))
+
+    # -------------------------------
+    # Documents (served by the API, or exported as JSON)
+    # -------------------------------
+
+    def raw_document(self):
+        # Every article inside the retention period, as the JSON API serves
+        return list(self.open_articles().iter_records(since_ts=retention_start()))
+
+    def similar_document(self):
+        sections = {"result": [], "no_related": [], "member": []}
+        for kind, data in self.conn.execute("SELECT kind, data FROM stories ORDER BY rowid"):
+            sections[kind].append(json.loads(data))
+
+        document = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "results": sections["result"],
+            "no_related_reports": sections["no_related"],
+            "failed_urls": []
+        }
+        if sections["member"]:
+            document["clustered_articles"] = sections["member"]
+
+        return document
+
+    def classified_document(self):
+        document = self.similar_document()
+        document["results"] = [
+            json.loads(classified) for (classified,) in self.conn.execute(
+                "SELECT c.classified FROM classifications c JOIN stories s ON s.id = c.story_id "
+                "WHERE c.classified IS NOT NULL ORDER BY s.rowid"
+            )
+        ]
+        return document
+
+    def bias_document(self, classifier):
+        political, non_political = [], []
+        for final_bias, labeled in self.conn.execute(
+            "SELECT c.final_bias, c.labeled FROM classifications c JOIN stories s ON s.id = c.story_id "
+            "WHERE c.labeled IS NOT NULL ORDER BY s.rowid"
+        ):
+            (political if final_bias else non_political).append(json.loads(labeled))
+
+        return classifier.build_report(political, non_political, self.bias_distribution())
+
+    def export_similar(self):
+        atomic_write_json(SIMILAR_FILE, self.similar_document())
+
+    def export_classified(self):
+        atomic_write_json(CLASSIFIED_FILE, self.classified_document())
+
+    def export_bias(self, classifier):
+        atomic_write_json(BIAS_FILE, self.bias_document(classifier))
+
+    # -------------------------------
+    # Import from the JSON backend
+    # -------------------------------
+
+    def import_json(self):
+        """Copy the JSON artifacts into a new database (seqs preserved)."""
+        json_store = ArticleStore()
+        articles = SqliteArticleStore(self)
+
+        for record in json_store.iter_all():
+            articles.append(record, seq=record.get("seq"))
+        for consumer, seq in (load_json_file(json_store.checkpoint_path, {}) or {}).items():
+            articles.set_checkpoint(consumer, seq)
+
+        self.save_publishers(JsonStorage().load_publishers())
+
+        similar = load_json_file(SIMILAR_FILE, {}) or {}
+        for entry in similar.get("results", []):
+            self.put_story("result", entry)
+        for entry in similar.get("no_related_reports", []):
+            self.put_story("no_related", entry)
+        for entry in similar.get("clustered_articles", []):
+            self.put_story("member", entry)
+
+        classified = (load_json_file(CLASSIFIED_FILE, {}) or {}).get("results", [])
+        known = {sid for (sid,) in self.conn.execute("SELECT id FROM stories")}
+        self.save_classified(None, [s for s in classified if story_id(s) in known])
+
+        print(f"Imported {len(articles)} articles, {len(known)} stories, "
+              f"{len(classified)} classified stories into {os.path.basename(self.path)}")
+
+    # -------------------------------
+    # Scheduler
+    # -------------------------------
+
+    def fingerprint(self, filename):
+        """Change marker for an artifact that lives in the database."""
+        queries = {
+            "raw_news/state.json": "SELECT count(*), max(seq) FROM articles",
+            "Similar_Links_Output.json": "SELECT count(*), max(updated_at) FROM stories",
+            "classified_news.json": "SELECT count(*), max(updated_at) FROM classifications WHERE category IS NOT NULL",
+            "bias_classified_output.json": "SELECT count(*), max(updated_at) FROM classifications WHERE labeled IS NOT NULL"
+        }
+        if filename not in queries:
+            return None
+
+        count, marker = self.conn.execute(queries[filename]).fetchone()
+        return f"sqlite:{count}:{marker}"
+
+# =====================================================
+# REGISTRY
+# =====================================================
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(backend=None):
+    """The process-wide storage for ``backend`` (default HERMES_STORAGE)."""
+    backend = backend or STORAGE_BACKEND
+
+    with _storages_lock:
+        if backend not in _storages:
+            if backend == "sqlite":
+                _storages[backend] = SqliteStorage()
+            elif backend == "json":
+                _storages[backend] = JsonStorage()
+            else:
+                raise ValueError(f"Unknown HERMES_STORAGE backend: {backend}")
+        return _storages[backend]
+
+# =====================================================
+# CLI
+# =====================================================
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    storage = get_storage("sqlite")
+
+    if command == "export":
+        from LCR_classified import NewsBiasClassifier
+
+        storage.export_similar()
+        storage.export_classified()
+        storage.export_bias(NewsBiasClassifier(os.path.join(DATA_DIR, "publisher_list.json")))
+        print("Exported JSON documents")
+    elif command == "stats":
+        for table in ("articles", "stories", "reports", "publishers", "classifications"):
+            count = storage.conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            print(f"{table}: {count}")
+    elif command == "archive":
+        # Raw articles past HERMES_RAW_RETENTION_DAYS → data/raw_archive/
+        storage.open_articles().archive()
+    else:
+        print("Usage: python storage.py [stats|export|archive]")
+        sys.exit(1)
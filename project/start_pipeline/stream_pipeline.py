@@ -0,0 +1,369 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+import Fetch_Similar_News as fsn
+from storage import get_storage
+from fetch_news_indian import fetch_new_articles
+from article_store import advance_checkpoint, processing_window_start
+from classify_news import categorize, missing_images
+from image_fetcher import fetch_images
+from LCR_classified import NewsBiasClassifier
+from pipeline_utils import atomic_write_json, load_json_file, normalize_url, parse_time, story_id
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+PUBLISHER_LIST = os.path.join(DATA_DIR, "publisher_list.json")
+BIAS_OUTPUT = os.path.join(DATA_DIR, "bias_classified_output.json")
+
+# One line per published story: feed, fetch and visible timestamps
+LATENCY_FILE = os.path.join(DATA_DIR, "stream_latency.jsonl")
+
+# Seconds between feed polls
+POLL_INTERVAL = int(os.environ.get("HERMES_STREAM_POLL", "120"))
+
+# Stories classified together when several are waiting
+CLASSIFY_BATCH = int(os.environ.get("HERMES_STREAM_BATCH", "16"))
+
+# Minimum seconds between two publishes; stories finished in between are
+# published together, so the report is not rewritten for every batch
+PUBLISH_INTERVAL = float(os.environ.get("HERMES_STREAM_PUBLISH_INTERVAL", "2"))
+
+# Articles waiting for enrichment before the fetcher blocks
+QUEUE_SIZE = 256
+
+# =====================================================
+# LATENCY
+# =====================================================
+
+class LatencyTracker:
+    """Time from an article appearing to its story being published.
+
+    ``feed`` is measured from the feed's publishedAt, ``fetch`` from the
+    moment our fetcher stored the article.
+    """
+
+    def __init__(self, path=LATENCY_FILE):
+        self.path = path
+        self.samples = {"feed": [], "fetch": []}
+
+    def record(self, meta, visible_at):
+        published_at = parse_time(meta.get("publishedAt"))
+        fetched_at = meta.get("fetched_at")
+
+        if published_at is not None:
+            self.samples["feed"].append(visible_at - published_at)
+        if fetched_at is not None:
+            self.samples["fetch"].append(visible_at - fetched_at)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "url": meta["url"],
+                "published_at": published_at,
+                "fetched_at": fetched_at,
+                "visible_at": visible_at
+            }) + "\n")
+
+    def summary(self):
+        parts = []
+        for name, values in self.samples.items():
+            if values:
+                p50, p95 = np.percentile(values, [50, 95])
+                parts.append(f"{name}→visible p50 {p50:.1f}s p95 {p95:.1f}s")
+        return " | ".join(parts) or "no samples"
+
+    def report(self):
+        print(f"Latency ({len(self.samples['fetch'])} stories): {self.summary()}")
+
+# =====================================================
+# PUBLISHING
+# =====================================================
+
+def story_key(story):
+    return normalize_url(story.get("input_article", {}).get("url", ""))
+
+
+class BiasPublisher:
+    """Keeps bias_classified_output.json in memory and republishes it.
+
+    Stories from the last batch run are kept; each streamed story is
+    bias-classified on its own and the document is rewritten atomically,
+    so the API sees it straight away.
+    """
+
+    def __init__(self, output_file=BIAS_OUTPUT, publisher_list=PUBLISHER_LIST):
+        self.output_file = output_file
+        self.classifier = NewsBiasClassifier(publisher_list)
+
+        data = load_json_file(output_file, {}) or {}
+        self.political = data.get("political_articles_data", [])
+        self.non_political = data.get("non_political_articles_data", [])
+        self.keys = {story_key(s) for s in self.political + self.non_political}
+
+    def publish(self, stories):
+        added = 0
+
+        for story in stories:
+            key = story_key(story)
+            if key in self.keys:
+                continue
+
+            classified, article_type = self.classifier.classify_article(story)
+
+            if article_type == "political":
+                self.political.append(classified)
+            else:
+                self.non_political.append(classified)
+
+            self.keys.add(key)
+            added += 1
+
+        if added:
+            report = self.classifier.build_report(self.political, self.non_political)
+            atomic_write_json(self.output_file, report)
+
+        return added
+
+
+class StoragePublisher:
+    """BiasPublisher for the SQLite backend: streamed stories are stored
+    as classified and labelled in place (exports follow HERMES_JSON_EXPORT).
+    """
+
+    def __init__(self, storage, publisher_list=PUBLISHER_LIST):
+        self.storage = storage
+        self.classifier = NewsBiasClassifier(publisher_list)
+
+    def publish(self, stories):
+        # Label only what was just saved; earlier stories are labelled
+        self.storage.save_classified(None, stories)
+        self.storage.label_bias(self.classifier, ids=[story_id(s) for s in stories])
+        return len(stories)
+
+# =====================================================
+# STAGES
+# =====================================================
+# fetch → enrich_q → enrich workers → classify_q → classifier
+#       → publish_q → publisher. Every queue item carries the article
+# metadata so latency can be measured at the end.
+
+def article_meta(record, fetched_at):
+    return {
+        "url": record.get("url") or record.get("link"),
+        "title": record.get("title"),
+        "publishedAt": record.get("publishedAt"),
+        "source": record.get("source"),
+        "seq": record.get("seq"),
+        "fetched_at": fetched_at
+    }
+
+
+async def enqueue(records, enrich_q, seen, fetched_at=None):
+    queued = 0
+
+    for record in records:
+        meta = article_meta(record, fetched_at or parse_time(record.get("createdAt")))
+
+        if not isinstance(meta["url"], str):
+            continue
+
+        key = normalize_url(meta["url"])
+        if key in seen:
+            continue
+        seen.add(key)
+
+        await enrich_q.put(meta)
+        queued += 1
+
+    return queued
+
+
+async def fetch_loop(store, queues, seen, failed, once=False):
+    enrich_q = queues[0]
+
+    while True:
+        started = time.monotonic()
+
+        new_articles = await asyncio.to_thread(fetch_new_articles, store)
+        # Durable (and visible to the API) before the next poll
+        await asyncio.to_thread(store.close)
+        last_seq = store.last_seq
+        queued = await enqueue(new_articles, enrich_q, seen, fetched_at=time.time())
+
+        print(f"[stream] {queued} new articles queued")
+
+        for queue in queues:
+            await queue.join()
+
+        # Everything stored up to this poll has been handled, except what
+        # failed; a restart resumes from here
+        await asyncio.to_thread(advance_checkpoint, store, fsn.STORE_CONSUMER, last_seq, failed)
+        failed.clear()
+
+        if once:
+            return
+        await asyncio.sleep(max(0.0, POLL_INTERVAL - (time.monotonic() - started)))
+
+
+async def enrich_worker(enrich_q, classify_q, failed):
+    # Seqs of articles that could not be enriched go to ``failed``, so the
+    # checkpoint leaves them for the next run
+    while True:
+        meta = await enrich_q.get()
+
+        try:
+            result = await fsn.process_article(meta)
+
+            if result:
+                # Journaled like the batch stage, so it is never redone
+                # (a durable write, so off the event loop)
+                await asyncio.to_thread(fsn.save_result, meta, result)
+
+                if result.get("related_reports"):
+                    await classify_q.put((meta, result))
+            else:
+                failed.append(meta["seq"])
+
+        except Exception as e:
+            print("Error:", e)
+            failed.append(meta["seq"])
+
+        finally:
+            enrich_q.task_done()
+
+
+def drain(queue, first, limit=None):
+    # ``first`` plus whatever else is already waiting
+    items = [first]
+    while not queue.empty() and (limit is None or len(items) < limit):
+        items.append(queue.get_nowait())
+    return items
+
+
+async def classify_worker(classify_q, publish_q):
+    while True:
+        batch = drain(classify_q, await classify_q.get(), CLASSIFY_BATCH)
+
+        try:
+            stories = [story for _, story in batch]
+            targets = [a for story in stories for a in missing_images(story)]
+
+            _, images = await asyncio.gather(
+                asyncio.to_thread(categorize, stories),
+                asyncio.to_thread(fetch_images, [a["url"] for a in targets])
+            )
+
+            for a in targets:
+                a["image_url"] = images[a["url"]]
+
+            await publish_q.put(batch)
+
+        except Exception as e:
+            print("Classify error:", e)
+
+        finally:
+            for _ in batch:
+                classify_q.task_done()
+
+
+async def publish_worker(publish_q, publisher, latency):
+    last_publish = 0.0
+
+    while True:
+        first = await publish_q.get()
+
+        # Let batches finishing shortly after the last publish join this one
+        wait = last_publish + PUBLISH_INTERVAL - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        batches = drain(publish_q, first)
+        items = [item for batch in batches for item in batch]
+
+        try:
+            added = await asyncio.to_thread(publisher.publish, [story for _, story in items])
+            visible_at = time.time()
+
+            for meta, _ in items:
+                latency.record(meta, visible_at)
+
+            print(f"[stream] published {added} stories | {latency.summary()}")
+
+        except Exception as e:
+            print("Publish error:", e)
+
+        finally:
+            last_publish = time.monotonic()
+            for _ in batches:
+                publish_q.task_done()
+
+# =====================================================
+# MAIN
+# =====================================================
+
+async def main(once=False):
+    """Poll the feeds and publish each story as soon as it is ready.
+
+    With ``once`` a single poll is made and the run ends when every queue
+    has drained; otherwise it runs until interrupted.
+    """
+    storage = get_storage()
+    store = storage.open_articles()
+    publisher = BiasPublisher() if storage.name == "json" else StoragePublisher(storage)
+    latency = LatencyTracker()
+
+    enrich_q = asyncio.Queue(QUEUE_SIZE)
+    classify_q = asyncio.Queue()
+    publish_q = asyncio.Queue()
+
+    failed = []
+
+    workers = [
+        asyncio.create_task(enrich_worker(enrich_q, classify_q, failed))
+        for _ in range(fsn.ARTICLE_WORKERS)
+    ]
+    workers.append(asyncio.create_task(classify_worker(classify_q, publish_q)))
+    workers.append(asyncio.create_task(publish_worker(publish_q, publisher, latency)))
+
+    seen = fsn.load_processed()
+
+    try:
+        # Articles stored earlier but not yet picked up by any run, inside
+        # the processing window
+        backlog = store.iter_records(
+            since_seq=store.get_checkpoint(fsn.STORE_CONSUMER),
+            since_ts=processing_window_start()
+        )
+        print(f"[stream] {await enqueue(backlog, enrich_q, seen)} backlog articles queued")
+
+        await fetch_loop(store, (enrich_q, classify_q, publish_q), seen, failed, once=once)
+
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        store.close()
+        await fsn.browser_pool.close()
+        fsn.results_journal.compact()
+        fsn.flush_publisher_cache()
+        fsn.redirect_cache.save()
+        fsn.summarizer.save()
+        latency.report()
+
+# =====================================================
+# RUN
+# =====================================================
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(once="--once" in sys.argv))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import os
+import threading
+from pipeline_utils import atomic_write_json, load_json_file
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+CACHE_FILE = os.path.join(DATA_DIR, "summary_cache.json")
+
+OLLAMA_MODEL = os.environ.get("HERMES_OLLAMA_MODEL", "llama3.2")
+
+# None → the ollama client's default (OLLAMA_HOST env or localhost:11434)
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST")
+
+# Requests in flight at once; the rest wait their turn
+SUMMARY_CONCURRENCY = int(os.environ.get("HERMES_SUMMARY_CONCURRENCY", "2"))
+
+# Seconds before a single summary call is abandoned
+SUMMARY_TIMEOUT = float(os.environ.get("HERMES_SUMMARY_TIMEOUT", "120"))
+
+# Bump whenever the prompts below change so cached summaries are not reused
+PROMPT_VERSION = "1"
+
+# =====================================================
+# PROMPTS
+# =====================================================
+
+ARTICLE_SYSTEM = "You summarize news articles factually."
+
+ARTICLE_PROMPT = """
+Summarize this news article in 2–3 factual lines.
+No opinions. Neutral journalistic tone.
+
+{text}
+"""
+
+STORY_SYSTEM = "You are a neutral news editor combining multiple reports."
+
+STORY_PROMPT = """
+Create a unified news summary in 3–4 lines combining all sources.
+Remove repetition.
+Stay factual and neutral.
+
+{text}
+"""
+
+
+def clean_summary(text: str) -> str:
+    if not text:
+        return ""
+
+    # remove unwanted starting phrases
+    unwanted_prefixes = [
+        "Here is a summary",
+        "Here are",
+        "Here is a unified",
+        "Here is the summary",
+        "Summary:",
+        "Here’s",
+    ]
+
+    cleaned = text.strip()
+
+    for phrase in unwanted_prefixes:
+        if cleaned.lower().startswith(phrase.lower()):
+            # remove first line completely
+            cleaned = "\n".join(cleaned.split("\n")[1:]).strip()
+            break
+
+    return cleaned
+
+# =====================================================
+# SUMMARY SERVICE
+# =====================================================
+
+class SummaryService:
+    """Bounded, cached access to Ollama.
+
+    Callers just ``await`` a summary. At most ``concurrency`` requests are
+    in flight; others queue on the semaphore. Results are cached on disk
+    by (prompt version, model, prompt text), so articles seen in earlier
+    runs cost nothing.
+    """
+
+    def __init__(self, model=OLLAMA_MODEL, host=OLLAMA_HOST,
+                 concurrency=SUMMARY_CONCURRENCY, timeout=SUMMARY_TIMEOUT,
+                 cache_path=CACHE_FILE):
+        self.model = model
+        self.host = host
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache_path = cache_path
+
+        self.cache = load_json_file(cache_path, {}) or {}
+        self.lock = threading.Lock()
+        self.dirty = False
+
+        self._client = None
+        self._slots = None
+        self._loop = None
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def _ensure_client(self):
+        # The async client and semaphore belong to one event loop; a later
+        # asyncio.run() in the same process gets fresh ones
+        loop = asyncio.get_running_loop()
+
+        if self._client is None or self._loop is not loop:
+            import ollama
+
+            self._client = ollama.AsyncClient(host=self.host, timeout=self.timeout)
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+
+    def cache_key(self, kind, prompt):
+        raw = "\0".join([PROMPT_VERSION, kind, self.model, prompt])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _chat(self, kind, system, prompt):
+        key = self.cache_key(kind, prompt)
+
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                return self.cache[key]
+            self.misses += 1
+
+        self._ensure_client()
+
+        async with self._slots:
+            try:
+                response = await asyncio.wait_for(
+                    self._client.chat(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": system},
+                            {"role": "user", "content": prompt}
+                        ]
+                    ),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                print(f"{kind.title()} summary timed out after {self.timeout}s")
+                return None
+            except Exception as e:
+                self.errors += 1
+                print(f"{kind.title()} summary error:", e)
+                return None
+
+        summary = clean_summary(response["message"]["content"].strip())
+
+        with self.lock:
+            self.cache[key] = summary
+            self.dirty = True
+
+        return summary
+
+    # -------------------------------
+    # Public API
+    # -------------------------------
+
+    async def article_summary(self, text):
+        if not text or len(text) < 200:
+            return None
+
+        return await self._chat("article", ARTICLE_SYSTEM, ARTICLE_PROMPT.format(text=text[:4000]))
+
+    async def story_summary(self, main_text, related_texts):
+        combined = main_text[:2500]
+
+        for t in related_texts[:5]:   # limit sources
+            combined += "\n\nSOURCE:\n" + t[:1200]
+
+        return await self._chat("story", STORY_SYSTEM, STORY_PROMPT.format(text=combined))
+
+    def save(self):
+        with self.lock:
+            if self.dirty:
+                atomic_write_json(self.cache_path, self.cache, indent=None)
+                self.dirty = False
+
+    def report(self):
+        print(
+            f"Summaries: {self.hits} cached | {self.misses} requested | "
+            f"{self.errors} errors | {self.timeouts} timeouts"
+        )
@@ -0,0 +1,257 @@
+import base64
+import bisect
+import json
+from pipeline_utils import parse_time, story_id
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# =====================================================
+# HELPERS
+# =====================================================
+
+def story_card(story_id_, story):
+    # What a list page needs; the full story is at /stories/<id>
+    article = story.get("input_article", {})
+    bias = story.get("bias_classification")
+
+    return {
+        "id": story_id_,
+        "title": article.get("title"),
+        "url": article.get("url"),
+        "source_name": article.get("source_name"),
+        "publishedAt": article.get("publishedAt"),
+        "image_url": article.get("image_url"),
+        "category": story.get("category"),
+        "final_bias": bias["final_bias"] if bias else None,
+        "related_count": len(story.get("related_reports", []))
+    }
+
+
+def encode_cursor(ts, id_):
+    return base64.urlsafe_b64encode(f"{ts}:{id_}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    ts, id_ = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 1)
+    return float(ts), id_
+
+# =====================================================
+# INDEX
+# =====================================================
+
+class StoryIndex:
+    """Stories of bias_classified_output.json, newest first, with
+    postings per category, final_bias and publisher.
+
+    Built once per version of the file (see ResponseCache.derive).
+    Postings are ascending positions in the newest-first order, so a page
+    is a walk from the cursor position through the shortest posting list.
+    """
+
+    def __init__(self, report):
+        stories = (
+            report.get("political_articles_data", [])
+            + report.get("non_political_articles_data", [])
+        )
+
+        rows = []
+        for story in stories:
+            ts = parse_time(story.get("input_article", {}).get("publishedAt")) or 0.0
+            rows.append((-ts, story_id(story), story))
+        rows.sort(key=lambda r: (r[0], r[1]))
+
+        # Sort keys of every position, for bisecting cursors and dates
+        self.keys = [(neg_ts, id_) for neg_ts, id_, _ in rows]
+        self.stories = [story for _, _, story in rows]
+        self.by_id = {id_: pos for pos, (_, id_) in enumerate(self.keys)}
+
+        self.postings = {"category": {}, "final_bias": {}, "publisher": {}}
+
+        for pos, story in enumerate(self.stories):
+            bias = story.get("bias_classification")
+
+            self._post("category", story.get("category"), pos)
+            self._post("final_bias", bias["final_bias"] if bias else None, pos)
+
+            publishers = {story.get("input_article", {}).get("source_name")}
+            publishers.update(r.get("source_name") for r in story.get("related_reports", []))
+            for publisher in publishers:
+                self._post("publisher", publisher, pos)
+
+        # Same postings as sets, for membership tests while intersecting
+        self.members = {
+            field: {value: set(positions) for value, positions in values.items()}
+            for field, values in self.postings.items()
+        }
+
+    def _post(self, field, value, pos):
+        if value:
+            self.postings[field].setdefault(value.lower(), []).append(pos)
+
+    def get(self, id_):
+        pos = self.by_id.get(id_)
+        return None if pos is None else self.stories[pos]
+
+    def facets(self):
+        return {
+            field: {value: len(positions) for value, positions in values.items()}
+            for field, values in self.postings.items()
+        }
+
+    def query(self, filters=None, since=None, until=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        """One page of stories, newest first.
+
+        ``filters`` maps category / final_bias / publisher to a value;
+        ``since`` / ``until`` are epoch seconds (inclusive). Returns
+        (cards, next_cursor); next_cursor is None on the last page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        # First position to look at: after the cursor, and no newer than `until`
+        start = 0
+        if cursor is not None:
+            ts, id_ = cursor
+            start = bisect.bisect_right(self.keys, (-ts, id_))
+        if until is not None:
+            start = max(start, bisect.bisect_left(self.keys, (-until, "")))
+
+        # Positions past `end` are older than `since`
+        end = len(self.keys)
+        if since is not None:
+            end = bisect.bisect_left(self.keys, (-since, chr(0x10FFFF)))
+
+        active = [
+            (field, value.lower()) for field, value in (filters or {}).items() if value
+        ]
+
+        if active:
+            # Walk the shortest posting list, test the rest by membership
+            active.sort(key=lambda fv: len(self.postings[fv[0]].get(fv[1], [])))
+            field, value = active[0]
+            driver = self.postings[field].get(value, [])
+            others = [self.members[f].get(v, set()) for f, v in active[1:]]
+            first = bisect.bisect_left(driver, start)
+            candidates = (driver[k] for k in range(first, len(driver)))
+        else:
+            others = []
+            candidates = range(start, end)
+
+        page = []
+        for pos in candidates:
+            if pos >= end:
+                break
+            if all(pos in other for other in others):
+                page.append(pos)
+                if len(page) > limit:
+                    break
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            neg_ts, id_ = self.keys[page[-1]]
+            next_cursor = encode_cursor(-neg_ts, id_)
+
+        return [story_card(self.keys[pos][1], self.stories[pos]) for pos in page], next_cursor
+
+
+class SqliteStoryIndex:
+    """StoryIndex interface answered by the SQLite backend's indexes.
+
+    Nothing is held in memory; each page is one indexed query ordered by
+    (published_ts DESC, id) with the same keyset cursor.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def labeled_since(self, updated_at):
+        """(id, story, updated_at) of stories labelled after ``updated_at``,
+        oldest first — what a derived index still has to pick up."""
+        rows = self.storage.conn.execute(
+            "SELECT story_id, labeled, updated_at FROM classifications "
+            "WHERE labeled IS NOT NULL AND updated_at > ? ORDER BY updated_at",
+            (updated_at,)
+        )
+        return [(id_, json.loads(labeled), updated) for id_, labeled, updated in rows]
+
+    def get(self, id_):
+        row = self.storage.conn.execute(
+            "SELECT labeled FROM classifications WHERE story_id = ? AND labeled IS NOT NULL",
+            (id_,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def facets(self):
+        conn = self.storage.conn
+
+        return {
+            "category": dict(conn.execute(
+                "SELECT lower(category), count(*) FROM classifications "
+                "WHERE labeled IS NOT NULL AND category IS NOT NULL GROUP BY 1"
+            )),
+            "final_bias": dict(conn.execute(
+                "SELECT final_bias, count(*) FROM classifications "
+                "WHERE labeled IS NOT NULL AND final_bias IS NOT NULL GROUP BY 1"
+            )),
+            # Stories per publisher, whether it wrote the input article or a report
+            "publisher": dict(conn.execute(
+                "SELECT publisher, count(*) FROM ("
+                " SELECT s.id AS story_id, s.publisher FROM stories s"
+                " UNION"
+                " SELECT r.story_id, r.publisher FROM reports r"
+                ") p JOIN classifications c ON c.story_id = p.story_id "
+                "WHERE c.labeled IS NOT NULL AND p.publisher IS NOT NULL "
+                "GROUP BY publisher"
+            ))
+        }
+
+    def query(self, filters=None, since=None, until=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        filters = {k: v.lower() for k, v in (filters or {}).items() if v}
+
+        where = ["c.labeled IS NOT NULL"]
+        params = []
+
+        if "category" in filters:
+            where.append("lower(c.category) = ?")
+            params.append(filters["category"])
+        if "final_bias" in filters:
+            where.append("c.final_bias = ?")
+            params.append(filters["final_bias"])
+        if "publisher" in filters:
+            where.append(
+                "(s.publisher = ? OR EXISTS (SELECT 1 FROM reports r "
+                "WHERE r.story_id = s.id AND r.publisher = ?))"
+            )
+            params += [filters["publisher"]] * 2
+        if since is not None:
+            where.append("s.published_ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("s.published_ts <= ?")
+            params.append(until)
+        if cursor is not None:
+            ts, id_ = cursor
+            where.append("(s.published_ts < ? OR (s.published_ts = ? AND s.id > ?))")
+            params += [ts, ts, id_]
+
+        rows = self.storage.conn.execute(
+            "SELECT s.id, s.published_ts, c.labeled FROM stories s "
+            "JOIN classifications c ON c.story_id = s.id "
+            "WHERE " + " AND ".join(where) + " "
+            "ORDER BY s.published_ts DESC, s.id LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+        return [story_card(id_, json.loads(labeled)) for id_, _, labeled in rows], next_cursor
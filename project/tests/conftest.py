@@ -0,0 +1,9 @@
+import os
+import sys
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# The API modules live in project/, the pipeline modules import each other
+# by bare name from project/start_pipeline/
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, "start_pipeline"))
@@ -0,0 +1,131 @@
+import time
+from datetime import datetime, timezone
+import pytest
+from article_store import ArticleStore, advance_checkpoint, checkpoint_seq
+
+
+def article(n, hours_ago=1):
+    published = datetime.fromtimestamp(time.time() - hours_ago * 3600, timezone.utc)
+    return {
+        "title": f"Story {n}",
+        "link": f"https://example.com/news/{n}",
+        "guid": f"guid-{n}",
+        "publishedAt": published.isoformat()
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(
+        directory=str(tmp_path / "raw_news"),
+        checkpoint_path=str(tmp_path / "checkpoints.json"),
+        archive_dir=str(tmp_path / "archive"),
+        legacy_paths=()
+    )
+    yield store
+    store.close()
+
+
+def test_append_assigns_increasing_seqs(store):
+    assert [store.append(article(n)) for n in range(3)] == [1, 2, 3]
+    assert store.last_seq == 3
+    assert len(store) == 3
+
+
+def test_duplicates_are_rejected_by_guid_or_link(store):
+    store.append(article(1))
+
+    same_guid = dict(article(2), guid="guid-1")
+    same_link = dict(article(3), link="https://www.example.com/news/1")
+
+    assert store.append(same_guid) is None
+    assert store.append(same_link) is None
+    assert store.seen(guid="guid-1")
+    assert store.seen(link="https://example.com/news/1?utm=x")
+    assert not store.seen(guid="guid-2")
+
+
+def test_articles_before_retention_are_not_stored(store):
+    assert store.append(article(1, hours_ago=24 * (store.retention_days + 2))) is None
+    assert len(store) == 0
+
+
+def test_iter_records_since_seq_and_time(store):
+    store.append(article(1, hours_ago=100))
+    store.append(article(2, hours_ago=2))
+    store.append(article(3, hours_ago=1))
+
+    assert [r["seq"] for r in store.iter_records()] == [1, 2, 3]
+    assert [r["seq"] for r in store.iter_records(since_seq=2)] == [3]
+    assert [r["seq"] for r in store.iter_records(since_ts=time.time() - 10 * 3600)] == [2, 3]
+
+
+def test_reopened_store_keeps_records_and_seqs(tmp_path, store):
+    store.append(article(1))
+    store.append(article(2))
+    store.close()
+
+    reopened = ArticleStore(
+        directory=store.directory,
+        checkpoint_path=store.checkpoint_path,
+        archive_dir=store.archive_dir,
+        legacy_paths=()
+    )
+    assert reopened.last_seq == 2
+    assert reopened.append(article(2)) is None
+    assert reopened.append(article(3)) == 3
+    reopened.close()
+
+
+def test_checkpoints_are_per_consumer(store):
+    assert store.get_checkpoint("similar") == 0
+
+    store.set_checkpoint("similar", 5)
+    store.set_checkpoint("stream", 2)
+
+    assert store.get_checkpoint("similar") == 5
+    assert store.get_checkpoint("stream") == 2
+
+
+@pytest.mark.parametrize("last_seq, failed, expected", [
+    (10, [], 10),
+    (10, [None], 10),
+    (10, [7], 6),
+    (10, [9, 4, 8], 3),
+    (10, [1], 0)
+])
+def test_checkpoint_seq_stops_before_first_failure(last_seq, failed, expected):
+    assert checkpoint_seq(last_seq, failed) == expected
+
+
+@pytest.mark.parametrize("failed, attempts, expected", [
+    ([7], {7: 2}, 6),
+    ([7], {7: 3}, 10),
+    ([4, 7], {4: 3, 7: 1}, 6)
+])
+def test_checkpoint_seq_gives_up_after_max_attempts(failed, attempts, expected):
+    assert checkpoint_seq(10, failed, attempts, max_attempts=3) == expected
+
+
+def test_advance_checkpoint_counts_failures_across_runs(store):
+    for _ in range(2):
+        assert advance_checkpoint(store, "similar", 10, [4, 7], max_attempts=3) == 3
+    assert store.get_failures("similar") == {4: 2, 7: 2}
+
+    # 7 succeeds on the third run, 4 fails for the third time
+    assert advance_checkpoint(store, "similar", 12, [4], max_attempts=3) == 12
+    assert store.get_checkpoint("similar") == 12
+    assert store.get_failures("similar") == {}
+
+
+def test_sqlite_store_keeps_failures(tmp_path, monkeypatch):
+    from storage import SqliteStorage
+
+    # A new database would otherwise import the real data/ files
+    monkeypatch.setattr(SqliteStorage, "import_json", lambda self: None)
+    articles = SqliteStorage(str(tmp_path / "hermes.db"), export=False).open_articles()
+
+    assert advance_checkpoint(articles, "similar", 5, [2], max_attempts=2) == 1
+    assert articles.get_failures("similar") == {2: 1}
+    assert advance_checkpoint(articles, "similar", 5, [2], max_attempts=2) == 5
+    assert articles.get_failures("similar") == {}
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+import pytest
+from embedding_index import EmbeddingIndex
+from embedding_store import EmbeddingStore
+
+
+def unit(*values):
+    v = np.asarray(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EmbeddingStore(os.path.join(str(tmp_path), "story_embeddings"))
+
+
+def test_refresh_reads_only_new_rows(store):
+    index = EmbeddingIndex(store)
+    index.refresh()
+    assert len(index) == 0
+
+    store.add_many(["a", "b"], [unit(1, 0, 0), unit(0, 1, 0)], model="m")
+    index.refresh()
+    assert index.ids == ["a", "b"]
+
+    store.add_many(["c"], [unit(1, 1, 0)], model="m")
+    index.refresh()
+    assert index.ids == ["a", "b", "c"]
+    assert index.rows_read == 3
+
+
+def test_reembedded_story_overwrites_its_row(store):
+    index = EmbeddingIndex(store)
+    store.add_many(["a", "b"], [unit(1, 0, 0), unit(0, 1, 0)], model="m")
+    index.refresh()
+
+    store.add_many(["a"], [unit(0, 1, 0)], model="m")
+    index.refresh()
+
+    assert len(index) == 2
+    assert index.similar("a", k=1) == [("b", pytest.approx(1.0))]
+
+
+def test_new_model_resets_the_index(store):
+    index = EmbeddingIndex(store)
+    store.add_many(["a", "b"], [unit(1, 0, 0), unit(0, 1, 0)], model="m1")
+    index.refresh()
+
+    # Another dimension
+    store.add_many(["c"], [unit(1, 0)], model="m2")
+    index.refresh()
+    assert index.ids == ["c"]
+    assert index.matrix.shape[1] == 2
+
+    # Same dimension, another model
+    store.add_many(["d"], [unit(0, 1)], model="m3")
+    index.refresh()
+    assert index.ids == ["d"]
+    assert index.similar("c") is None
+
+
+def test_compaction_is_followed(store):
+    index = EmbeddingIndex(store)
+    store.add_many(["a", "b"], [unit(1, 0, 0), unit(0, 1, 0)], model="m")
+    store.add_many(["a"], [unit(0, 0, 1)], model="m")
+    index.refresh()
+
+    store.compact()
+    index.refresh()
+
+    assert sorted(index.ids) == ["a", "b"]
+    assert index.rows_read == 2
+    assert index.search(unit(0, 0, 1), k=1) == [("a", pytest.approx(1.0))]
+
+
+def test_search_uses_lsh_above_threshold(store):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((64, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    index = EmbeddingIndex(store, ann_min_rows=32)
+    store.add_many([f"s{i}" for i in range(64)], vectors, model="m")
+    index.refresh()
+
+    assert index.lsh is not None
+    assert index.search(vectors[5], k=1) == [("s5", pytest.approx(1.0))]
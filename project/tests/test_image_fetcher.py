@@ -0,0 +1,59 @@
+import threading
+import pytest
+import image_fetcher
+
+
+PAGE = '<html><head><meta property="og:image" content="https://cdn.example.com/a.jpg"></head></html>'
+
+
+@pytest.fixture
+def images(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_fetcher, "CACHE_FILE", str(tmp_path / "image_cache.json"))
+    monkeypatch.setattr(image_fetcher, "_cache", {"entries": None, "dirty": False, "lock": threading.Lock()})
+    monkeypatch.setattr(image_fetcher.page_cache, "peek_html", lambda url: "")
+
+    fetched = []
+
+    def serve(pages):
+        def read_head(url):
+            fetched.append(url)
+            page = pages[url]
+            if isinstance(page, Exception):
+                raise page
+            return page
+        monkeypatch.setattr(image_fetcher, "read_head", read_head)
+
+    serve.fetched = fetched
+    return serve
+
+
+def test_found_image_is_cached(images):
+    images({"https://example.com/a": PAGE})
+
+    assert image_fetcher.fetch_image("https://example.com/a") == "https://cdn.example.com/a.jpg"
+    assert image_fetcher.fetch_image("https://www.example.com/a") == "https://cdn.example.com/a.jpg"
+    assert images.fetched == ["https://example.com/a"]
+
+
+def test_page_without_image_is_cached_for_negative_ttl(images):
+    images({"https://example.com/plain": "<html><head><title>x</title></head></html>"})
+
+    assert image_fetcher.fetch_image("https://example.com/plain") is None
+    assert image_fetcher.fetch_image("https://example.com/plain") is None
+    assert len(images.fetched) == 1
+
+    entries = image_fetcher._entries()
+    entries["https://example.com/plain"]["ts"] -= image_fetcher.NEGATIVE_TTL + 1
+
+    image_fetcher.fetch_image("https://example.com/plain")
+    assert len(images.fetched) == 2
+
+
+def test_failed_fetch_is_not_cached(images):
+    images({"https://example.com/down": ConnectionError("timed out")})
+
+    assert image_fetcher.fetch_image("https://example.com/down") is None
+    assert image_fetcher.fetch_image("https://example.com/down") is None
+
+    assert len(images.fetched) == 2
+    assert "https://example.com/down" not in image_fetcher._entries()
@@ -0,0 +1,46 @@
+import time
+import pytest
+import redirect_cache
+from redirect_cache import RedirectCache
+
+
+@pytest.fixture
+def redirects(tmp_path):
+    return RedirectCache(str(tmp_path / "redirects.json"))
+
+
+def age(cache, url, seconds):
+    cache.entries[cache.key(url)]["ts"] = time.time() - seconds
+
+
+def test_resolved_link_is_kept_for_positive_ttl(redirects):
+    url = "https://news.google.com/rss/articles/abc?oc=5"
+    redirects.put(url, "https://publisher.com/story")
+
+    # Tracking parameters do not change the key
+    assert redirects.get("https://news.google.com/rss/articles/abc") == (True, "https://publisher.com/story")
+
+    age(redirects, url, redirect_cache.POSITIVE_TTL + 1)
+    assert redirects.get(url) == (False, None)
+
+
+def test_dead_link_expires_after_negative_ttl(redirects):
+    url = "https://news.google.com/rss/articles/dead"
+    redirects.put(url, None)
+
+    assert redirects.get(url) == (True, None)
+    assert redirects.negative_hits == 1
+
+    age(redirects, url, redirect_cache.NEGATIVE_TTL + 1)
+    assert redirects.get(url) == (False, None)
+
+
+def test_save_drops_expired_entries(redirects):
+    redirects.put("https://news.google.com/rss/articles/live", "https://publisher.com/live")
+    redirects.put("https://news.google.com/rss/articles/old", None)
+    age(redirects, "https://news.google.com/rss/articles/old", redirect_cache.NEGATIVE_TTL + 1)
+
+    redirects.save()
+
+    reloaded = RedirectCache(redirects.path)
+    assert list(reloaded.entries) == [RedirectCache.key("https://news.google.com/rss/articles/live")]
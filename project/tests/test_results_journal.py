@@ -0,0 +1,132 @@
+import json
+import pytest
+from results_journal import ResultsJournal, dump_item, render
+
+
+def result(n):
+    return {
+        "input_article": {"url": f"https://example.com/a/{n}", "title": f"Story {n}"},
+        "related_reports": [{"url": f"https://other.com/r/{n}", "title": "Report"}]
+    }
+
+
+def no_related(n):
+    return {"url": f"https://example.com/lonely/{n}", "title": f"Lonely {n}"}
+
+
+def member(n, story):
+    return {"url": f"https://example.com/m/{n}", "title": f"Member {n}", "story_url": story}
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def output(tmp_path):
+    return str(tmp_path / "Similar_Links_Output.json")
+
+
+def test_render_matches_json_dump():
+    document = {
+        "generated_at": "2026-01-01T00:00:00+00:00",
+        "results": [result(1), result(2)],
+        "no_related_reports": [],
+        "failed_urls": ["https://x.com/é"]
+    }
+    rendered = render({
+        k: [dump_item(v) for v in value] if isinstance(value, list) else value
+        for k, value in document.items()
+    })
+
+    assert rendered == json.dumps(document, ensure_ascii=False, indent=2)
+
+
+def test_entries_are_published_on_compact(output):
+    journal = ResultsJournal(output, compact_every=100)
+
+    journal.append("result", result(1))
+    journal.append("no_related", no_related(1))
+    journal.append("member", member(1, "https://example.com/a/1"))
+    assert journal.pending == 3
+
+    journal.compact()
+
+    data = read(output)
+    assert [r["input_article"]["url"] for r in data["results"]] == ["https://example.com/a/1"]
+    assert [r["url"] for r in data["no_related_reports"]] == ["https://example.com/lonely/1"]
+    assert [r["story_url"] for r in data["clustered_articles"]] == ["https://example.com/a/1"]
+    assert journal.pending == 0
+    assert list(journal._read_journal()) == []
+
+
+def test_processed_keys_cover_journal_and_published(output):
+    journal = ResultsJournal(output, compact_every=100)
+    journal.append("result", result(1))
+    journal.compact()
+    journal.append("no_related", no_related(2))
+
+    assert journal.processed_keys() == {
+        "https://example.com/a/1",
+        "https://example.com/lonely/2"
+    }
+
+
+def test_replayed_journal_does_not_duplicate(output):
+    journal = ResultsJournal(output, compact_every=100)
+    journal.append("result", result(1))
+    journal.compact()
+
+    # A crash between publishing and truncating leaves the entry journaled
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"kind": "result", "entry": result(1)}) + "\n")
+
+    ResultsJournal(output).compact()
+
+    assert len(read(output)["results"]) == 1
+
+
+def test_compaction_waits_for_a_fraction_of_the_published(output):
+    journal = ResultsJournal(output, compact_every=2, compact_ratio=0.5)
+
+    for n in range(2):
+        journal.append("result", result(n))
+    assert journal.pending == 0
+    assert len(read(output)["results"]) == 2
+
+    # Compactions at 4 and 6 published (2 new each time, at least half of
+    # what was there), then 9 (3 new); 3 more are not yet half of 9
+    for n in range(2, 12):
+        journal.append("result", result(n))
+
+    assert journal.published_count() == 9
+    assert journal.pending == 3
+    assert len(read(output)["results"]) == 9
+
+
+def test_rewrite_by_another_process_is_read_again(output):
+    journal = ResultsJournal(output, compact_every=100)
+    journal.append("result", result(1))
+    journal.compact()
+
+    data = read(output)
+    data["results"].append(result(2))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+    journal.append("result", result(3))
+    journal.compact()
+
+    urls = [r["input_article"]["url"] for r in read(output)["results"]]
+    assert urls == ["https://example.com/a/1", "https://example.com/a/2", "https://example.com/a/3"]
+
+
+def test_partial_last_line_is_ignored(output):
+    journal = ResultsJournal(output, compact_every=100)
+    journal.append("result", result(1))
+
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"kind": "result", "entry": {"inp')
+
+    assert len(list(journal._read_journal())) == 1
@@ -0,0 +1,78 @@
+from search_index import SearchIndex
+
+
+def story(n, title, category="political", bias="left", summary=""):
+    return {
+        "input_article": {"url": f"https://example.com/{n}", "title": title, "summary": summary},
+        "category": category,
+        "bias_classification": {"final_bias": bias} if bias else None,
+        "related_reports": []
+    }
+
+
+def ids(result):
+    return [card["url"].rsplit("/", 1)[1] for card in result["results"]]
+
+
+def test_search_ranks_and_counts_facets():
+    index = SearchIndex()
+    index.sync([
+        ("1", story(1, "Monsoon session of parliament opens", bias="left")),
+        ("2", story(2, "Parliament passes budget, parliament adjourned", bias="right")),
+        ("3", story(3, "Cricket final in Mumbai", category="sports", bias=None))
+    ])
+
+    result = index.search("parliament")
+    assert result["total"] == 2
+    assert ids(result) == ["2", "1"]
+    assert result["facets"]["final_bias"] == {"left": 1, "right": 1}
+
+    assert ids(index.search("parliament", filters={"final_bias": "left"})) == ["1"]
+
+
+def test_last_word_matches_as_prefix():
+    index = SearchIndex()
+    index.sync([("1", story(1, "Election commission announces dates"))])
+
+    assert index.search("elect")["total"] == 1
+    assert index.search("elect dates")["total"] == 0
+    assert index.search("elect* dates")["total"] == 1
+
+
+def test_prefix_keeps_the_exact_word_past_the_expansion_limit(monkeypatch):
+    monkeypatch.setattr("search_index.MAX_PREFIX_TERMS", 2)
+    index = SearchIndex()
+    index.sync(
+        [("1", story(1, "Rail budget"))]
+        + [(str(n), story(n, "Railway railways strike")) for n in range(2, 6)]
+    )
+
+    # Four stories have "railway" and "railways", one has only "rail"
+    result = index.search("rail")
+    assert result["total"] == 5
+    assert "1" in ids(result)
+
+
+def test_sync_updates_only_changed_stories_and_removes_missing():
+    index = SearchIndex()
+    assert index.sync([("1", story(1, "Flood warning")), ("2", story(2, "Heat wave"))], version="a") == 2
+
+    # Same version: nothing to do
+    assert index.sync([], version="a") == 0
+    assert index.search("flood")["total"] == 1
+
+    changed = index.sync([("1", story(1, "Flood warning")), ("3", story(3, "Cyclone alert"))], version="b")
+    assert changed == 1
+    assert index.version == "b"
+    assert index.search("heat")["total"] == 0
+    assert index.search("cyclone")["total"] == 1
+
+
+def test_replaced_story_drops_its_old_terms():
+    index = SearchIndex()
+    index.add("1", story(1, "Old headline"))
+    index.add("1", story(1, "New headline"))
+
+    assert index.search("old")["total"] == 0
+    assert index.search("new")["total"] == 1
+    assert len(index.docs) == 1
@@ -0,0 +1,102 @@
+"""Local stand-in for the Ollama HTTP API, for tests and benchmarks.
+
+    python tools/stub_ollama.py [--port 11435] [--delay 0.5]
+    OLLAMA_HOST=http://127.0.0.1:11435 python start_pipeline/Fetch_Similar_News.py
+
+Answers /api/chat deterministically: the "summary" is the first sentences
+of the text after the prompt. --delay simulates model latency per request.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_summary(prompt, sentences=2):
+    # Skip the instruction lines, keep the article body
+    body = prompt.strip().split("\n\n", 1)[-1]
+    parts = re.split(r"(?<=[.!?])\s+", " ".join(body.split()))
+    return " ".join(parts[:sentences])
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    calls = 0
+    lock = threading.Lock()
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "stub", "model": "stub"}]})
+        elif self.path == "/api/stats":
+            self._send_json({"calls": StubOllamaHandler.calls})
+        else:
+            body = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._send_json({"error": f"unsupported endpoint {self.path}"}, status=404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        with StubOllamaHandler.lock:
+            StubOllamaHandler.calls += 1
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        user = next(
+            (m["content"] for m in reversed(request.get("messages", [])) if m.get("role") == "user"),
+            ""
+        )
+
+        self._send_json({
+            "model": request.get("model", "stub"),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": fake_summary(user)},
+            "done": True,
+            "done_reason": "stop"
+        })
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(port=0, delay=0.0):
+    """Start the stub in a background thread; returns (server, base_url)."""
+    handler = type("Handler", (StubOllamaHandler,), {"delay": delay})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_stub(args.port, args.delay)
+    print(f"Stub Ollama listening on {url} (delay {args.delay}s)")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()